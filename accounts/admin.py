@@ -42,6 +42,7 @@ class AccountTypeAdmin(admin.ModelAdmin):
         ('General Info', {'fields': ('name', 'description')}),
         ('Balance Info', {'fields': ('min_balance', 'max_balance')}),
         ('Transaction Limits', {'fields': ('daily_transfer_limit', 'max_single_transfer_amount')}),
+        ('Velocity Limits', {'fields': ('velocity_window_minutes', 'velocity_max_transfers', 'velocity_max_amount', 'velocity_max_new_recipients')}),
     )
 
 
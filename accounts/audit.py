@@ -0,0 +1,111 @@
+import atexit
+import json
+import logging
+import os
+import threading
+import time
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import DatabaseError, close_old_connections
+from django.utils.dateparse import parse_datetime
+from django.utils.timezone import now
+from .models import AuditLog
+
+logger = logging.getLogger("accounts")
+
+
+class AuditSink:
+    """
+    Per-process buffer for AuditLog rows.
+
+    Records are written with one `bulk_create` once AUDIT_BUFFER_SIZE are
+    queued or the oldest has waited AUDIT_FLUSH_INTERVAL_SECONDS (a daemon
+    thread flushes idle buffers), and at interpreter shutdown. If the
+    database rejects a flush the batch is appended to AUDIT_FALLBACK_FILE as
+    JSON lines; `replay_audit_fallback` loads them back.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.records = []
+        self.oldest = None
+        self.flusher = None
+
+    def write(self, user_id, action, ip_address=None, metadata=None):
+        record = AuditLog(user_id=user_id, action=action, ip_address=ip_address, metadata=metadata, timestamp=now())
+        with self.lock:
+            self.records.append(record)
+            self.oldest = self.oldest or time.monotonic()
+            due = len(self.records) >= settings.AUDIT_BUFFER_SIZE
+        if due:
+            self.flush()
+        else:
+            self.start_flusher()
+
+    def take(self):
+        with self.lock:
+            records, self.records, self.oldest = self.records, [], None
+        return records
+
+    def flush(self):
+        records = self.take()
+        if not records:
+            return 0
+        try:
+            AuditLog.objects.bulk_create(records)
+        except DatabaseError as e:
+            logger.error(f"Audit flush of {len(records)} records failed, writing to fallback file: {e}")
+            self.write_fallback(records)
+        return len(records)
+
+    def write_fallback(self, records):
+        path = settings.AUDIT_FALLBACK_FILE
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        lines = "".join(
+            json.dumps({
+                "user_id": record.user_id,
+                "action": record.action,
+                "ip_address": record.ip_address,
+                "metadata": record.metadata,
+                "timestamp": record.timestamp,
+            }, cls=DjangoJSONEncoder) + "\n"
+            for record in records
+        )
+        with open(path, "a", encoding="utf-8") as fallback:
+            fallback.write(lines)
+            fallback.flush()
+            os.fsync(fallback.fileno())
+
+    def start_flusher(self):
+        if self.flusher is not None and self.flusher.is_alive():
+            return
+        with self.lock:
+            if self.flusher is not None and self.flusher.is_alive():
+                return
+            self.flusher = threading.Thread(target=self.run_flusher, name="audit-flusher", daemon=True)
+            self.flusher.start()
+
+    def run_flusher(self):
+        interval = settings.AUDIT_FLUSH_INTERVAL_SECONDS
+        while True:
+            time.sleep(interval / 2)
+            with self.lock:
+                due = self.oldest is not None and time.monotonic() - self.oldest >= interval
+            if due:
+                close_old_connections()
+                self.flush()
+
+
+def load_fallback_records(path):
+    """AuditLog instances for the JSON lines written by `AuditSink.write_fallback`."""
+    with open(path, encoding="utf-8") as fallback:
+        for line in fallback:
+            if not line.strip():
+                continue
+            data = json.loads(line)
+            data["timestamp"] = parse_datetime(data["timestamp"])
+            yield AuditLog(**data)
+
+
+audit_sink = AuditSink()
+atexit.register(audit_sink.flush)
@@ -0,0 +1,39 @@
+import time
+from django.core.management.base import BaseCommand
+from django.test.utils import override_settings
+from accounts.audit import AuditSink
+from accounts.models import AuditLog
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare audit log throughput of one INSERT per record with the buffered bulk writer. "
+        "Run it against the production database engine; the records are deleted afterwards."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--records", type=int, default=5000)
+        parser.add_argument("--buffer-sizes", default="50,100,500", help="Comma separated AUDIT_BUFFER_SIZE values to try")
+
+    def handle(self, *args, **options):
+        records = options["records"]
+        action = "benchmark_audit_log"
+        try:
+            started = time.perf_counter()
+            for index in range(records):
+                AuditLog.objects.create(user=None, action=action, metadata={"index": index})
+            self.report("per-row insert", records, time.perf_counter() - started)
+
+            for buffer_size in [int(size) for size in options["buffer_sizes"].split(",")]:
+                with override_settings(AUDIT_BUFFER_SIZE=buffer_size):
+                    sink = AuditSink()
+                    started = time.perf_counter()
+                    for index in range(records):
+                        sink.write(user_id=None, action=action, metadata={"index": index})
+                    sink.flush()
+                    self.report(f"buffered (size {buffer_size})", records, time.perf_counter() - started)
+        finally:
+            AuditLog.objects.filter(action=action).delete()
+
+    def report(self, label, records, elapsed):
+        self.stdout.write(f"{label}: {records} records in {elapsed:.2f}s ({records / elapsed:.0f} records/s)")
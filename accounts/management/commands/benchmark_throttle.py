@@ -0,0 +1,66 @@
+import logging
+import time
+import uuid
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+from django.test import RequestFactory
+from django.test.utils import override_settings
+from rest_framework.request import Request
+from fintech.throttling import CustomRateThrottle
+
+
+class TimestampListThrottle(CustomRateThrottle):
+    """The previous algorithm, kept here as a baseline: a cached list of every request timestamp."""
+
+    def allow_request(self, request, view):
+        self.num_requests, self.duration = self.parse_rate(self.get_rate(request))
+        key = f"{self.cache_key(request)}_list"
+        now = self.timer()
+        history = [timestamp for timestamp in cache.get(key, []) if timestamp > now - self.duration]
+        if len(history) >= self.num_requests:
+            return False
+        history.append(now)
+        cache.set(key, history, self.duration)
+        return True
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure the cost of one rate limit check for growing limits, for the sliding window "
+        "counter and the previous timestamp list. Run it against the production cache backend."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--limits", default="10,100,1000,10000", help="Comma separated requests per hour to try")
+        parser.add_argument("--checks", type=int, default=5000, help="Checks timed per limit")
+
+    def handle(self, *args, **options):
+        throttle_logger = logging.getLogger("throttling")
+        throttle_logger.disabled = True  # Time the algorithm, not the rejection warnings
+        try:
+            for limit in [int(value) for value in options["limits"].split(",")]:
+                with override_settings(RATE_LIMITS={"anonymous": f"{limit}/hours"}):
+                    results = [
+                        f"{label} {self.time_checks(throttle_class, limit, options['checks']):.1f} µs"
+                        for label, throttle_class in (("sliding window", CustomRateThrottle), ("timestamp list", TimestampListThrottle))
+                    ]
+                self.stdout.write(f"{limit}/hours per check: " + ", ".join(results))
+        finally:
+            throttle_logger.disabled = False
+
+    def time_checks(self, throttle_class, limit, checks):
+        # A fresh client per run, so no other cache entries are touched.
+        request = Request(RequestFactory().get("/", REMOTE_ADDR=f"benchmark-{uuid.uuid4().hex}"))
+        throttle = throttle_class()
+        key = throttle.cache_key(request)
+        window = int(time.time() // 3600)
+        try:
+            # Fill the window to the limit first, so every timed check sees a full history.
+            for _ in range(limit):
+                throttle.allow_request(request, None)
+            started = time.perf_counter()
+            for _ in range(checks):
+                throttle.allow_request(request, None)
+            return (time.perf_counter() - started) / checks * 1e6
+        finally:
+            cache.delete_many([f"{key}_list", f"{key}_{window - 1}", f"{key}_{window}", f"{key}_{window + 1}"])
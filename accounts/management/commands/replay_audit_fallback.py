@@ -0,0 +1,36 @@
+import os
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from accounts.audit import load_fallback_records
+from accounts.models import AuditLog
+
+
+class Command(BaseCommand):
+    help = "Load audit records written to the fallback file while the database was unavailable"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--path", default=None, help="Fallback file. Defaults to AUDIT_FALLBACK_FILE.")
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        path = options["path"] or settings.AUDIT_FALLBACK_FILE
+        if not os.path.exists(path):
+            raise CommandError(f"No fallback file at {path}")
+
+        # Move the file aside first so records buffered meanwhile start a fresh file.
+        replaying = f"{path}.replaying"
+        os.replace(path, replaying)
+        loaded = 0
+        with transaction.atomic():
+            batch = []
+            for record in load_fallback_records(replaying):
+                batch.append(record)
+                if len(batch) >= options["batch_size"]:
+                    AuditLog.objects.bulk_create(batch)
+                    loaded += len(batch)
+                    batch = []
+            AuditLog.objects.bulk_create(batch)
+            loaded += len(batch)
+        os.remove(replaying)
+        self.stdout.write(self.style.SUCCESS(f"Loaded {loaded} audit records from {path}."))
@@ -0,0 +1,33 @@
+# Generated by Django 5.1.5 on 2026-10-18 18:19
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0019_auditlog'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='accounttype',
+            name='velocity_max_amount',
+            field=models.DecimalField(decimal_places=2, default=20000.0, max_digits=15),
+        ),
+        migrations.AddField(
+            model_name='accounttype',
+            name='velocity_max_new_recipients',
+            field=models.PositiveIntegerField(default=5),
+        ),
+        migrations.AddField(
+            model_name='accounttype',
+            name='velocity_max_transfers',
+            field=models.PositiveIntegerField(default=20),
+        ),
+        migrations.AddField(
+            model_name='accounttype',
+            name='velocity_window_minutes',
+            field=models.PositiveIntegerField(default=60),
+        ),
+    ]
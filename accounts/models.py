@@ -5,6 +5,7 @@ from django.db import transaction
 import logging
 from django.contrib.auth.models import AbstractUser, BaseUserManager
 from rbac.models import Role
+from rbac.snapshot import get_snapshot
 from django.utils.timezone import now
 from .choices import (
     Gender,
@@ -88,14 +89,11 @@ class User(AbstractUser):
         self.save()
 
     def has_permission(self, permission_name):
-        """Check if the user has a specific permission."""
-        for role in self.roles.all():
-            if permission_name in [perm.name for perm in role.get_all_permissions()]:
-                return True
-        return False
+        """Check if the user has a specific permission (served from the cached role snapshot)."""
+        return permission_name in get_snapshot(self)["inherited_permissions"]
 
     def has_role(self, role_name):
-        return self.roles.filter(name=role_name).exists()
+        return role_name in get_snapshot(self)["roles"]
     def is_admin(self):
         return self.has_role('Admin')
     def is_customer(self):
@@ -172,6 +170,10 @@ class AccountType(models.Model):
     max_balance = models.DecimalField(max_digits=15, decimal_places=2, null=True, blank=True)  # Maximum balance allowed
     daily_transfer_limit = models.DecimalField(max_digits=15, decimal_places=2, default=5000.00)  # Default daily transfer limit
     max_single_transfer_amount = models.DecimalField(max_digits=15, decimal_places=2, default=1000.00)  # Default Max amount per transaction
+    velocity_window_minutes = models.PositiveIntegerField(default=60)  # Sliding window for velocity checks
+    velocity_max_transfers = models.PositiveIntegerField(default=20)  # Max transfers within the window
+    velocity_max_amount = models.DecimalField(max_digits=15, decimal_places=2, default=20000.00)  # Max amount transferred within the window
+    velocity_max_new_recipients = models.PositiveIntegerField(default=5)  # Max first-time recipients within the window
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -5,7 +5,7 @@ from django.dispatch import receiver
 from django.conf import settings
 from django.urls import reverse
 
-from .utils import send_email
+from notifications.outbox import publish
 from .models import Account, AccountType
 
 
@@ -21,9 +21,10 @@ def create_account(sender, instance, created, **kwargs):
         account = Account.objects.create(user=instance, account_type=default_account_type)
 
         if instance.email and instance.phone_number:
-            send_email(
-                instance.email,
-                "Account Creation",
-                f"Your account has been created successfully. Your account number is {instance.phone_number}"
-            )
+            # Sent by the outbox worker so signup does not wait on SMTP
+            publish("email", {
+                "user_email": instance.email,
+                "subject": "Account Creation",
+                "template": f"Your account has been created successfully. Your account number is {instance.phone_number}",
+            })
         
\ No newline at end of file
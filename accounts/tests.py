@@ -1,3 +1,44 @@
-from django.test import TestCase
+from io import StringIO
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from accounts.models import User
 
-# Create your tests here.
+
+class AuditSinkTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            phone_number="08070426133",
+            email="test@example.com",
+            password="password123"
+        )
+
+    def test_records_are_flushed_in_bulk(self):
+        from accounts.audit import AuditSink
+        from accounts.models import AuditLog
+
+        sink = AuditSink()
+        with override_settings(AUDIT_BUFFER_SIZE=3):
+            sink.write(self.user.pk, "login")
+            sink.write(self.user.pk, "deposit", metadata={"amount": "10.00"})
+            self.assertEqual(AuditLog.objects.count(), 0)
+            sink.write(self.user.pk, "logout")
+        self.assertEqual(AuditLog.objects.filter(user=self.user).count(), 3)
+
+    def test_failed_flush_falls_back_to_file(self):
+        import tempfile
+        from unittest import mock
+        from django.db import DatabaseError
+        from accounts.audit import AuditSink
+        from accounts.models import AuditLog
+
+        with tempfile.TemporaryDirectory() as directory, override_settings(
+            AUDIT_BUFFER_SIZE=10, AUDIT_FALLBACK_FILE=f"{directory}/audit.jsonl"
+        ):
+            sink = AuditSink()
+            sink.write(self.user.pk, "transfer", ip_address="127.0.0.1", metadata={"amount": "5.00"})
+            with mock.patch.object(AuditLog.objects, "bulk_create", side_effect=DatabaseError("unavailable")):
+                sink.flush()
+            self.assertEqual(AuditLog.objects.count(), 0)
+            call_command("replay_audit_fallback", stdout=StringIO())
+        record = AuditLog.objects.get()
+        self.assertEqual((record.user_id, record.action, record.metadata), (self.user.pk, "transfer", {"amount": "5.00"}))
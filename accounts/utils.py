@@ -1,9 +1,10 @@
 import string
 from django.forms import ValidationError
 from rest_framework_simplejwt.tokens import RefreshToken
-from django.core.mail import EmailMultiAlternatives
 from django.conf import settings
-from .models import AuditLog, User
+from notifications.email_queue import queue_email
+from .audit import audit_sink
+from .models import User
 import datetime
 import logging
 import random
@@ -24,26 +25,8 @@ def jwt_auth(user):
     }
 
 def send_email(user_email, subject, template):
-    subject = subject
-    from_email = settings.EMAIL_HOST_USER
-    to_email = [user_email]
-
-    email = EmailMultiAlternatives(
-        subject=subject,
-        body=template,
-        from_email=from_email,
-        to=to_email
-    )
-
-    email.content_subtype = 'email'
-    email.attach_alternative(template, "text/html")
-
-    try:
-        email.send(fail_silently=False)
-    except Exception as e:
-        logger.error(f"Failed to send email to {user_email}: {str(e)}")
-        print(f"Failed to send email t{user_email}: {str(e)}")
-        return "Email sending failed"
+    """Queue an HTML email for the `send_queued_emails` worker."""
+    queue_email(user_email, subject, template, html_body=template, from_email=settings.EMAIL_HOST_USER)
     return None
 
 def validate_otp(user_email, otp, ttl_minutes=5): 
@@ -89,9 +72,9 @@ def normalize_number(number):
 
 
 def log_audit(user, action, ip_address=None, metadata=None):
-    """Log an action to the AuditLog model."""
-    AuditLog.objects.create(
-        user=user,
+    """Log an action to the AuditLog model through the per-process buffered writer."""
+    audit_sink.write(
+        user_id=user.pk if user else None,
         action=action,
         ip_address=ip_address,
         metadata=metadata,
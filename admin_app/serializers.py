@@ -1,7 +1,7 @@
 from rest_framework import serializers
 from accounts.models import AccountUpgradeRequest, User
 from accounts.utils import validate_password
-from transactions.models import FlaggedTransaction, TransactionLimitUpgradeRequest
+from transactions.models import FlaggedTransaction, ReversalJob, TransactionLimitUpgradeRequest
 from transactions.serializers import TransactionSerializer
 
 
@@ -169,3 +169,25 @@ class FlaggedTransactionSerializer(serializers.ModelSerializer):
         # data["transaction"] = TransactionSerializer(instance.transaction).data
         data["reviewed_by"] = instance.reviewed_by.get_fullname() if instance.reviewed_by else None
         return data
+
+
+class ReversalJobSerializer(serializers.ModelSerializer):
+    progress = serializers.FloatField(read_only=True)
+
+    class Meta:
+        model = ReversalJob
+        fields = [
+            "id",
+            "status",
+            "total",
+            "processed",
+            "progress",
+            "reversed_count",
+            "failed_count",
+            "errors",
+            "created_by",
+            "created_at",
+            "started_at",
+            "finished_at",
+        ]
+        read_only_fields = fields
@@ -3,6 +3,8 @@ from admin_app.views import (
                             AdminLoginView, 
                             CreateAdminView, 
                             ReversetransactionView, 
+                            BulkReversalView,
+                            ReversalJobDetailView,
                             TransactionLimitUpgradeRequestActionView, 
                             TransactionLimitUpgradeRequestDetailView, 
                             TransactionLimitUpgradeRequestListView,
@@ -19,6 +21,8 @@ urlpatterns = [
     path('admin/login/', AdminLoginView.as_view(), name='admin_login'),
     path('admin/create/', CreateAdminView.as_view(), name='create_admin'),
     path("reversetransaction/<int:transaction_id>/", ReversetransactionView.as_view(), name="reversetransaction"),
+    path("reversetransactions/", BulkReversalView.as_view(), name="bulk-reversal"),
+    path("reversal-jobs/<int:job_id>/", ReversalJobDetailView.as_view(), name="reversal-job-detail"),
     path('upgrade-requests/', TransactionLimitUpgradeRequestListView.as_view(), name='upgrade-request-list'),
     path('upgrade-requests/<int:request_id>/', TransactionLimitUpgradeRequestDetailView.as_view(), name='upgrade-request-detail'),
     path('upgrade-requests/<int:request_id>/action/', TransactionLimitUpgradeRequestActionView.as_view(), name='upgrade-request-action'),
@@ -7,19 +7,21 @@ from rest_framework.throttling import AnonRateThrottle, UserRateThrottle
 from fintech.throttling import CustomRateThrottle
 from rest_framework import status
 from accounts.models import Account, AccountUpgradeRequest
-from accounts.utils import send_email, jwt_auth
+from accounts.utils import send_email, jwt_auth, log_audit
 from django.template.loader import render_to_string
 from rbac.models import Role
 from django.db import transaction, models
 from rbac.permissions import HasPermission
-from transactions.models import FlaggedTransaction, Transaction, TransactionLimitUpgradeRequest
+from transactions.models import FlaggedTransaction, ReversalJob, Transaction, TransactionLimitUpgradeRequest
 from transactions.pagination import CustomPagination
+from transactions.reversal import parse_transaction_id
 from admin_app.serializers import (
     CreateAdminSerializer, 
     AdminLoginSerializer, 
     TransactionLimitUpgradeRequestSerializer,
     AccountUpgradeRequestSerializer,
-    FlaggedTransactionSerializer
+    FlaggedTransactionSerializer,
+    ReversalJobSerializer
 )
 
 
@@ -116,6 +118,53 @@ class ReversetransactionView(APIView):
             return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
 
+class BulkReversalView(APIView):
+    """
+    Queue a background reversal of many transactions. The job is run by the
+    `process_reversal_jobs` worker; poll ReversalJobDetailView for progress.
+    """
+    permission_classes = [IsAuthenticated, HasPermission]
+    required_permission = "can_reverse_transaction"
+    throttle_classes = [CustomRateThrottle]
+
+    def post(self, request):
+        transaction_ids = request.data.get("transaction_ids")
+        if not isinstance(transaction_ids, list) or not transaction_ids:
+            return Response({"error": "transaction_ids must be a non-empty list."}, status=status.HTTP_400_BAD_REQUEST)
+        if len(transaction_ids) > settings.REVERSAL_JOB_MAX_TRANSACTIONS:
+            return Response(
+                {"error": f"At most {settings.REVERSAL_JOB_MAX_TRANSACTIONS} transactions can be reversed per job."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        invalid = [transaction_id for transaction_id in transaction_ids if parse_transaction_id(transaction_id) is None]
+        if invalid:
+            return Response(
+                {"error": "transaction_ids must be transaction UUIDs.", "invalid_ids": invalid[:100]},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        job = ReversalJob.enqueue(transaction_ids, created_by=request.user)
+        log_audit(
+            user=request.user,
+            action="bulk_reversal_queued",
+            ip_address=request.META.get("REMOTE_ADDR"),
+            metadata={"reversal_job_id": job.pk, "transactions": job.total},
+        )
+        return Response(ReversalJobSerializer(job).data, status=status.HTTP_202_ACCEPTED)
+
+
+class ReversalJobDetailView(APIView):
+    permission_classes = [IsAuthenticated, HasPermission]
+    required_permission = "can_reverse_transaction"
+    throttle_classes = [UserRateThrottle]
+
+    def get(self, request, job_id):
+        try:
+            job = ReversalJob.objects.get(id=job_id)
+        except ReversalJob.DoesNotExist:
+            return Response({"error": "Reversal job not found."}, status=status.HTTP_404_NOT_FOUND)
+        return Response(ReversalJobSerializer(job).data, status=status.HTTP_200_OK)
+
+
 
 
 class TransactionLimitUpgradeRequestListView(APIView):
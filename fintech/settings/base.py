@@ -14,7 +14,7 @@ from datetime import timedelta
 from pathlib import Path
 import os
 from dotenv import load_dotenv
-from fintech.logging_config import LOGGING
+from fintech.logging_config import LOG_DIR, LOGGING
 import logging.config
 
 
@@ -183,6 +183,72 @@ RATE_LIMITS = {
     "anonymous": "10/minutes",
 }
 
+# Cached role/permission snapshot per user (rbac.snapshot); retired by the database-held PermissionVersion on role changes
+RBAC_SNAPSHOT_TTL = 5 * 60  # seconds; bounds staleness for changes made outside the ORM
+
+# Cache configuration. Point CACHE_BACKEND/CACHE_LOCATION at a shared cache (e.g. Redis)
+# in production so idempotency keys and throttling are shared across workers.
+CACHES = {
+    "default": {
+        "BACKEND": os.getenv("CACHE_BACKEND", "django.core.cache.backends.locmem.LocMemCache"),
+        "LOCATION": os.getenv("CACHE_LOCATION", "fintech"),
+    }
+}
+
+# Stored responses for Idempotency-Key retries on deposit/withdraw/transfer
+IDEMPOTENCY_KEY_TTL = 60 * 60 * 24  # seconds
+
+# Behavioural fraud check on per-account running statistics
+FRAUD_BEHAVIOUR = {
+    "MIN_SAMPLES": 10,  # Transactions needed before z-scores are trusted
+    "Z_SCORE_THRESHOLD": 4.0,  # Flag amounts this many standard deviations above the mean
+    "EWMA_ALPHA": 0.2,  # Weight of the newest amount in the moving average
+    "WINDOW_SIZE": 20,  # Number of recent amounts kept per account
+}
+
+# Per-rule latency budget for online fraud checks; slower rules are logged
+FRAUD_RULE_LATENCY_BUDGET_MS = 5
+
+# Bulk transfer (payroll/disbursement) settings
+BULK_TRANSFER_MAX_LINES = 10000  # Maximum number of lines accepted in one batch
+BULK_TRANSFER_CHUNK_SIZE = 500  # Lines posted per atomic block
+
+# Background bulk reversals (admin action and API)
+REVERSAL_JOB_CHUNK_SIZE = 500  # Transactions reversed per atomic block
+REVERSAL_JOB_MAX_TRANSACTIONS = 100000  # Maximum number of transactions queued in one job
+
+# Transactional outbox (notifications, audit records and emails), drained by `drain_outbox`
+OUTBOX_BATCH_SIZE = 500  # Events claimed per batch
+OUTBOX_MAX_ATTEMPTS = 5  # Deliveries before an event is marked failed
+OUTBOX_RETRY_BACKOFF_SECONDS = 30  # First retry delay; doubles on every attempt
+
+# Outgoing email queue, sent by `send_queued_emails`
+EMAIL_QUEUE_BATCH_SIZE = 50  # Emails claimed per batch by one worker
+EMAIL_QUEUE_MAX_ATTEMPTS = 5  # Sends before an email is marked failed
+EMAIL_QUEUE_RETRY_BACKOFF_SECONDS = 60  # First retry delay; doubles on every attempt
+EMAIL_QUEUE_CLAIM_TIMEOUT = 10 * 60  # Seconds before an email claimed by a stopped worker is retried
+
+# Statement PDFs, rendered off-request by `process_statement_jobs`
+STATEMENT_RENDER_CONCURRENCY = 2  # Render processes per worker; caps concurrent PDF renders
+STATEMENT_JOB_MAX_OPEN_PER_USER = 3  # Pending or running statement jobs a user may have at once
+STATEMENT_CACHE_DIR = "statement_cache"  # Content-addressed PDF cache, relative to MEDIA_ROOT
+STATEMENT_CACHE_MAX_BYTES = 512 * 1024 * 1024  # Least recently used PDFs are evicted above this size
+STATEMENT_REPORTLAB_MIN_ROWS = 500  # Statements with this many rows are drawn with ReportLab instead of WeasyPrint
+STATEMENT_RENDER_CHUNK_ROWS = 200  # Rows per WeasyPrint layout pass below the ReportLab threshold; shortens layout, does not cap memory
+STATEMENT_EXPORT_CHUNK_SIZE = 2000  # Rows fetched per round trip by the CSV/NDJSON export
+STATEMENT_TEMPLATE_VERSION = 2  # Bump when statement/statement.html changes so cached PDFs are re-rendered
+
+# Buffered audit log writer (accounts.audit); a buffer size of 1 writes every record immediately
+AUDIT_BUFFER_SIZE = 100  # Records per bulk insert
+AUDIT_FLUSH_INTERVAL_SECONDS = 2  # Longest time a record waits in the buffer
+AUDIT_FALLBACK_FILE = os.path.join(LOG_DIR, "audit_fallback.jsonl")  # Used while the database is unavailable
+
+# Sliding-window velocity counters (limits are configured per account type)
+VELOCITY_BUCKET_SECONDS = [60, 15 * 60, 60 * 60]  # Counter granularities; windows are rounded up to whole buckets
+VELOCITY_MAX_BUCKETS = 60  # A window is read from the finest granularity that covers it in this many buckets
+VELOCITY_MAX_WINDOW_MINUTES = 24 * 60  # Longest window an account type may use; counters expire after it
+VELOCITY_KNOWN_RECIPIENT_TTL = 60 * 60 * 24 * 90  # How long a recipient stays "known" after a transfer (seconds)
+
 # EMAIL HOST SETTINGS CONFIG
 EMAIL_BACKEND = 'django.core.mail.backends.smtp.EmailBackend'
 EMAIL_HOST = os.getenv('EMAIL_HOST')
@@ -0,0 +1,33 @@
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+
+
+@override_settings(RATE_LIMITS={"anonymous": "4/minutes"})
+class RateThrottleTest(TestCase):
+    def setUp(self):
+        from rest_framework.request import Request
+        from django.test import RequestFactory
+
+        cache.clear()
+        self.request = Request(RequestFactory().get("/", REMOTE_ADDR="10.0.0.1"))
+        self.now = 6000.0  # Start of a one-minute window
+
+    def check(self):
+        from fintech.throttling import CustomRateThrottle
+
+        throttle = CustomRateThrottle()
+        throttle.timer = lambda: self.now
+        return throttle.allow_request(self.request, None), throttle.wait()
+
+    def test_sliding_window_limit_and_wait(self):
+        self.assertEqual([self.check()[0] for _ in range(5)], [True, True, True, True, False])
+        self.assertEqual(self.check()[1], 75)  # The window rolls over, then its four requests must decay to three
+
+        # Half way through the next window the previous four still weigh two.
+        self.now += 90
+        self.assertEqual([self.check()[0] for _ in range(3)], [True, True, False])
+        allowed, wait = self.check()
+        self.assertAlmostEqual(wait, 15)  # 4 * (1 - 0.75) + 2 + 1 fits the limit
+
+        self.now += wait
+        self.assertTrue(self.check()[0])
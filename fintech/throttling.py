@@ -7,39 +7,67 @@ import logging
 logger = logging.getLogger("throttling")
 
 class CustomRateThrottle(BaseThrottle):
+    """
+    Role-based rate limit (settings.RATE_LIMITS) using a sliding window
+    counter. Requests are counted in fixed windows of the rate's duration;
+    the load over the last `duration` seconds is estimated as
+
+        previous_window * (1 - elapsed / duration) + current_window
+
+    Each check is one atomic `incr` plus one `get`, and the cache holds two
+    integers per client, whatever the size of the limit.
+    """
+    timer = time.time
+
     def __init__(self):
         self.rate = None
         self.num_requests = None
         self.duration = None
-        self.history = None
+        self.wait_seconds = None
 
-    def allow_request(self, request, view):
+    def get_rate(self, request):
         user = request.user
         if user.is_authenticated:
             if user.is_superuser:
-                self.rate = settings.RATE_LIMITS["superuser"]
-            elif user.roles.filter(name="Admin").exists():
-                self.rate = settings.RATE_LIMITS["admin"]
-            elif user.roles.filter(name="Support").exists():
-                self.rate = settings.RATE_LIMITS["support"]
-            else:
-                self.rate = settings.RATE_LIMITS["regular_user"]
-        else:
-            self.rate = settings.RATE_LIMITS["anonymous"]
-        
+                return settings.RATE_LIMITS["superuser"]
+            elif user.is_admin():
+                return settings.RATE_LIMITS["admin"]
+            elif user.is_support():
+                return settings.RATE_LIMITS["support"]
+            return settings.RATE_LIMITS["regular_user"]
+        return settings.RATE_LIMITS["anonymous"]
+
+    def allow_request(self, request, view):
+        self.rate = self.get_rate(request)
         self.num_requests, self.duration = self.parse_rate(self.rate)
-        self.history = cache.get(self.cache_key(request), [])
 
-        now = time.time()
-        self.history = [timestamp for timestamp in self.history if timestamp > now - self.duration]
+        now = self.timer()
+        window = int(now // self.duration)
+        elapsed = now - window * self.duration
+        key = self.cache_key(request)
+        current_key = f"{key}_{window}"
 
-        if len(self.history) >= self.num_requests:
-            logger.warning(f"Rate limit exceeded for user: {request.user} (IP: {self.get_ident(request)})")
-            return False
-        
-        self.history.append(now)
-        cache.set(self.cache_key(request), self.history, self.duration)
-        return True
+        # Count first, then check, so concurrent requests cannot all slip under the limit.
+        cache.add(current_key, 0, self.duration * 2)
+        try:
+            current = cache.incr(current_key)
+        except ValueError:
+            # Expired between add() and incr().
+            cache.set(current_key, 1, self.duration * 2)
+            current = 1
+        previous = cache.get(f"{key}_{window - 1}", 0)
+
+        if previous * (1 - elapsed / self.duration) + current <= self.num_requests:
+            return True
+
+        # Rejected requests do not use up the allowance.
+        try:
+            cache.decr(current_key)
+        except ValueError:
+            pass
+        self.wait_seconds = self.time_until_allowed(previous, current - 1, elapsed)
+        logger.warning(f"Rate limit exceeded for user: {request.user} (IP: {self.get_ident(request)})")
+        return False
     
     def parse_rate(self, rate):
         if rate is None:
@@ -60,15 +88,27 @@ class CustomRateThrottle(BaseThrottle):
 
     def cache_key(self, request):
         if request.user.is_authenticated:
-            return f"Throttle_{request.user.id}"
-        return f"throttle_{self.get_ident(request)}"
-    
+            return f"throttle_user_{request.user.id}"
+        return f"throttle_ip_{self.get_ident(request)}"
+
+    def time_until_allowed(self, previous, current, elapsed):
+        """
+        Seconds until previous * weight + current + 1 fits in the limit, as the
+        previous window's weight decays (and, if the current window is full,
+        once it has become the previous one).
+        """
+        if self.num_requests <= 0:
+            return None
+        remaining = self.duration - elapsed
+        room = self.num_requests - 1 - current
+        if room >= 0 and previous > 0:
+            delay = self.duration * (1 - room / previous) - elapsed
+            if delay <= remaining:
+                return max(delay, 0)
+        return remaining + self.duration * max(0, 1 - (self.num_requests - 1) / current)
+
     def wait(self):
         """
         Returns the time (in seconds) until the next request is allowed.
         """
-        if self.history:
-            now = time.time()
-            remaining_time = self.duration - (now - self.history[0])
-            return max(remaining_time, 0)
-        return None
\ No newline at end of file
+        return self.wait_seconds
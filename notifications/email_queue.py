@@ -0,0 +1,134 @@
+from datetime import timedelta
+import logging
+import smtplib
+import uuid
+from django.conf import settings
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.db.models import Q
+from django.utils.timezone import now
+from notifications.models import QueuedEmail
+
+logger = logging.getLogger(__name__)
+
+
+def queue_email(to, subject, body, html_body=None, from_email=None, attachment=None):
+    """
+    Queue an email for the `send_queued_emails` worker and return immediately.
+    `to` is an address or a list of addresses; `attachment` is an optional
+    (filename, content, mimetype) tuple.
+    """
+    email = build_queued_email(to, subject, body, html_body, from_email, attachment)
+    email.save()
+    return email
+
+
+def queue_emails(messages, batch_size=500):
+    """
+    Queue many emails with bulk inserts. `messages` are dicts of
+    `queue_email` keyword arguments.
+    """
+    return QueuedEmail.objects.bulk_create(
+        [build_queued_email(**message) for message in messages], batch_size=batch_size
+    )
+
+
+def build_queued_email(to, subject, body, html_body=None, from_email=None, attachment=None):
+    attachment_name, content, mimetype = attachment or (None, None, None)
+    return QueuedEmail(
+        to=[to] if isinstance(to, str) else list(to),
+        subject=subject,
+        body=body,
+        html_body=html_body,
+        from_email=from_email or settings.EMAIL_HOST_USER,
+        attachment_name=attachment_name,
+        attachment=content,
+        attachment_mimetype=mimetype,
+    )
+
+
+def claim_batch(batch_size):
+    """
+    Claim up to `batch_size` due emails for this worker. A random token marks
+    the claim, so concurrent workers never send the same row; rows left in
+    "sending" by a stopped worker become claimable after EMAIL_QUEUE_CLAIM_TIMEOUT.
+    """
+    token = uuid.uuid4()
+    due = Q(status="pending", available_at__lte=now()) | Q(
+        status="sending", claimed_at__lt=now() - timedelta(seconds=settings.EMAIL_QUEUE_CLAIM_TIMEOUT)
+    )
+    ids = list(QueuedEmail.objects.filter(due).order_by("id").values_list("id", flat=True)[:batch_size])
+    QueuedEmail.objects.filter(due, pk__in=ids).update(status="sending", claim_token=token, claimed_at=now())
+    return list(QueuedEmail.objects.filter(claim_token=token, status="sending").order_by("id"))
+
+
+def build_message(queued, connection):
+    message = EmailMultiAlternatives(
+        subject=queued.subject,
+        body=queued.body,
+        from_email=queued.from_email,
+        to=queued.to,
+        connection=connection,
+    )
+    if queued.html_body:
+        message.attach_alternative(queued.html_body, "text/html")
+    if queued.attachment is not None:
+        message.attach(queued.attachment_name, bytes(queued.attachment), queued.attachment_mimetype)
+    return message
+
+
+def mark_failed(queued, error):
+    queued.attempts += 1
+    queued.last_error = error
+    queued.claim_token = None
+    if queued.attempts >= settings.EMAIL_QUEUE_MAX_ATTEMPTS:
+        queued.status = "failed"
+        logger.error(f"Email {queued.pk} to {queued.to} failed permanently: {error}")
+    else:
+        queued.status = "pending"
+        queued.available_at = now() + timedelta(
+            seconds=settings.EMAIL_QUEUE_RETRY_BACKOFF_SECONDS * 2 ** (queued.attempts - 1)
+        )
+    queued.save(update_fields=["attempts", "last_error", "claim_token", "status", "available_at"])
+
+
+def send_batch(connection, batch_size=None):
+    """
+    Send one claimed batch over `connection`, which stays open between
+    batches. Returns (claimed, sent).
+    """
+    batch = claim_batch(batch_size or settings.EMAIL_QUEUE_BATCH_SIZE)
+    sent = []
+    for queued in batch:
+        try:
+            # No-op while the connection is open; reconnects after a drop.
+            connection.open()
+            build_message(queued, connection).send(fail_silently=False)
+        except smtplib.SMTPServerDisconnected as e:
+            connection.close()
+            mark_failed(queued, str(e))
+            continue
+        except Exception as e:
+            mark_failed(queued, str(e))
+            continue
+        sent.append(queued.pk)
+    if sent:
+        QueuedEmail.objects.filter(pk__in=sent).update(status="sent", sent_at=now(), claim_token=None)
+    return len(batch), len(sent)
+
+
+def run_worker(batch_size=None, stop=None):
+    """
+    Drain the queue over a single SMTP connection until it is empty (or until
+    the `stop` callable returns True). Returns the number of emails sent.
+    """
+    connection = get_connection()
+    total = 0
+    try:
+        while not (stop and stop()):
+            claimed, sent = send_batch(connection, batch_size)
+            total += sent
+            if not claimed:
+                break
+    finally:
+        connection.close()
+    return total
@@ -0,0 +1,23 @@
+import time
+from django.core.management.base import BaseCommand
+from notifications.outbox import drain_outbox
+
+
+class Command(BaseCommand):
+    help = "Deliver pending outbox events (notifications, audit records, emails) in batches"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--loop", action="store_true", help="Keep polling for new events instead of exiting when the outbox is empty.")
+        parser.add_argument("--interval", type=float, default=1.0, help="Seconds to wait with --loop when the outbox is empty.")
+        parser.add_argument("--batch-size", type=int, help="Events claimed per batch.")
+
+    def handle(self, *args, **options):
+        total = 0
+        while True:
+            claimed, processed = drain_outbox(batch_size=options["batch_size"])
+            total += processed
+            if not claimed:
+                if not options["loop"]:
+                    break
+                time.sleep(options["interval"])
+        self.stdout.write(self.style.SUCCESS(f"Delivered {total} outbox events."))
@@ -0,0 +1,38 @@
+from concurrent.futures import ThreadPoolExecutor
+import time
+from django.core.management.base import BaseCommand
+from django.db import connection
+from notifications.email_queue import run_worker
+
+
+def _worker(batch_size):
+    try:
+        return run_worker(batch_size)
+    finally:
+        connection.close()  # Each thread has its own database connection
+
+
+class Command(BaseCommand):
+    help = (
+        "Send queued emails with a pool of worker threads, each reusing one SMTP connection. "
+        "To try it locally, start an SMTP stand-in (e.g. `python -m aiosmtpd -n -l localhost:1025`) "
+        "and point EMAIL_HOST/EMAIL_PORT at it with EMAIL_USE_TLS disabled."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--workers", type=int, default=2, help="Worker threads, one SMTP connection each.")
+        parser.add_argument("--batch-size", type=int, help="Emails claimed per batch.")
+        parser.add_argument("--loop", action="store_true", help="Keep polling instead of exiting when the queue is empty.")
+        parser.add_argument("--interval", type=float, default=2.0, help="Seconds to wait with --loop when the queue is empty.")
+
+    def handle(self, *args, **options):
+        total = 0
+        with ThreadPoolExecutor(max_workers=options["workers"]) as pool:
+            while True:
+                sent = sum(pool.map(_worker, [options["batch_size"]] * options["workers"]))
+                total += sent
+                if not options["loop"]:
+                    break
+                if not sent:
+                    time.sleep(options["interval"])
+        self.stdout.write(self.style.SUCCESS(f"Sent {total} emails."))
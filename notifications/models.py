@@ -1,3 +1,4 @@
+from django.core.serializers.json import DjangoJSONEncoder
 from django.db import models
 from django.utils.timezone import now
 
@@ -19,6 +20,9 @@ class Notification(models.Model):
         ordering = ['-created_at']
         verbose_name = 'Notification'
         verbose_name_plural = 'Notifications'
+        indexes = [
+            models.Index(fields=['user', 'created_at'], name='notification_user_created_idx'),
+        ]
 
     def __str__(self):
         return f"Notification for {self.user.email} - {self.message} - {self.created_at.strftime('%Y-%m-%d %H:%M:%S')}"
@@ -36,4 +40,75 @@ class Notification(models.Model):
         self.save()
 
     def get_notification_summary(self):
-        return f"{self.message[:50]}..." if len(self.message) > 50 else self.message
\ No newline at end of file
+        return f"{self.message[:50]}..." if len(self.message) > 50 else self.message
+
+
+class OutboxEvent(models.Model):
+    """
+    Side effect recorded in the same database transaction as the change that
+    caused it, and delivered later by the `drain_outbox` worker. An event is
+    never lost once its transaction commits; failed deliveries are retried
+    with backoff until OUTBOX_MAX_ATTEMPTS.
+    """
+    STATUS_CHOICES = [
+        ("pending", "Pending"),
+        ("processed", "Processed"),
+        ("failed", "Failed"),
+    ]
+
+    event_type = models.CharField(max_length=50)
+    payload = models.JSONField(encoder=DjangoJSONEncoder)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default="pending")
+    attempts = models.PositiveSmallIntegerField(default=0)
+    last_error = models.TextField(blank=True, null=True)
+    available_at = models.DateTimeField(default=now)
+    created_at = models.DateTimeField(auto_now_add=True)
+    processed_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["status", "available_at"], name="outbox_status_available_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.event_type} - {self.status} - {self.created_at}"
+
+
+
+class QueuedEmail(models.Model):
+    """
+    Outgoing email waiting for the `send_queued_emails` worker. Requests only
+    insert a row; delivery, SMTP connection reuse and retries happen in the
+    worker.
+    """
+    STATUS_CHOICES = [
+        ("pending", "Pending"),
+        ("sending", "Sending"),
+        ("sent", "Sent"),
+        ("failed", "Failed"),
+    ]
+
+    to = models.JSONField()  # List of recipient addresses
+    subject = models.CharField(max_length=255)
+    body = models.TextField()
+    html_body = models.TextField(blank=True, null=True)
+    from_email = models.CharField(max_length=255, blank=True, null=True)
+    attachment_name = models.CharField(max_length=255, blank=True, null=True)
+    attachment = models.BinaryField(blank=True, null=True)
+    attachment_mimetype = models.CharField(max_length=100, blank=True, null=True)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default="pending")
+    attempts = models.PositiveSmallIntegerField(default=0)
+    last_error = models.TextField(blank=True, null=True)
+    available_at = models.DateTimeField(default=now)
+    claim_token = models.UUIDField(null=True, blank=True, db_index=True)
+    claimed_at = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["status", "available_at"], name="queued_email_status_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.subject} to {', '.join(self.to)} - {self.status}"
@@ -0,0 +1,124 @@
+from collections import defaultdict
+from datetime import timedelta
+import logging
+from django.conf import settings
+from django.db import transaction
+from django.utils.timezone import now
+from notifications.email_queue import queue_email
+from notifications.models import Notification, OutboxEvent
+
+logger = logging.getLogger(__name__)
+
+_handlers = {}
+
+
+def register_handler(event_type):
+    """
+    Decorator registering the handler for an event type. A handler receives
+    the list of payloads of one batch; handlers that only write to the
+    database run in the same transaction that marks the events processed.
+    """
+    def decorator(handler):
+        _handlers[event_type] = handler
+        return handler
+    return decorator
+
+
+def publish(event_type, payload):
+    """Record an event. Call inside the atomic block of the change that causes it."""
+    return OutboxEvent.objects.create(event_type=event_type, payload=payload)
+
+
+def publish_many(event_type, payloads):
+    return OutboxEvent.objects.bulk_create([
+        OutboxEvent(event_type=event_type, payload=payload) for payload in payloads
+    ])
+
+
+def notification_payload(user, transaction, message=None):
+    """
+    Payload for a "notification" event: the posting message of
+    `create_notification` by default, or a free-form `message` as in
+    `send_notification`.
+    """
+    payload = {"user_id": user.pk, "transaction_id": str(transaction.pk) if transaction else None}
+    if message is not None:
+        return {**payload, "message": message}
+    return {
+        **payload,
+        "message": f"Transaction {transaction.transaction_type} of {transaction.amount} has been processed.",
+        "transaction_type": transaction.transaction_type,
+        "transaction_flow": transaction.transaction_flow,
+    }
+
+
+@register_handler("notification")
+def handle_notifications(payloads):
+    Notification.objects.bulk_create([Notification(**payload) for payload in payloads])
+
+
+@register_handler("audit")
+def handle_audit(payloads):
+    from accounts.models import AuditLog  # Import here to avoid circular dependency
+
+    AuditLog.objects.bulk_create([AuditLog(**payload) for payload in payloads])
+
+
+@register_handler("email")
+def handle_emails(payloads):
+    # Handed to the email queue in the same transaction; SMTP happens in send_queued_emails.
+    for payload in payloads:
+        queue_email(payload["user_email"], payload["subject"], payload["template"], html_body=payload["template"])
+
+
+def _fail(events, error):
+    for event in events:
+        event.attempts += 1
+        event.last_error = error
+        if event.attempts >= settings.OUTBOX_MAX_ATTEMPTS:
+            event.status = "failed"
+            logger.error(f"Outbox event {event.pk} ({event.event_type}) failed permanently: {error}")
+        else:
+            backoff = settings.OUTBOX_RETRY_BACKOFF_SECONDS * 2 ** (event.attempts - 1)
+            event.available_at = now() + timedelta(seconds=backoff)
+    OutboxEvent.objects.bulk_update(events, ["attempts", "last_error", "status", "available_at"])
+
+
+def _deliver(event_type, events):
+    """Run one handler batch; on failure retry event by event to isolate the bad ones."""
+    handler = _handlers.get(event_type)
+    if handler is None:
+        _fail(events, f"No handler registered for {event_type}")
+        return 0
+    try:
+        with transaction.atomic():
+            handler([event.payload for event in events])
+            OutboxEvent.objects.filter(pk__in=[event.pk for event in events]).update(status="processed", processed_at=now())
+        return len(events)
+    except Exception as e:
+        if len(events) == 1:
+            _fail(events, str(e))
+            return 0
+    return sum(_deliver(event_type, [event]) for event in events)
+
+
+def drain_outbox(batch_size=None):
+    """
+    Deliver one batch of due events, grouped by type. Rows are claimed with
+    SKIP LOCKED where the database supports it, so several workers can drain
+    concurrently. Returns (claimed, processed).
+    """
+    batch_size = batch_size or settings.OUTBOX_BATCH_SIZE
+    with transaction.atomic():
+        events = list(
+            OutboxEvent.objects.select_for_update(skip_locked=True)
+            .filter(status="pending", available_at__lte=now())
+            .order_by("id")[:batch_size]
+        )
+        by_type = defaultdict(list)
+        for event in events:
+            by_type[event.event_type].append(event)
+        processed = sum(_deliver(event_type, batch) for event_type, batch in by_type.items())
+    if events:
+        logger.info(f"Outbox drained {processed} of {len(events)} events")
+    return len(events), processed
@@ -31,4 +31,4 @@ def send_notification(user, message, transaction=None):
         return notification
     except Exception as e:
         logger.error(f"Failed to create notification for {user.email}: {str(e)}")
-        return None
\ No newline at end of file
+        return None
@@ -1,3 +1,30 @@
 from django.test import TestCase
+from django.utils import timezone
 
-# Create your tests here.
+
+class EmailQueueTest(TestCase):
+    def test_queued_emails_are_sent_over_one_connection(self):
+        from django.core import mail
+        from notifications.email_queue import queue_email, run_worker
+        from notifications.models import QueuedEmail
+
+        for index in range(3):
+            queue_email(f"user{index}@example.com", "Hello", "Body", html_body="<p>Body</p>")
+        queue_email("statement@example.com", "Statement", "Body", attachment=("statement.pdf", b"%PDF-1.4", "application/pdf"))
+        self.assertEqual(len(mail.outbox), 0)
+
+        self.assertEqual(run_worker(batch_size=2), 4)
+        self.assertEqual(len(mail.outbox), 4)
+        self.assertEqual(mail.outbox[3].attachments[0][0], "statement.pdf")
+        self.assertEqual(QueuedEmail.objects.filter(status="sent").count(), 4)
+
+    def test_failed_send_is_retried_with_backoff(self):
+        from unittest import mock
+        from notifications.email_queue import queue_email, run_worker
+
+        queued = queue_email("user@example.com", "Hello", "Body")
+        with mock.patch("django.core.mail.EmailMultiAlternatives.send", side_effect=OSError("connection refused")):
+            self.assertEqual(run_worker(), 0)
+        queued.refresh_from_db()
+        self.assertEqual((queued.status, queued.attempts), ("pending", 1))
+        self.assertGreater(queued.available_at, timezone.now())
@@ -3,7 +3,7 @@ from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.throttling import UserRateThrottle
 from transactions.choices import Status
-from transactions.pagination import CustomPagination
+from transactions.pagination import get_paginator
 from .models import Notification
 from .serializers import NotificationSerializer
 
@@ -26,7 +26,7 @@ class NotificationListView(APIView):
  
         queryset = queryset.order_by('-created_at')  
   
-        paginator = CustomPagination()  
+        paginator = get_paginator(request, ordering=("-created_at", "-id"))  
         page = paginator.paginate_queryset(queryset, request)  
         if page is not None:  
             serializer = NotificationSerializer(page, many=True)  
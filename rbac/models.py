@@ -26,4 +26,16 @@ class Role(models.Model):
         return permissions
 
     def __str__(self):
-        return self.name
\ No newline at end of file
+        return self.name
+
+class PermissionVersion(models.Model):
+    """
+    Single-row counter bumped in the same transaction as every role or
+    permission change. Cached role snapshots are keyed by it, so a change
+    retires them in every process, whatever cache backend is configured.
+    """
+    version = models.PositiveBigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"RBAC version {self.version}"
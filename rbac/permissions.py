@@ -1,15 +1,12 @@
 from rest_framework.permissions import BasePermission
+from rbac.snapshot import get_snapshot
 
 def has_permission(user, permission_name):
     """
-    Check if the user has the specified permission.
+    Check if the user has the specified permission through their roles,
+    using the cached role snapshot.
     """
-    # Check if the user has the permission through their roles
-    for role in user.roles.all():
-        if role.permissions.filter(name=permission_name).exists():
-            return True
-
-    return False
+    return permission_name in get_snapshot(user)["permissions"]
 
 
 
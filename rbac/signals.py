@@ -0,0 +1,33 @@
+from django.contrib.auth import get_user_model
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+from rbac.models import Permission, Role
+from rbac.snapshot import invalidate_all
+
+User = get_user_model()
+
+CHANGES = {"post_add", "post_remove", "post_clear"}
+
+
+@receiver(m2m_changed, sender=User.roles.through)
+def user_roles_changed(sender, instance, action, reverse, **kwargs):
+    if action not in CHANGES:
+        return
+    if not reverse:
+        instance.__dict__.pop("_rbac_snapshot", None)
+    invalidate_all()
+
+
+@receiver(m2m_changed, sender=Role.permissions.through)
+def role_permissions_changed(sender, action, **kwargs):
+    if action in CHANGES:
+        invalidate_all()
+
+
+@receiver(post_save, sender=Role)
+@receiver(post_delete, sender=Role)
+@receiver(post_save, sender=Permission)
+@receiver(post_delete, sender=Permission)
+def roles_changed(sender, **kwargs):
+    # Renames, parent changes and deletions affect every user holding the role.
+    invalidate_all()
@@ -0,0 +1,70 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import F
+from rbac.models import PermissionVersion, Role
+
+# Each user's role names and permission names are cached as one snapshot, so
+# throttling, HasPermission and the User role helpers do not walk the roles
+# on every request. Snapshots are keyed by PermissionVersion, a counter in the
+# database that every role or permission change bumps in its own transaction:
+# one indexed read per request tells every process, even with a per-process
+# cache, that its snapshots are stale. The TTL bounds staleness for changes
+# made outside the ORM.
+
+
+def _version():
+    return PermissionVersion.objects.filter(pk=1).values_list("version", flat=True).first() or 0
+
+
+def _snapshot_key(user_id, version):
+    return f"rbac_snapshot_{version}_{user_id}"
+
+
+def load_snapshot(user):
+    """
+    Role and permission names of `user`, read from the database.
+    `permissions` are granted by the user's own roles; `inherited_permissions`
+    add those of their parent roles.
+    """
+    parents = dict(Role.objects.values_list("id", "parent_role_id"))
+    direct_ids, role_ids = set(), set()
+    roles = set()
+    for role_id, name in user.roles.values_list("id", "name"):
+        roles.add(name)
+        direct_ids.add(role_id)
+        while role_id is not None and role_id not in role_ids:
+            role_ids.add(role_id)
+            role_id = parents.get(role_id)
+    granted = {}
+    grants = Role.permissions.through.objects.filter(role_id__in=role_ids).values_list("role_id", "permission__name")
+    for role_id, name in grants:
+        granted.setdefault(name, set()).add(role_id)
+    return {
+        "roles": frozenset(roles),
+        "permissions": frozenset(name for name, ids in granted.items() if ids & direct_ids),
+        "inherited_permissions": frozenset(granted),
+    }
+
+
+def get_snapshot(user):
+    """
+    The user's snapshot: memoised on the instance for the rest of the
+    request, and cached for RBAC_SNAPSHOT_TTL seconds under the current
+    PermissionVersion across requests.
+    """
+    snapshot = getattr(user, "_rbac_snapshot", None)
+    if snapshot is None:
+        key = _snapshot_key(user.pk, _version())
+        snapshot = cache.get(key)
+        if snapshot is None:
+            snapshot = load_snapshot(user)
+            cache.set(key, snapshot, settings.RBAC_SNAPSHOT_TTL)
+        user._rbac_snapshot = snapshot
+    return snapshot
+
+
+def invalidate_all():
+    """Retire every cached snapshot. Runs in the caller's transaction, so it commits with the change."""
+    if not PermissionVersion.objects.filter(pk=1).update(version=F("version") + 1):
+        PermissionVersion.objects.get_or_create(pk=1)
+        PermissionVersion.objects.filter(pk=1).update(version=F("version") + 1)
@@ -1,3 +1,63 @@
+from unittest import mock
+from django.core.cache import cache
+from django.core.cache.backends.locmem import LocMemCache
 from django.test import TestCase
+from accounts.models import User
+from rbac.models import Permission, Role
+from rbac.permissions import has_permission
 
-# Create your tests here.
+
+class RoleSnapshotTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            phone_number="08070426133",
+            email="test@example.com",
+            password="password123"
+        )
+        self.parent = Role.objects.create(name="Support")
+        self.role = Role.objects.create(name="Admin", parent_role=self.parent)
+        self.permission = Permission.objects.create(name="can_reverse_transaction")
+        self.parent.permissions.add(self.permission)
+        self.user.roles.add(self.role)
+
+    def fresh_user(self):
+        return User.objects.get(pk=self.user.pk)
+
+    def test_snapshot_is_cached_across_requests(self):
+        self.assertTrue(self.fresh_user().is_admin())
+        user = self.fresh_user()
+        with self.assertNumQueries(1):  # The PermissionVersion read
+            self.assertTrue(user.is_admin())
+        with self.assertNumQueries(0):
+            self.assertFalse(user.is_support())
+            self.assertTrue(user.has_permission("can_reverse_transaction"))  # Inherited from Support
+
+    def test_role_and_permission_changes_invalidate_snapshots(self):
+        self.assertFalse(has_permission(self.fresh_user(), "can_view_upgrade_requests"))
+        self.role.permissions.add(Permission.objects.create(name="can_view_upgrade_requests"))
+        self.assertTrue(has_permission(self.fresh_user(), "can_view_upgrade_requests"))
+
+        # HasPermission only honours the user's own roles; User.has_permission includes parent roles.
+        self.assertFalse(has_permission(self.fresh_user(), "can_reverse_transaction"))
+
+        self.user.roles.remove(self.role)
+        self.assertFalse(self.user.is_admin())
+        self.assertFalse(self.fresh_user().has_permission("can_reverse_transaction"))
+
+        self.parent.users.add(self.user)
+        self.assertTrue(self.fresh_user().is_support())
+
+    def test_revoked_role_is_seen_through_another_process_cache(self):
+        # A second worker with its own local-memory cache loads the snapshot,
+        # then the role is revoked here; that worker must not keep serving it.
+        other_process_cache = LocMemCache("rbac-other-process", {})
+        with mock.patch("rbac.snapshot.cache", other_process_cache):
+            self.assertTrue(self.fresh_user().is_admin())
+
+        self.user.roles.remove(self.role)
+
+        with mock.patch("rbac.snapshot.cache", other_process_cache):
+            user = self.fresh_user()
+            self.assertFalse(user.is_admin())
+            self.assertFalse(user.has_permission("can_reverse_transaction"))
@@ -1,3 +1,12 @@
 from django.contrib import admin
+from statement.models import StatementJob
 
-# Register your models here.
+
+@admin.register(StatementJob)
+class StatementJobAdmin(admin.ModelAdmin):
+    list_display = ["id", "user", "account", "start_date", "end_date", "deliver", "status", "created_at", "finished_at"]
+    list_filter = ["status", "deliver"]
+    readonly_fields = ["user", "account", "start_date", "end_date", "deliver", "status", "pdf", "error", "created_at", "started_at", "finished_at"]
+
+    def has_add_permission(self, request):
+        return False
@@ -0,0 +1,128 @@
+import datetime
+from itertools import groupby
+import logging
+import time
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.db.models import F, Sum, Window
+from django.db.models.expressions import RowRange
+from django.utils.timezone import now
+from accounts.models import Account
+from notifications.email_queue import queue_emails
+from statement.jobs import render_pdf
+from statement.models import StatementJob
+from statement.pdf import render_reportlab
+from statement.utils import BALANCE_EFFECT, STATEMENT_FIELDS, statement_email_body
+from transactions.ledger import balances_at, start_of
+from transactions.models import Transaction
+
+logger = logging.getLogger(__name__)
+
+
+def enqueue_batch(batch, start_date, end_date):
+    """
+    Create the batch's StatementJob for every account with an email address
+    that does not have one yet. Safe to rerun; returns the number created.
+    """
+    accounts = Account.objects.exclude(user__email__isnull=True).exclude(user__email="").values_list("id", "user_id")
+    existing = set(StatementJob.objects.filter(batch=batch).values_list("account_id", flat=True))
+    jobs = [
+        StatementJob(
+            user_id=user_id, account_id=account_id, start_date=start_date, end_date=end_date,
+            deliver="email", batch=batch,
+        )
+        for account_id, user_id in accounts.iterator(chunk_size=settings.STATEMENT_EXPORT_CHUNK_SIZE)
+        if account_id not in existing
+    ]
+    StatementJob.objects.bulk_create(jobs, batch_size=1000, ignore_conflicts=True)
+    return len(jobs)
+
+
+def partitions(batch, size):
+    """Ids of the batch's unfinished jobs, in account order, split into lists of `size`."""
+    job_ids = list(
+        StatementJob.objects.filter(batch=batch).exclude(status="completed").order_by("account_id").values_list("id", flat=True)
+    )
+    return [job_ids[index:index + size] for index in range(0, len(job_ids), size)]
+
+
+def process_partition(job_ids, renderer="auto"):
+    """
+    Render and email one partition of a batch inside a pool process. All
+    transactions of the partition, with their running balances, come from a
+    single range query and the opening balances from `balances_at`; the
+    emails are queued and the jobs completed in one atomic block, so a crash
+    leaves the partition to be redone without duplicate emails. Returns
+    per-stage counts and timings.
+    """
+    close_old_connections()
+    stats = {"statements": 0, "transactions": 0, "failed": 0, "query": 0.0, "render": 0.0, "queue": 0.0}
+    started = time.perf_counter()
+    jobs = list(StatementJob.objects.filter(pk__in=job_ids).exclude(status="completed").select_related("account__user", "user"))
+    if not jobs:
+        return stats
+    start_date, end_date = jobs[0].start_date, jobs[0].end_date
+    StatementJob.objects.filter(pk__in=[job.pk for job in jobs]).update(status="running", started_at=now(), error=None)
+
+    account_ids = [job.account_id for job in jobs]
+    openings = balances_at(account_ids, start_of(start_date))
+    # Per-account period net up to each row; the opening balance is added below.
+    period_net = Window(
+        Sum(BALANCE_EFFECT), partition_by=[F("account_id")], order_by=[F("date").asc(), F("id").asc()],
+        frame=RowRange(start=None, end=0),
+    )
+    rows = Transaction.objects.filter(
+        account_id__in=account_ids,
+        date__gte=start_of(start_date),
+        date__lt=start_of(end_date + datetime.timedelta(days=1)),
+    ).annotate(running_balance=period_net).order_by("account_id", "-date", "-id").values("account_id", *STATEMENT_FIELDS)
+    by_account = {}
+    for account_id, group in groupby(rows, key=lambda row: row["account_id"]):
+        group = list(group)
+        for row in group:
+            row["running_balance"] += openings[account_id]
+        by_account[account_id] = group
+    stats["query"] = time.perf_counter() - started
+    stats["transactions"] = sum(len(group) for group in by_account.values())
+
+    started = time.perf_counter()
+    messages, completed, failed = [], [], []
+    for job in jobs:
+        transactions = by_account.get(job.account_id, [])
+        opening = openings[job.account_id]
+        balances = {
+            "opening_balance": opening,
+            "closing_balance": transactions[0]["running_balance"] if transactions else opening,
+        }
+        try:
+            if renderer == "reportlab":
+                pdf = render_reportlab(job.account, start_date, end_date, transactions, balances)
+            else:
+                pdf = render_pdf(job.account, start_date, end_date, transactions=transactions, balances=balances)
+        except Exception as e:
+            logger.error(f"Statement job {job.pk} failed: {e}")
+            failed.append((job.pk, str(e)))
+            continue
+        messages.append({
+            "to": job.account.user.email,
+            "subject": "Your Account Statement",
+            "body": statement_email_body(start_date, end_date),
+            "attachment": (job.filename, pdf, "application/pdf"),
+        })
+        completed.append(job.pk)
+    stats["render"] = time.perf_counter() - started
+
+    started = time.perf_counter()
+    with transaction.atomic():
+        queue_emails(messages)
+        StatementJob.objects.filter(pk__in=completed).update(status="completed", finished_at=now())
+        for job_id, error in failed:
+            StatementJob.objects.filter(pk=job_id).update(status="failed", error=error, finished_at=now())
+    stats["queue"] = time.perf_counter() - started
+    stats["statements"], stats["failed"] = len(completed), len(failed)
+    return stats
+
+
+def run_partition(arguments):
+    """`Pool.imap_unordered` entry point for (job_ids, renderer)."""
+    return process_partition(*arguments)
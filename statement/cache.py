@@ -0,0 +1,116 @@
+import hashlib
+import json
+import logging
+import os
+import uuid
+from django.conf import settings
+from django.db.models import Count, Max
+from statement.utils import statement_transactions
+from transactions.ledger import balance_at, start_of
+
+logger = logging.getLogger(__name__)
+
+
+def statement_cache_key(account, start_date, end_date):
+    """
+    Content address of a statement PDF: everything the rendered file depends
+    on. The opening balance, the transaction count and latest `updated_at`
+    in the period stand in for the ledger version, so a new, edited or
+    re-statused transaction gives a new key while a closed period keeps its
+    key (and its cached file).
+    """
+    version = statement_transactions(account, start_date, end_date).order_by().aggregate(
+        count=Count("id"), last_updated=Max("updated_at")
+    )
+    material = {
+        "account": account.pk,
+        "account_number": account.account_number,
+        "currency": account.currency,
+        "holder": account.user.get_full_name(),
+        "start_date": str(start_date),
+        "opening_balance": str(balance_at(account.pk, start_of(start_date))),
+        "end_date": str(end_date),
+        "count": version["count"],
+        "last_updated": version["last_updated"].isoformat() if version["last_updated"] else None,
+        "template_version": settings.STATEMENT_TEMPLATE_VERSION,
+    }
+    return hashlib.sha256(json.dumps(material, sort_keys=True).encode()).hexdigest()
+
+
+def cache_name(key):
+    """Storage name (relative to MEDIA_ROOT) of the cached PDF for `key`."""
+    return f"{settings.STATEMENT_CACHE_DIR}/{key}.pdf"
+
+
+def cache_path(key):
+    return os.path.join(settings.MEDIA_ROOT, cache_name(key))
+
+
+def get(key):
+    """Storage name of the cached PDF, or None. A hit refreshes the entry's LRU position."""
+    path = cache_path(key)
+    try:
+        os.utime(path)
+    except FileNotFoundError:
+        return None
+    return cache_name(key)
+
+
+def read(key):
+    """Bytes of the cached PDF, or None; like `get`, a hit refreshes its LRU position."""
+    path = cache_path(key)
+    try:
+        os.utime(path)
+        with open(path, "rb") as cached:
+            return cached.read()
+    except FileNotFoundError:
+        return None
+
+
+def put(key, pdf):
+    """Store `pdf` under `key`, evict least recently used entries, and return the storage name."""
+    path = cache_path(key)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    # Write then rename, so concurrent readers never see a partial file.
+    tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+    with open(tmp_path, "wb") as tmp:
+        tmp.write(pdf)
+    os.replace(tmp_path, path)
+    evict(keep=path)
+    return cache_name(key)
+
+
+def evict(max_bytes=None, keep=None):
+    """
+    Delete the least recently used PDFs until the cache fits in `max_bytes`
+    (STATEMENT_CACHE_MAX_BYTES by default). Returns the number removed.
+    """
+    max_bytes = settings.STATEMENT_CACHE_MAX_BYTES if max_bytes is None else max_bytes
+    directory = os.path.join(settings.MEDIA_ROOT, settings.STATEMENT_CACHE_DIR)
+    entries = []
+    with os.scandir(directory) as scan:
+        for entry in scan:
+            if not entry.name.endswith(".pdf"):
+                continue
+            try:
+                stat = entry.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, entry.path))
+
+    total = sum(size for _, size, _ in entries)
+    removed = 0
+    for _, size, path in sorted(entries):
+        if total <= max_bytes:
+            break
+        if path == keep:
+            continue
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+        total -= size
+        removed += 1
+    if removed:
+        logger.info(f"Evicted {removed} cached statements")
+    return removed
@@ -0,0 +1,114 @@
+import logging
+from django.conf import settings
+from django.db import close_old_connections
+from django.utils.timezone import now
+from statement import cache as statement_cache
+from statement.models import StatementJob
+from statement.pdf import render_reportlab
+from statement.utils import (
+    chunked_statement_html, render_statement_html, send_statement_email, statement_email_body, statement_transactions
+)
+
+logger = logging.getLogger(__name__)
+
+
+def html_to_pdf(html):
+    # Imported here so the API processes never load WeasyPrint and its native libraries.
+    from weasyprint import HTML
+    return HTML(string=html).write_pdf()
+
+
+def chunked_html_to_pdf(html_chunks):
+    """
+    Lay out each HTML chunk as its own WeasyPrint document and merge the
+    pages into one PDF with `Document.copy`, which WeasyPrint serialises
+    through pydyf. Chunking keeps each layout pass (one table of at most
+    STATEMENT_RENDER_CHUNK_ROWS rows) small and fast, but memory is not
+    flat: the laid-out pages of every chunk are held until the merged file
+    is written, so peak memory still grows with the row count. Statements
+    large enough for that to matter are drawn by ReportLab instead.
+    """
+    from weasyprint import HTML
+    from weasyprint.text.fonts import FontConfiguration
+
+    font_config = FontConfiguration()  # Shared, so fonts are loaded and embedded once
+    first, pages = None, []
+    for html in html_chunks:
+        document = HTML(string=html).render(font_config=font_config)
+        first = first or document
+        pages.extend(document.pages)
+    return first.copy(pages).write_pdf()
+
+
+def render_pdf(account, start_date, end_date, transactions=None, balances=None):
+    """
+    Statement PDF for the period. Large statements (STATEMENT_REPORTLAB_MIN_ROWS
+    rows or more) take the ReportLab fast path; the rest keep the WeasyPrint
+    layout of statement/statement.html, laid out in chunks of
+    STATEMENT_RENDER_CHUNK_ROWS rows once they exceed one chunk.
+    `transactions` is an already fetched list of STATEMENT_FIELDS dicts and
+    `balances` its opening and closing balance.
+    """
+    if transactions is None:
+        rows = statement_transactions(account, start_date, end_date).count()
+    else:
+        rows = len(transactions)
+    if rows >= settings.STATEMENT_REPORTLAB_MIN_ROWS:
+        return render_reportlab(account, start_date, end_date, transactions, balances)
+    if rows > settings.STATEMENT_RENDER_CHUNK_ROWS:
+        return chunked_html_to_pdf(chunked_statement_html(
+            account, start_date, end_date, settings.STATEMENT_RENDER_CHUNK_ROWS, transactions, balances
+        ))
+    return html_to_pdf(render_statement_html(account, start_date, end_date, transactions, balances))
+
+
+def claim_jobs(limit):
+    """Move up to `limit` pending jobs to running and return their ids, oldest first."""
+    if limit <= 0:
+        return []
+    # Batch jobs are run by `generate_monthly_statements`, not the online worker.
+    ids = list(StatementJob.objects.filter(status="pending", batch__isnull=True).order_by("created_at").values_list("id", flat=True)[:limit])
+    claimed = []
+    for job_id in ids:
+        # Conditional update, so two workers never claim the same job.
+        if StatementJob.objects.filter(pk=job_id, status="pending").update(status="running", started_at=now()):
+            claimed.append(job_id)
+    return claimed
+
+
+def render_job(job_id):
+    """
+    Render the PDF of a claimed job into the statement cache, emailing it when
+    requested. A PDF already cached for the same content is reused without
+    rendering anything; statement HTML is only built when WeasyPrint lays the
+    PDF out, and the email carries a short body with the PDF attached. Runs
+    inside a render process; returns the job's final status.
+    """
+    close_old_connections()
+    job = StatementJob.objects.select_related("account__user", "user").get(pk=job_id)
+    try:
+        key = statement_cache.statement_cache_key(job.account, job.start_date, job.end_date)
+        pdf = statement_cache.read(key)
+        if pdf is None:
+            pdf = render_pdf(job.account, job.start_date, job.end_date)
+            statement_cache.put(key, pdf)
+        job.pdf.name = statement_cache.cache_name(key)
+        job.cache_key = key
+        job.status = "completed"
+        job.finished_at = now()
+        job.save(update_fields=["pdf", "cache_key", "status", "finished_at"])
+        if job.deliver == "email":
+            send_statement_email(
+                user_email=job.account.user.email,
+                subject="Your Account Statement",
+                body=statement_email_body(job.start_date, job.end_date),
+                pdf_bytes=pdf,
+            )
+        logger.info(f"Statement job {job.pk} rendered for account {job.account.account_number}")
+    except Exception as e:
+        logger.error(f"Statement job {job.pk} failed: {e}")
+        job.status = "failed"
+        job.error = str(e)
+        job.finished_at = now()
+        job.save(update_fields=["status", "error", "finished_at"])
+    return job.status
@@ -0,0 +1,86 @@
+from concurrent.futures import ProcessPoolExecutor
+import datetime
+import multiprocessing
+import resource
+import time
+import django
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from accounts.models import Account, AccountType, User
+from transactions.ledger import purge_ledger
+from transactions.models import Transaction
+
+
+def measure(renderer, account_id, start_date, end_date):
+    """Render once in a fresh process and return (seconds, baseline RSS, peak RSS) in KiB."""
+    from django.conf import settings
+    from statement.jobs import chunked_html_to_pdf, html_to_pdf
+    from statement.pdf import render_reportlab
+    from statement.utils import chunked_statement_html, render_statement_html
+
+    account = Account.objects.select_related("user").get(pk=account_id)
+    baseline = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    started = time.perf_counter()
+    if renderer == "weasyprint":
+        html_to_pdf(render_statement_html(account, start_date, end_date))
+    elif renderer == "weasyprint-chunked":
+        chunked_html_to_pdf(chunked_statement_html(account, start_date, end_date, settings.STATEMENT_RENDER_CHUNK_ROWS))
+    else:
+        render_reportlab(account, start_date, end_date)
+    elapsed = time.perf_counter() - started
+    return elapsed, baseline, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare statement render time and peak RSS of the WeasyPrint and ReportLab renderers. "
+        "Each render runs in its own process. The benchmark account and its transactions are deleted afterwards."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", default="100,1000,5000", help="Comma separated statement sizes to render")
+        parser.add_argument("--renderers", default="weasyprint,weasyprint-chunked,reportlab")
+
+    def handle(self, *args, **options):
+        sizes = [int(size) for size in options["rows"].split(",")]
+        renderers = options["renderers"].split(",")
+        self.delete_user()  # Left over by an interrupted run
+        user = User.objects.create_user(
+            phone_number="08000000000", email="statement-benchmark@example.com",
+            password=None, first_name="Statement", last_name="Benchmark",
+        )
+        account_type, _ = AccountType.objects.get_or_create(name="Savings")
+        account = Account.objects.create(user=user, account_type=account_type)
+        end_date = timezone.localdate()
+        start_date = end_date - datetime.timedelta(days=365)
+        context = multiprocessing.get_context("spawn")
+        try:
+            created = 0
+            for size in sizes:
+                Transaction.objects.bulk_create([
+                    Transaction(
+                        user=user, account=account, amount=100 + index % 900, transaction_type="transfer",
+                        transaction_flow="debit" if index % 2 else "credit", status="success",
+                        narration=f"Benchmark transaction {created + index}",
+                    )
+                    for index in range(size - created)
+                ], batch_size=1000)
+                created = size
+                for renderer in renderers:
+                    with ProcessPoolExecutor(max_workers=1, mp_context=context, initializer=django.setup) as pool:
+                        try:
+                            elapsed, baseline, peak = pool.submit(measure, renderer, account.pk, start_date, end_date).result()
+                        except Exception as e:
+                            self.stderr.write(f"{renderer} with {size} rows: unavailable ({e})")
+                            continue
+                    self.stdout.write(
+                        f"{renderer} with {size} rows: {elapsed:.2f}s, peak RSS {peak / 1024:.0f} MiB "
+                        f"(+{(peak - baseline) / 1024:.0f} MiB while rendering)"
+                    )
+        finally:
+            self.delete_user()
+
+    def delete_user(self):
+        users = User.objects.filter(email="statement-benchmark@example.com")
+        purge_ledger(users)  # Ledger lines protect their accounts
+        users.delete()
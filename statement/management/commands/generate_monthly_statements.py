@@ -0,0 +1,71 @@
+import datetime
+import multiprocessing
+import time
+import django
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from statement.batch import enqueue_batch, partitions, run_partition
+from statement.models import StatementJob
+
+
+class Command(BaseCommand):
+    help = (
+        "Render and email a month's statement to every account. Accounts are partitioned across a "
+        "process pool; each partition fetches its transactions with one range query and queues its "
+        "emails in bulk for `send_queued_emails`. Rerunning the same month resumes where it stopped."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--month", help="Statement month as YYYY-MM (default: last month).")
+        parser.add_argument("--workers", type=int, default=multiprocessing.cpu_count(), help="Render processes.")
+        parser.add_argument("--partition-size", type=int, default=200, help="Accounts per partition.")
+        parser.add_argument(
+            "--renderer", choices=["auto", "reportlab"], default="auto",
+            help="'auto' picks per statement like the online path; 'reportlab' draws every statement with ReportLab.",
+        )
+
+    def handle(self, *args, **options):
+        if options["month"]:
+            try:
+                start_date = datetime.datetime.strptime(options["month"], "%Y-%m").date()
+            except ValueError:
+                raise CommandError("--month must be YYYY-MM")
+        else:
+            start_date = (timezone.localdate().replace(day=1) - datetime.timedelta(days=1)).replace(day=1)
+        end_date = (start_date + datetime.timedelta(days=32)).replace(day=1) - datetime.timedelta(days=1)
+        batch = f"monthly-{start_date:%Y-%m}"
+
+        # Partitions of a batch are only ever run by this command, so rows left
+        # running belong to a run that stopped and are redone.
+        StatementJob.objects.filter(batch=batch, status="running").update(status="pending", started_at=None)
+        created = enqueue_batch(batch, start_date, end_date)
+        work = partitions(batch, options["partition_size"])
+        pending = sum(len(part) for part in work)
+        self.stdout.write(f"{batch}: {created} new jobs, {pending} statements to generate in {len(work)} partitions.")
+
+        totals = {"statements": 0, "transactions": 0, "failed": 0, "query": 0.0, "render": 0.0, "queue": 0.0}
+        started = time.perf_counter()
+        # Spawned, so pool processes never share the parent's database connection.
+        context = multiprocessing.get_context("spawn")
+        with context.Pool(options["workers"], initializer=django.setup) as pool:
+            arguments = [(part, options["renderer"]) for part in work]
+            for stats in pool.imap_unordered(run_partition, arguments):
+                for key in totals:
+                    totals[key] += stats[key]
+                done = totals["statements"] + totals["failed"]
+                elapsed = time.perf_counter() - started
+                self.stdout.write(f"{done}/{pending} statements ({done / elapsed:.1f}/s)")
+        elapsed = time.perf_counter() - started
+
+        self.stdout.write(self.style.SUCCESS(
+            f"{batch}: {totals['statements']} statements emailed, {totals['failed']} failed in {elapsed:.1f}s "
+            f"({totals['statements'] / elapsed if elapsed else 0:.1f} statements/s)."
+        ))
+        # Stage times are summed across processes, so rates are per process.
+        for stage, count, label in (
+            ("query", totals["transactions"], "transactions fetched"),
+            ("render", totals["statements"], "statements rendered"),
+            ("queue", totals["statements"], "emails queued"),
+        ):
+            rate = count / totals[stage] if totals[stage] else 0
+            self.stdout.write(f"  {stage}: {totals[stage]:.1f}s, {rate:.0f} {label}/s per process")
@@ -0,0 +1,60 @@
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+import multiprocessing
+import time
+import django
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from statement.jobs import claim_jobs, render_job
+from statement.models import StatementJob
+
+
+class Command(BaseCommand):
+    help = (
+        "Render queued statement PDFs in a pool of processes. At most --workers renders "
+        "(STATEMENT_RENDER_CONCURRENCY by default) run at once, so PDF work stays off the API workers."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--workers", type=int, help="Render processes; caps concurrent renders.")
+        parser.add_argument("--loop", action="store_true", help="Keep polling for new jobs instead of exiting when the queue is empty.")
+        parser.add_argument("--interval", type=float, default=2.0, help="Seconds between polls with --loop.")
+        parser.add_argument(
+            "--requeue-running", action="store_true",
+            help="Requeue jobs left running by a stopped worker.",
+        )
+
+    def handle(self, *args, **options):
+        if options["requeue_running"]:
+            requeued = StatementJob.objects.filter(status="running", batch__isnull=True).update(status="pending", started_at=None)
+            self.stdout.write(f"Requeued {requeued} running jobs.")
+
+        workers = options["workers"] or settings.STATEMENT_RENDER_CONCURRENCY
+        rendered = failed = 0
+        # Spawned rather than forked, so render processes never share the parent's database
+        # connection; each one sets Django up afresh.
+        context = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(max_workers=workers, mp_context=context, initializer=django.setup) as pool:
+            running = {}
+            while True:
+                # Only claim what the pool can start now; the rest stays pending for other workers.
+                for job_id in claim_jobs(workers - len(running)):
+                    running[pool.submit(render_job, job_id)] = job_id
+                if not running:
+                    if not options["loop"]:
+                        break
+                    time.sleep(options["interval"])
+                    continue
+                done, _ = wait(running, timeout=options["interval"], return_when=FIRST_COMPLETED)
+                for future in done:
+                    job_id = running.pop(future)
+                    try:
+                        result = future.result()
+                    except Exception as e:
+                        StatementJob.objects.filter(pk=job_id).update(status="failed", error=str(e))
+                        result = "failed"
+                    if result == "completed":
+                        rendered += 1
+                    else:
+                        failed += 1
+                        self.stderr.write(self.style.ERROR(f"Statement job {job_id} failed."))
+        self.stdout.write(self.style.SUCCESS(f"Rendered {rendered} statements, {failed} failed."))
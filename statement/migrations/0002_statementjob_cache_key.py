@@ -0,0 +1,18 @@
+# Generated by Django 5.1.5 on 2026-10-18 18:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('statement', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='statementjob',
+            name='cache_key',
+            field=models.CharField(blank=True, max_length=64, null=True),
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 5.1.5 on 2026-10-18 18:47
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0020_accounttype_velocity_max_amount_and_more'),
+        ('statement', '0002_statementjob_cache_key'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='statementjob',
+            name='batch',
+            field=models.CharField(blank=True, max_length=30, null=True),
+        ),
+        migrations.AddConstraint(
+            model_name='statementjob',
+            constraint=models.UniqueConstraint(condition=models.Q(('batch__isnull', False)), fields=('account', 'batch'), name='statement_job_account_batch_uniq'),
+        ),
+    ]
@@ -1,3 +1,50 @@
+from django.conf import settings
 from django.db import models
 
-# Create your models here.
+
+class StatementJob(models.Model):
+    """
+    A statement PDF requested through the API. `process_statement_jobs`
+    renders it in a process pool into the content-addressed statement cache;
+    the owner downloads it from StatementJobDownloadView, or it is emailed
+    when `deliver` is "email".
+    """
+    STATUS_CHOICES = [
+        ("pending", "Pending"),
+        ("running", "Running"),
+        ("completed", "Completed"),
+        ("failed", "Failed"),
+    ]
+    DELIVER_CHOICES = [
+        ("download", "Download"),
+        ("email", "Email"),
+    ]
+
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="statement_jobs")
+    account = models.ForeignKey("accounts.Account", on_delete=models.CASCADE, related_name="statement_jobs")
+    start_date = models.DateField()
+    end_date = models.DateField()
+    deliver = models.CharField(max_length=10, choices=DELIVER_CHOICES, default="download")
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default="pending", db_index=True)
+    pdf = models.FileField(upload_to="statements/%Y/%m/", null=True, blank=True)  # Points into the statement cache
+    cache_key = models.CharField(max_length=64, null=True, blank=True)  # Content address of the PDF; served as its ETag
+    batch = models.CharField(max_length=30, null=True, blank=True)  # e.g. "monthly-2025-01"; set by `generate_monthly_statements`
+    error = models.TextField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        constraints = [
+            # One statement per account per batch, so an interrupted batch resumes without duplicates.
+            models.UniqueConstraint(
+                fields=["account", "batch"], condition=models.Q(batch__isnull=False), name="statement_job_account_batch_uniq"
+            ),
+        ]
+
+    def __str__(self):
+        return f"Statement job {self.pk} - {self.account} - {self.start_date} to {self.end_date} - {self.status}"
+
+    @property
+    def filename(self):
+        return f"{self.user.get_full_name().replace(' ', '_')}_statement_{self.start_date}_{self.end_date}.pdf"
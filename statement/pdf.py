@@ -0,0 +1,100 @@
+import io
+from itertools import islice
+from reportlab.lib import colors
+from reportlab.lib.pagesizes import letter
+from reportlab.pdfgen import canvas
+from reportlab.platypus import Table, TableStyle
+from statement.utils import statement_balances, statement_values
+
+MARGIN = 40
+ROW_HEIGHT = 16
+COLUMNS = ["Date", "Type", "Flow", "Amount", "Balance", "Narration"]
+COLUMN_WIDTHS = [62, 62, 48, 80, 90, 190]
+NARRATION_CHARS = 36
+HEADER_COLOR = colors.HexColor("#003366")
+
+TABLE_STYLE = TableStyle([
+    ("BACKGROUND", (0, 0), (-1, 0), HEADER_COLOR),
+    ("TEXTCOLOR", (0, 0), (-1, 0), colors.white),
+    ("FONTNAME", (0, 0), (-1, 0), "Helvetica-Bold"),
+    ("FONTNAME", (0, 1), (-1, -1), "Helvetica"),
+    ("FONTSIZE", (0, 0), (-1, -1), 8),
+    ("ALIGN", (3, 1), (4, -1), "RIGHT"),
+    ("GRID", (0, 0), (-1, -1), 0.5, colors.HexColor("#cccccc")),
+    ("VALIGN", (0, 0), (-1, -1), "MIDDLE"),
+])
+
+
+def statement_rows(transactions):
+    """Table rows for transaction dicts with the STATEMENT_FIELDS keys."""
+    for transaction in transactions:
+        narration = transaction["narration"] or "-"
+        if len(narration) > NARRATION_CHARS:
+            narration = narration[:NARRATION_CHARS - 1] + "…"
+        yield [
+            transaction["date"].strftime("%Y-%m-%d"),
+            transaction["transaction_type"].title(),
+            transaction["transaction_flow"].title(),
+            f"{transaction['amount']:,.2f}",
+            f"{transaction['running_balance']:,.2f}",
+            narration,
+        ]
+
+
+def draw_header(pdf, account, start_date, end_date, balances, top):
+    pdf.setFillColor(HEADER_COLOR)
+    pdf.setFont("Helvetica-Bold", 14)
+    pdf.drawString(MARGIN, top - 14, "Account Statement")
+    pdf.setFillColor(colors.black)
+    pdf.setFont("Helvetica", 9)
+    lines = [
+        f"Account Holder: {account.user.get_full_name()}",
+        f"Account Number: {account.account_number}",
+        f"Date Range: {start_date} to {end_date}",
+        f"Currency: {account.currency}",
+        f"Opening Balance: {balances['opening_balance']:,.2f}",
+        f"Closing Balance: {balances['closing_balance']:,.2f}",
+    ]
+    for index, line in enumerate(lines):
+        pdf.drawString(MARGIN, top - 34 - index * 13, line)
+    return top - 34 - len(lines) * 13 - 8
+
+
+def render_reportlab(account, start_date, end_date, transactions=None, balances=None):
+    """
+    Statement PDF drawn directly with ReportLab, one page at a time: each
+    page's rows are pulled from the database iterator, laid out as a single
+    platypus Table and flushed with showPage(), so neither the row set nor
+    an HTML document is ever held in memory. Used instead of WeasyPrint for
+    statements above STATEMENT_REPORTLAB_MIN_ROWS. `transactions` (dicts with
+    the STATEMENT_FIELDS keys, newest first) and `balances` skip the queries
+    when the caller has already fetched them.
+    """
+    buffer = io.BytesIO()
+    width, height = letter
+    pdf = canvas.Canvas(buffer, pagesize=letter, pageCompression=1)
+    pdf.setTitle("Account Statement")
+    balances = balances or statement_balances(account, start_date, end_date)
+    if transactions is None:
+        transactions = statement_values(account, start_date, end_date, balances)
+    rows = statement_rows(transactions)
+    page_number = 1
+    top = draw_header(pdf, account, start_date, end_date, balances, height - MARGIN)
+    while True:
+        capacity = int((top - MARGIN - 20) // ROW_HEIGHT) - 1  # One row for the column headings
+        page_rows = list(islice(rows, capacity))
+        if not page_rows and page_number > 1:
+            break
+        table = Table([COLUMNS] + page_rows, colWidths=COLUMN_WIDTHS, rowHeights=ROW_HEIGHT)
+        table.setStyle(TABLE_STYLE)
+        _, table_height = table.wrapOn(pdf, width - 2 * MARGIN, top - MARGIN)
+        table.drawOn(pdf, MARGIN, top - table_height)
+        pdf.setFont("Helvetica", 7)
+        pdf.drawCentredString(width / 2, MARGIN / 2, f"Generated for {account.user.get_full_name()} | {end_date} | Page {page_number}")
+        pdf.showPage()
+        if len(page_rows) < capacity:
+            break
+        page_number += 1
+        top = height - MARGIN
+    pdf.save()
+    return buffer.getvalue()
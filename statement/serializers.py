@@ -0,0 +1,36 @@
+from django.urls import reverse
+from rest_framework import serializers
+from statement.models import StatementJob
+from transactions.serializers import TransactionSerializer
+
+
+class StatementJobSerializer(serializers.ModelSerializer):
+    download_url = serializers.SerializerMethodField()
+
+    class Meta:
+        model = StatementJob
+        fields = [
+            "id",
+            "start_date",
+            "end_date",
+            "deliver",
+            "status",
+            "error",
+            "download_url",
+            "created_at",
+            "started_at",
+            "finished_at",
+        ]
+        read_only_fields = fields
+
+    def get_download_url(self, obj):
+        if obj.status != "completed":
+            return None
+        return reverse("statement_job_download", args=[obj.pk])
+
+
+class StatementTransactionSerializer(TransactionSerializer):
+    running_balance = serializers.DecimalField(max_digits=15, decimal_places=2, read_only=True)
+
+    class Meta(TransactionSerializer.Meta):
+        fields = TransactionSerializer.Meta.fields + ["running_balance"]
@@ -1,3 +1,284 @@
-from django.test import TestCase
+from decimal import Decimal
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.utils.timezone import localdate
+from rest_framework.test import APIRequestFactory, force_authenticate
+from accounts.models import Account, AccountType, User
+from transactions.models import Transaction
 
-# Create your tests here.
+
+@override_settings(AUDIT_BUFFER_SIZE=1)  # Write audit rows inside the test transaction
+class StatementJobTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            phone_number="08070426133",
+            email="test@example.com",
+            password="password123"
+        )
+        self.account_type, _ = AccountType.objects.get_or_create(name='Savings')
+        self.account = Account.objects.create(
+            user=self.user,
+            balance=Decimal("1000.00"),
+            account_type=self.account_type,
+        )
+
+    def test_statement_is_queued_rendered_and_downloaded(self):
+        import tempfile
+        from unittest import mock
+        from statement.jobs import claim_jobs, render_job
+        from statement.views import StatementJobDownloadView, StatementJobView
+
+        factory = APIRequestFactory()
+        request = factory.post("/api/v1/statement/jobs/", {"start_date": "2025-01-01", "end_date": "2025-01-31"}, format="json")
+        force_authenticate(request, user=self.user)
+        response = StatementJobView.as_view()(request)
+        self.assertEqual(response.status_code, 202)
+        job_id = response.data["id"]
+
+        request = factory.get(f"/api/v1/statement/jobs/{job_id}/download/")
+        force_authenticate(request, user=self.user)
+        self.assertEqual(StatementJobDownloadView.as_view()(request, job_id=job_id).status_code, 409)
+
+        with tempfile.TemporaryDirectory() as media_root, override_settings(MEDIA_ROOT=media_root):
+            self.assertEqual(claim_jobs(5), [job_id])
+            self.assertEqual(claim_jobs(5), [])
+            with mock.patch("statement.jobs.html_to_pdf", return_value=b"%PDF-1.4 statement"):
+                self.assertEqual(render_job(job_id), "completed")
+
+            request = factory.get(f"/api/v1/statement/jobs/{job_id}/download/")
+            force_authenticate(request, user=self.user)
+            response = StatementJobDownloadView.as_view()(request, job_id=job_id)
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(b"".join(response.streaming_content), b"%PDF-1.4 statement")
+            response.close()
+
+    def test_cached_statement_skips_rendering_and_honours_etag(self):
+        import tempfile
+        from unittest import mock
+        from statement import cache as statement_cache
+        from statement.jobs import claim_jobs, render_job
+        from statement.views import StatementJobDownloadView, StatementJobView
+
+        factory = APIRequestFactory()
+
+        def request_statement():
+            request = factory.post("/api/v1/statement/jobs/", {"start_date": "2025-01-01", "end_date": "2025-01-31"}, format="json")
+            force_authenticate(request, user=self.user)
+            return StatementJobView.as_view()(request)
+
+        with tempfile.TemporaryDirectory() as media_root, override_settings(MEDIA_ROOT=media_root):
+            self.assertEqual(request_statement().status_code, 202)
+            with mock.patch("statement.jobs.html_to_pdf", return_value=b"%PDF-1.4 statement") as html_to_pdf:
+                for job_id in claim_jobs(5):
+                    render_job(job_id)
+                self.assertEqual(html_to_pdf.call_count, 1)
+
+            response = request_statement()
+            self.assertEqual((response.status_code, response.data["status"]), (200, "completed"))
+            job_id = response.data["id"]
+
+            request = factory.get(f"/api/v1/statement/jobs/{job_id}/download/")
+            force_authenticate(request, user=self.user)
+            response = StatementJobDownloadView.as_view()(request, job_id=job_id)
+            etag = response["ETag"]
+            response.close()
+
+            request = factory.get(f"/api/v1/statement/jobs/{job_id}/download/", HTTP_IF_NONE_MATCH=etag)
+            force_authenticate(request, user=self.user)
+            self.assertEqual(StatementJobDownloadView.as_view()(request, job_id=job_id).status_code, 304)
+
+            # Eviction sends the job back to the render queue.
+            self.assertEqual(statement_cache.evict(max_bytes=0), 1)
+            request = factory.get(f"/api/v1/statement/jobs/{job_id}/download/")
+            force_authenticate(request, user=self.user)
+            self.assertEqual(StatementJobDownloadView.as_view()(request, job_id=job_id).status_code, 409)
+            self.assertIn(job_id, claim_jobs(5))
+
+    def test_emailed_statement_has_short_body_and_reuses_cached_pdf(self):
+        import datetime
+        import tempfile
+        from unittest import mock
+        from notifications.models import QueuedEmail
+        from statement.jobs import render_job
+        from statement.models import StatementJob
+
+        start, end = datetime.date(2025, 1, 1), datetime.date(2025, 1, 31)
+        jobs = [
+            StatementJob.objects.create(
+                user=self.user, account=self.account, start_date=start, end_date=end, deliver="email", status="running"
+            )
+            for _ in range(2)
+        ]
+        with tempfile.TemporaryDirectory() as media_root, override_settings(MEDIA_ROOT=media_root):
+            with mock.patch("statement.jobs.html_to_pdf", return_value=b"%PDF-1.4 statement"):
+                self.assertEqual(render_job(jobs[0].pk), "completed")
+            with mock.patch("statement.jobs.render_statement_html") as render_statement_html:
+                self.assertEqual(render_job(jobs[1].pk), "completed")
+            render_statement_html.assert_not_called()
+        emails = QueuedEmail.objects.all()
+        self.assertEqual(len(emails), 2)
+        for email in emails:
+            self.assertEqual(email.body, "Please find attached your account statement for 2025-01-01 to 2025-01-31.")
+            self.assertIsNone(email.html_body)
+            self.assertEqual(bytes(email.attachment), b"%PDF-1.4 statement")
+
+    def test_cache_key_changes_with_period_transactions(self):
+        import datetime
+        from statement.cache import statement_cache_key
+
+        start, end = datetime.date(2025, 1, 1), localdate()
+        key = statement_cache_key(self.account, start, end)
+        self.assertEqual(statement_cache_key(self.account, start, end), key)
+        Transaction.objects.create(
+            user=self.user, account=self.account, amount=Decimal("10.00"),
+            transaction_type="deposit", transaction_flow="credit", status="success",
+        )
+        self.assertNotEqual(statement_cache_key(self.account, start, end), key)
+
+    @override_settings(STATEMENT_REPORTLAB_MIN_ROWS=2)
+    def test_large_statements_use_reportlab(self):
+        import datetime
+        from unittest import mock
+        from statement.jobs import render_pdf
+
+        Transaction.objects.bulk_create([
+            Transaction(
+                user=self.user, account=self.account, amount=Decimal("5.00"),
+                transaction_type="deposit", transaction_flow="credit", status="success",
+            )
+            for _ in range(118)  # Exactly fills three pages
+        ])
+        with mock.patch("statement.jobs.html_to_pdf") as html_to_pdf:
+            pdf = render_pdf(self.account, datetime.date(2025, 1, 1), localdate())
+        html_to_pdf.assert_not_called()
+        self.assertTrue(pdf.startswith(b"%PDF"))
+        self.assertEqual(pdf.count(b"/Type /Page\n"), 3)
+
+    def test_statement_html_is_split_into_chunks(self):
+        import datetime
+        from statement.utils import chunked_statement_html
+
+        for _ in range(5):
+            Transaction.objects.create(
+                user=self.user, account=self.account, amount=Decimal("5.00"),
+                transaction_type="deposit", transaction_flow="credit", status="success",
+            )
+        chunks = list(chunked_statement_html(self.account, datetime.date(2025, 1, 1), localdate(), chunk_rows=2))
+        self.assertEqual([chunk.count("<td>Deposit</td>") for chunk in chunks], [2, 2, 1])
+        self.assertEqual(["Account Holder" in chunk for chunk in chunks], [True, False, False])
+        self.assertEqual(["<footer>" in chunk for chunk in chunks], [False, False, True])
+
+    def test_monthly_batch_emails_each_account_once(self):
+        from notifications.models import QueuedEmail
+        from statement.batch import enqueue_batch, partitions, process_partition
+
+        Transaction.objects.create(
+            user=self.user, account=self.account, amount=Decimal("5.00"),
+            transaction_type="deposit", transaction_flow="credit", status="success",
+        )
+        month = localdate().replace(day=1)
+        self.assertEqual(enqueue_batch("monthly-test", month, localdate()), 1)
+        self.assertEqual(enqueue_batch("monthly-test", month, localdate()), 0)
+
+        [part] = partitions("monthly-test", size=100)
+        stats = process_partition(part, renderer="reportlab")
+        self.assertEqual((stats["statements"], stats["transactions"], stats["failed"]), (1, 1, 0))
+        email = QueuedEmail.objects.get()
+        self.assertEqual(email.to, ["test@example.com"])
+        self.assertTrue(bytes(email.attachment).startswith(b"%PDF"))
+        self.assertEqual(partitions("monthly-test", size=100), [])
+
+    def test_statement_running_balance_is_seeded_from_opening_balance(self):
+        from statement.views import AccountStatementView
+
+        cache.clear()
+        for amount, transaction_type in (("100.00", "deposit"), ("200.00", "deposit"), ("50.00", "withdrawal")):
+            Transaction.objects.create(
+                user=self.user, account=self.account, amount=Decimal(amount), transaction_type=transaction_type,
+            ).process_transaction()
+        Transaction.objects.create(
+            user=self.user, account=self.account, amount=Decimal("999.00"), transaction_type="deposit", status="failed",
+        )
+        factory = APIRequestFactory()
+        today = localdate().isoformat()
+
+        def get(url):
+            request = factory.get(url)
+            force_authenticate(request, user=self.user)
+            return AccountStatementView.as_view()(request)
+
+        response = get(f"/?start_date={today}&end_date={today}&pagination=cursor&page_size=2")
+        self.assertEqual((response.data["opening_balance"], response.data["closing_balance"]), ("1000.00", "1250.00"))
+        self.assertEqual([row["running_balance"] for row in response.data["results"]], ["1250.00", "1250.00"])
+        older = get(response.data["links"]["next"])
+        self.assertEqual([row["running_balance"] for row in older.data["results"]], ["1300.00", "1100.00"])
+        # Paging back filters out the older rows; the balances must not change.
+        newer = get(older.data["links"]["previous"])
+        self.assertEqual(newer.data["results"], response.data["results"])
+
+    def test_reversal_across_period_boundary_matches_ledger(self):
+        import datetime
+        from django.utils import timezone
+        from statement.utils import statement_balances, statement_values
+        from transactions.ledger import balance_at, start_of
+        from transactions.models import LedgerEntry
+
+        deposit = Transaction.objects.create(
+            user=self.user, account=self.account, amount=Decimal("100.00"), transaction_type="deposit",
+        )
+        deposit.process_transaction()
+        yesterday = localdate() - datetime.timedelta(days=1)
+        posted_at = timezone.now() - datetime.timedelta(days=1)
+        Transaction.objects.filter(pk=deposit.pk).update(date=posted_at)
+        LedgerEntry.objects.filter(transaction=deposit).update(created_at=posted_at)
+        deposit.refresh_from_db()
+        deposit.reverse_transaction()
+
+        for day, closing, rows in (
+            (yesterday, Decimal("1100.00"), [("credit", Decimal("1100.00"))]),
+            (localdate(), Decimal("1000.00"), [("debit", Decimal("1000.00"))]),
+        ):
+            balances = statement_balances(self.account, day, day)
+            self.assertEqual(balances["opening_balance"], balance_at(self.account.pk, start_of(day)))
+            self.assertEqual(balances["closing_balance"], closing)
+            self.assertEqual(closing, balance_at(self.account.pk, start_of(day + datetime.timedelta(days=1))))
+            values = statement_values(self.account, day, day, balances)
+            self.assertEqual([(row["transaction_flow"], row["running_balance"]) for row in values], rows)
+
+    def test_export_streams_csv_and_ndjson(self):
+        import json
+        from statement.views import AccountStatementExportView
+
+        for amount in ("10.00", "20.00", "30.00"):
+            Transaction.objects.create(
+                user=self.user, account=self.account, amount=Decimal(amount),
+                transaction_type="deposit", transaction_flow="credit", status="success",
+            )
+        today = localdate().isoformat()
+        factory = APIRequestFactory()
+
+        request = factory.get(f"/api/v1/statement/account-statement/export/?format=ndjson&start_date={today}&end_date={today}")
+        force_authenticate(request, user=self.user)
+        response = AccountStatementExportView.as_view()(request)
+        self.assertTrue(response.streaming)
+        self.assertEqual(response["Content-Type"], "application/x-ndjson")
+        records = [json.loads(line) for line in b"".join(response.streaming_content).decode().splitlines()]
+        self.assertEqual([record["amount"] for record in records], ["10.00", "20.00", "30.00"])
+
+        request = factory.get(f"/api/v1/statement/account-statement/export/?format=csv&start_date={today}&end_date={today}")
+        force_authenticate(request, user=self.user)
+        lines = b"".join(AccountStatementExportView.as_view()(request).streaming_content).decode().splitlines()
+        self.assertEqual(lines[0], "id,date,transaction_type,transaction_flow,status,amount,narration")
+        self.assertEqual(len(lines), 4)
+
+    @override_settings(STATEMENT_JOB_MAX_OPEN_PER_USER=1)
+    def test_open_jobs_per_user_are_capped(self):
+        from statement.views import StatementJobView
+
+        factory = APIRequestFactory()
+        statuses = []
+        for _ in range(2):
+            request = factory.post("/api/v1/statement/jobs/", {"start_date": "2025-01-01", "end_date": "2025-01-31"}, format="json")
+            force_authenticate(request, user=self.user)
+            statuses.append(StatementJobView.as_view()(request).status_code)
+        self.assertEqual(statuses, [202, 429])
@@ -1,8 +1,20 @@
 from django.urls import path
-from statement.views import AccountStatementView, AccountStatementEmailView, AccountStatementDownloadView
+from statement.views import (
+    AccountStatementView,
+    AccountStatementEmailView,
+    AccountStatementDownloadView,
+    AccountStatementExportView,
+    StatementJobView,
+    StatementJobDetailView,
+    StatementJobDownloadView,
+)
 
 urlpatterns = [
     path('account-statement/', AccountStatementView.as_view(), name='account_statement'),
     path('account-statement/download/', AccountStatementDownloadView.as_view(), name='account_statement_download'),
+    path('account-statement/export/', AccountStatementExportView.as_view(), name='account_statement_export'),
     path('account-statement/email/', AccountStatementEmailView.as_view(), name='account_statement_email'),
-]
\ No newline at end of file
+    path('jobs/', StatementJobView.as_view(), name='statement_jobs'),
+    path('jobs/<int:job_id>/', StatementJobDetailView.as_view(), name='statement_job_detail'),
+    path('jobs/<int:job_id>/download/', StatementJobDownloadView.as_view(), name='statement_job_download'),
+]
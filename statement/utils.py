@@ -1,5 +1,15 @@
-from django.core.mail import EmailMultiAlternatives
+import csv
+import datetime
+from itertools import islice
+import json
+from decimal import Decimal
 from django.conf import settings
+from django.db.models import Case, DecimalField, F, Sum, Value, When, Window
+from django.db.models.expressions import RowRange
+from django.template.loader import render_to_string
+from notifications.email_queue import queue_email
+from transactions.ledger import balance_at, start_of
+from transactions.models import Transaction
 from reportlab.lib.pagesizes import letter
 # from reportlab.pdfgen import canvas
 # from django.http import HttpResponse
@@ -9,25 +19,164 @@ import logging
 logger = logging.getLogger(__name__)
 
 
+def statement_transactions(account, start_date, end_date):
+    """
+    Transactions of `account` from the start of `start_date` up to the end of
+    `end_date` (both local dates), newest first. The half-open range on the raw
+    column keeps the (account, date) index usable and includes the whole end day.
+    """
+    return Transaction.objects.filter(
+        account=account,
+        date__gte=start_of(start_date),
+        date__lt=start_of(end_date + datetime.timedelta(days=1)),
+    ).order_by("-date", "-id")
 
-def send_statement_email(user_email, subject, html_content, pdf_bytes):
-    
+
+# How a statement row moved the balance. Successful and reversed transactions
+# were posted; a reversal is posted later by its own rows (`reversal_of`), so
+# every row counts in the period it happened and balances agree with the ledger.
+POSTED_STATUSES = ["success", "reversed"]
+BALANCE_EFFECT = Case(
+    When(status__in=POSTED_STATUSES, transaction_flow="credit", then=F("amount")),
+    When(status__in=POSTED_STATUSES, then=-F("amount")),
+    default=Value(Decimal(0)),
+    output_field=DecimalField(max_digits=15, decimal_places=2),
+)
+
+
+def statement_balances(account, start_date, end_date):
+    """
+    Opening and closing balance of the period. The opening balance comes from
+    the ledger (latest checkpoint plus one indexed aggregate), never from a
+    scan of the account's history; the closing balance adds the period's net
+    movement, so it always agrees with the last running balance.
+    """
+    opening = balance_at(account.pk, start_of(start_date))
+    net = statement_transactions(account, start_date, end_date).order_by().aggregate(net=Sum(BALANCE_EFFECT))["net"]
+    return {"opening_balance": opening, "closing_balance": opening + (net or Decimal(0))}
+
+
+def with_running_balance(queryset, balances, from_end=False):
+    """
+    Annotate `running_balance`, the balance after each row, with a window
+    over the rows of `queryset` seeded from the opening balance:
+    opening + SUM(effect) OVER (ORDER BY date, id). With `from_end` the same
+    value is derived back from the closing balance over a descending window,
+    which stays correct when a filter has removed the period's older rows
+    (backward keyset pages) instead of its newer ones.
+    """
+    output_field = DecimalField(max_digits=15, decimal_places=2)
+    frame = RowRange(start=None, end=0)
+    if from_end:
+        later = Window(Sum(BALANCE_EFFECT), order_by=[F("date").desc(), F("id").desc()], frame=frame)
+        running = Value(balances["closing_balance"], output_field=output_field) - later + BALANCE_EFFECT
+    else:
+        earlier = Window(Sum(BALANCE_EFFECT), order_by=[F("date").asc(), F("id").asc()], frame=frame)
+        running = Value(balances["opening_balance"], output_field=output_field) + earlier
+    return queryset.annotate(running_balance=running)
+
+
+STATEMENT_FIELDS = ["date", "transaction_type", "transaction_flow", "amount", "narration", "running_balance"]
+EXPORT_FIELDS = ["id", "date", "transaction_type", "transaction_flow", "status", "amount", "narration"]
+
+
+class Echo:
+    """File-like object whose write() returns the value, so csv.writer can feed a generator."""
+    def write(self, value):
+        return value
+
+
+def statement_values(account, start_date, end_date, balances):
+    """Statement rows as dicts with the STATEMENT_FIELDS keys, newest first, read in chunks."""
+    rows = with_running_balance(statement_transactions(account, start_date, end_date), balances)
+    return rows.values(*STATEMENT_FIELDS).iterator(chunk_size=settings.STATEMENT_EXPORT_CHUNK_SIZE)
+
+
+def export_rows(account, start_date, end_date):
+    """
+    Statement rows for `account`, oldest first, as tuples of EXPORT_FIELDS.
+    Fetched in chunks with `iterator()`, so memory stays flat for any range.
+    """
+    return statement_transactions(account, start_date, end_date).order_by("date", "id").values_list(
+        *EXPORT_FIELDS
+    ).iterator(chunk_size=settings.STATEMENT_EXPORT_CHUNK_SIZE)
+
+
+def stream_csv(rows):
+    writer = csv.writer(Echo())
+    yield writer.writerow(EXPORT_FIELDS)
+    for row in rows:
+        yield writer.writerow(row)
+
+
+def stream_ndjson(rows):
+    for row in rows:
+        record = dict(zip(EXPORT_FIELDS, row))
+        record["id"] = str(record["id"])
+        record["date"] = record["date"].isoformat()
+        record["amount"] = str(record["amount"])
+        yield json.dumps(record) + "\n"
+
+
+def render_statement_html(account, start_date, end_date, transactions=None, balances=None):
+    balances = balances or statement_balances(account, start_date, end_date)
+    if transactions is None:
+        transactions = statement_values(account, start_date, end_date, balances)
+    return render_to_string("statement/statement.html", {
+        "account": account,
+        "transactions": transactions,
+        "start_date": start_date,
+        "end_date": end_date,
+        **balances,
+    })
+
+
+def chunked_statement_html(account, start_date, end_date, chunk_rows, transactions=None, balances=None):
+    """
+    The statement as a sequence of HTML documents of at most `chunk_rows`
+    rows each. Only the first carries the account header and only the last
+    the footer; laid out one after another they read as one statement, with
+    each chunk starting on a new page.
+    """
+    balances = balances or statement_balances(account, start_date, end_date)
+    if transactions is None:
+        transactions = statement_values(account, start_date, end_date, balances)
+    transactions = iter(transactions)
+    chunk = list(islice(transactions, chunk_rows))
+    continuation = False
+    while True:
+        next_chunk = list(islice(transactions, chunk_rows))
+        yield render_to_string("statement/statement.html", {
+            "account": account,
+            "transactions": chunk,
+            "start_date": start_date,
+            "end_date": end_date,
+            "continuation": continuation,
+            "has_more": bool(next_chunk),
+            **balances,
+        })
+        if not next_chunk:
+            break
+        chunk, continuation = next_chunk, True
+
+
+def statement_email_body(start_date, end_date):
+    """Short body of a statement email; the statement itself is the PDF attachment."""
+    return f"Please find attached your account statement for {start_date} to {end_date}."
+
+
+def send_statement_email(user_email, subject, body, pdf_bytes):
+    """Queue the statement email with its PDF for the `send_queued_emails` worker."""
     try:
-        from_email = settings.EMAIL_HOST_USER
-        to_email = [user_email]
-
-        email = EmailMultiAlternatives(
-            subject=subject,
-            body=html_content,
-            from_email=from_email,
-            to=to_email
+        queue_email(
+            user_email,
+            subject,
+            body,
+            from_email=settings.EMAIL_HOST_USER,
+            attachment=(f"{user_email}_statement.pdf", pdf_bytes, "application/pdf"),
         )
-        email.attach_alternative(html_content, "text/html")
-        email.attach(f"{user_email}_statement.pdf", pdf_bytes, "application/pdf")
-
-        email.send()
-        logger.info(f"Statement email sent to {user_email}")
+        logger.info(f"Statement email queued for {user_email}")
     except Exception as e:
-        logger.error(f"Failed to send statement email to {user_email}: {str(e)}")
+        logger.error(f"Failed to queue statement email to {user_email}: {str(e)}")
         return "Email sending failed"
-    return None
\ No newline at end of file
+    return None
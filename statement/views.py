@@ -1,21 +1,22 @@
 from rest_framework.views import APIView
 from rest_framework.response import Response
-from django.template.loader import render_to_string
-from django.utils import timezone
 from rest_framework.permissions import IsAuthenticated
 from fintech.throttling import CustomRateThrottle
 from rest_framework.throttling import UserRateThrottle
-from weasyprint import HTML
 from rest_framework import status
-from django.http import HttpResponse
-from transactions.models import Transaction
+from django.conf import settings
+from django.utils import timezone
+from django.http import FileResponse, HttpResponseNotModified, StreamingHttpResponse
+from django.utils.cache import patch_cache_control
 from accounts.models import Account
 from accounts.utils import log_audit
-from statement.utils import send_statement_email
+from statement import cache as statement_cache
+from statement.models import StatementJob
+from statement.serializers import StatementJobSerializer, StatementTransactionSerializer
+from statement.utils import export_rows, statement_balances, statement_transactions, stream_csv, stream_ndjson, with_running_balance
 import datetime
 import logging
-from transactions.pagination import CustomPagination
-from transactions.serializers import TransactionSerializer  # Create a serializer for transactions
+from transactions.pagination import KeysetPagination, get_paginator
 
 logger = logging.getLogger(__name__)
 
@@ -50,150 +51,239 @@ class AccountStatementView(APIView):
         except Account.DoesNotExist:
             return Response({"error": "No account found for the authenticated user."}, status=status.HTTP_404_NOT_FOUND)
 
-        # Filter transactions
-        transactions = Transaction.objects.filter(
-            account=account,
-            date__range=[start_date, end_date]
-        ).order_by('-date')
+        # Filter transactions, with the running balance computed in SQL
+        paginator = get_paginator(request, ordering=("-date", "-id"))
+        balances = statement_balances(account, start_date, end_date)
+        from_end = isinstance(paginator, KeysetPagination) and paginator.is_reverse(request)
+        transactions = with_running_balance(statement_transactions(account, start_date, end_date), balances, from_end)
 
         # Apply pagination
-        paginator = CustomPagination()
         paginated_transactions = paginator.paginate_queryset(transactions, request)
-        serialized_transactions = TransactionSerializer(paginated_transactions, many=True)
+        serialized_transactions = StatementTransactionSerializer(paginated_transactions, many=True)
 
         # Return paginated response
-        return paginator.get_paginated_response(serialized_transactions.data)
+        response = paginator.get_paginated_response(serialized_transactions.data)
+        response.data.update({key: f"{value:.2f}" for key, value in balances.items()})
+        return response
     
 
-class AccountStatementEmailView(APIView):
+EXPORT_FORMATS = {
+    "csv": (stream_csv, "text/csv"),
+    "ndjson": (stream_ndjson, "application/x-ndjson"),
+}
+
+
+class AccountStatementExportView(APIView):
+    """
+    Streams the statement for start_date..end_date as CSV or NDJSON
+    (`?format=csv|ndjson`), oldest first, for machine consumers such as the
+    accounting sync. Rows are read and written in chunks, so multi-year
+    ranges use constant memory.
+    """
     permission_classes = [IsAuthenticated]
-    throttle_classes = [CustomRateThrottle]
+    throttle_classes = [UserRateThrottle]
+
+    def perform_content_negotiation(self, request, force=False):
+        # `format` picks the export format here, not a DRF renderer.
+        renderer = self.get_renderers()[0]
+        return renderer, renderer.media_type
 
     def get(self, request):
-        user = request.user
+        export_format = request.query_params.get('format', 'csv')
         start_date = request.query_params.get('start_date')
         end_date = request.query_params.get('end_date')
 
+        if export_format not in EXPORT_FORMATS:
+            return Response({"error": "format must be 'csv' or 'ndjson'."}, status=status.HTTP_400_BAD_REQUEST)
         if not start_date or not end_date:
             return Response({"error": "start_date and end_date are required"}, status=status.HTTP_400_BAD_REQUEST)
-
         try:
-            start_date = timezone.make_aware(datetime.datetime.strptime(start_date, "%Y-%m-%d"))
-            end_date = timezone.make_aware(datetime.datetime.strptime(end_date, "%Y-%m-%d"))
+            start_date, end_date = parse_period(start_date, end_date)
         except ValueError:
-            return Response({"error": "Invalid date format. Use YYYY-MM-DD."}, status=status.HTTP_400_BAD_REQUEST)
+            return Response({"error": "Invalid date range. Use YYYY-MM-DD with end_date on or after start_date."}, status=status.HTTP_400_BAD_REQUEST)
 
-        if end_date < start_date:
-            return Response({"error": "end_date must be greater than or equal to start_date"}, status=status.HTTP_400_BAD_REQUEST)
-
-        # Get the user's account
         try:
-            account = Account.objects.get(user=user)
+            account = Account.objects.get(user=request.user)
         except Account.DoesNotExist:
-            logger.error(f"Account not found for user {user.email}")
             return Response({"error": "No account found for the authenticated user."}, status=status.HTTP_404_NOT_FOUND)
 
-        # Filter transactions
-        transactions = Transaction.objects.filter(
-            account=account,
-            date__range=[start_date, end_date]
-        ).order_by('-date')
-
-        html_string = render_to_string("statement/statement.html", {
-            "account": account,
-            "transactions": transactions,
-            "start_date": start_date,
-            "end_date": end_date
-        })
-
-        pdf = HTML(string=html_string).write_pdf()
-
-        filename = f"{account.user.get_full_name().replace(' ', '_')}_statement.pdf"
-        response = HttpResponse(pdf, content_type="application/pdf")
-        response["Content-Disposition"] = f'attachment; filename="{filename}"'
-
-        # Send email with the statement
-        subject = "Your Account Statement"
-        # message = "Please find attached your account statement."
-        # recipient_list = [account.user.email]
-        try:
-            send_statement_email(
-                user_email=account.user.email,
-                subject=subject,
-                html_content=html_string,
-                pdf_bytes=pdf
-            )
-            logger.info(f"Account statement emailed to {account.user.email} for the period {start_date} to {end_date}")
-            log_audit(
-                user=user,
-                action="EMAIL_STATEMENT",
-                details=f"Account statement emailed to {account.user.email} for the period {start_date} to {end_date}"
+        log_audit(
+            user=request.user,
+            action="EXPORT_STATEMENT",
+            ip_address=request.META.get("REMOTE_ADDR"),
+            metadata={"format": export_format, "start_date": str(start_date), "end_date": str(end_date)},
+        )
+        stream, content_type = EXPORT_FORMATS[export_format]
+        response = StreamingHttpResponse(stream(export_rows(account, start_date, end_date)), content_type=content_type)
+        response["Content-Disposition"] = f'attachment; filename="statement_{start_date}_{end_date}.{export_format}"'
+        return response
+
+
+def parse_period(start_date, end_date):
+    """(start, end) dates from YYYY-MM-DD strings; raises ValueError on a bad or reversed range."""
+    start_date = datetime.datetime.strptime(start_date, "%Y-%m-%d").date()
+    end_date = datetime.datetime.strptime(end_date, "%Y-%m-%d").date()
+    if end_date < start_date:
+        raise ValueError("end_date must be greater than or equal to start_date")
+    return start_date, end_date
+
+
+def enqueue_statement_job(request, start_date, end_date, deliver):
+    """
+    Queue a statement PDF for `process_statement_jobs` and answer 202 with the
+    job; rendering never happens on the request thread. A download whose PDF
+    is already in the statement cache is completed at once (200).
+    """
+    user = request.user
+    try:
+        account = Account.objects.select_related("user").get(user=user)
+    except Account.DoesNotExist:
+        logger.error(f"Account not found for user {user.email}")
+        return Response({"error": "No account found for the authenticated user."}, status=status.HTTP_404_NOT_FOUND)
+
+    if deliver == "download":
+        key = statement_cache.statement_cache_key(account, start_date, end_date)
+        name = statement_cache.get(key)
+        if name is not None:
+            job = StatementJob.objects.create(
+                user=user, account=account, start_date=start_date, end_date=end_date, deliver=deliver,
+                status="completed", pdf=name, cache_key=key, finished_at=timezone.now(),
             )
-        except Exception as e:
-            return Response({"error": f"Failed to send email: {str(e)}"}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+            logger.info(f"Statement job {job.pk} served from cache for {user.email}")
+            return Response(StatementJobSerializer(job).data, status=status.HTTP_200_OK)
+
+    open_jobs = StatementJob.objects.filter(user=user, batch__isnull=True, status__in=["pending", "running"]).count()
+    if open_jobs >= settings.STATEMENT_JOB_MAX_OPEN_PER_USER:
+        return Response(
+            {"error": "Too many statements are already being prepared. Try again when they are ready."},
+            status=status.HTTP_429_TOO_MANY_REQUESTS
+        )
 
-        return Response({"message": "Statement emailed successfully."}, status=status.HTTP_200_OK)
-    
+    job = StatementJob.objects.create(
+        user=user, account=account, start_date=start_date, end_date=end_date, deliver=deliver
+    )
+    logger.info(f"Statement job {job.pk} queued for {user.email} for the period {start_date} to {end_date}")
+    log_audit(
+        user=user,
+        action="EMAIL_STATEMENT" if deliver == "email" else "REQUEST_STATEMENT",
+        ip_address=request.META.get("REMOTE_ADDR"),
+        metadata={"statement_job_id": job.pk, "start_date": str(start_date), "end_date": str(end_date)},
+    )
+    return Response(StatementJobSerializer(job).data, status=status.HTTP_202_ACCEPTED)
+
+
+class StatementJobView(APIView):
+    """
+    POST queues a statement PDF (`deliver` is "download" or "email");
+    GET lists the user's recent statement jobs.
+    """
+    permission_classes = [IsAuthenticated]
+    throttle_classes = [CustomRateThrottle]
 
-class AccountStatementDownloadView(APIView):
+    def get(self, request):
+        jobs = StatementJob.objects.filter(user=request.user).order_by("-created_at", "-id")
+        paginator = get_paginator(request, ordering=("-created_at", "-id"))
+        page = paginator.paginate_queryset(jobs, request)
+        return paginator.get_paginated_response(StatementJobSerializer(page, many=True).data)
+
+    def post(self, request):
+        start_date = request.data.get('start_date')
+        end_date = request.data.get('end_date')
+        deliver = request.data.get('deliver', 'download')
+
+        if not start_date or not end_date:
+            return Response({"error": "start_date and end_date are required"}, status=status.HTTP_400_BAD_REQUEST)
+        if deliver not in dict(StatementJob.DELIVER_CHOICES):
+            return Response({"error": "deliver must be 'download' or 'email'."}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            start_date, end_date = parse_period(start_date, end_date)
+        except ValueError:
+            return Response({"error": "Invalid date range. Use YYYY-MM-DD with end_date on or after start_date."}, status=status.HTTP_400_BAD_REQUEST)
+
+        return enqueue_statement_job(request, start_date, end_date, deliver)
+
+
+class StatementJobDetailView(APIView):
+    permission_classes = [IsAuthenticated]
+    throttle_classes = [UserRateThrottle]
+
+    def get(self, request, job_id):
+        try:
+            job = StatementJob.objects.get(id=job_id, user=request.user)
+        except StatementJob.DoesNotExist:
+            return Response({"error": "Statement job not found."}, status=status.HTTP_404_NOT_FOUND)
+        return Response(StatementJobSerializer(job).data, status=status.HTTP_200_OK)
+
+
+class StatementJobDownloadView(APIView):
     permission_classes = [IsAuthenticated]
     throttle_classes = [UserRateThrottle]
 
+    def get(self, request, job_id):
+        try:
+            job = StatementJob.objects.select_related("user").get(id=job_id, user=request.user)
+        except StatementJob.DoesNotExist:
+            return Response({"error": "Statement job not found."}, status=status.HTTP_404_NOT_FOUND)
+        if job.status == "completed" and job.pdf and not job.pdf.storage.exists(job.pdf.name):
+            # Evicted from the statement cache; render it again.
+            job.status, job.pdf, job.finished_at = "pending", None, None
+            job.save(update_fields=["status", "pdf", "finished_at"])
+        if job.status != "completed" or not job.pdf:
+            return Response(
+                {"error": f"Statement is not ready (status: {job.status}).", "job": StatementJobSerializer(job).data},
+                status=status.HTTP_409_CONFLICT
+            )
+
+        # The cache key is a content address, so it doubles as a strong ETag.
+        etag = f'"{job.cache_key}"'
+        if etag in request.headers.get("If-None-Match", ""):
+            response = HttpResponseNotModified()
+        else:
+            response = FileResponse(job.pdf.open("rb"), as_attachment=True, filename=job.filename, content_type="application/pdf")
+        response["ETag"] = etag
+        patch_cache_control(response, private=True, no_cache=True)
+        return response
+
+
+class AccountStatementEmailView(APIView):
+    """Queues an emailed statement; the PDF is rendered and sent by `process_statement_jobs`."""
+    permission_classes = [IsAuthenticated]
+    throttle_classes = [CustomRateThrottle]
+
     def get(self, request):
-        user = request.user
         start_date = request.query_params.get('start_date')
         end_date = request.query_params.get('end_date')
 
         if not start_date or not end_date:
-            end_date = datetime.date.today()
-            start_date = end_date - datetime.timedelta(days=30)
-        else:
-            start_date = datetime.datetime.strptime(start_date, "%Y-%m-%d").date()
-            end_date = datetime.datetime.strptime(end_date, "%Y-%m-%d").date()
-
+            return Response({"error": "start_date and end_date are required"}, status=status.HTTP_400_BAD_REQUEST)
 
         try:
-            account = Account.objects.get(user=user)
-        except Account.DoesNotExist:
-            logger.error(f"Account not found for user {user.email}")
-            return Response({"error": "No account found for the authenticated user."}, status=status.HTTP_404_NOT_FOUND)
+            start_date, end_date = parse_period(start_date, end_date)
+        except ValueError:
+            return Response({"error": "Invalid date range. Use YYYY-MM-DD with end_date on or after start_date."}, status=status.HTTP_400_BAD_REQUEST)
 
-        transactions = Transaction.objects.filter(
-            account=account,
-            date__range=[start_date, end_date]
-        ).order_by("-date")
-
-        html_string = render_to_string("statement/statement.html", {
-            "account": account,
-            "transactions": transactions,
-            "start_date": start_date,
-            "end_date": end_date
-        })
-
-        pdf = HTML(string=html_string).write_pdf()
-
-        filename = f"{account.user.get_full_name().replace(' ', '_')}_statement.pdf"
-        response = HttpResponse(pdf, content_type="application/pdf")
-        response["Content-Disposition"] = f'attachment; filename="{filename}"'
-
-        # Send email with the statement
-        subject = "Your Account Statement"
-        # message = "Please find attached your account statement."
-        # recipient_list = [account.user.email]
-        send_statement_email(
-            user_email=account.user.email,
-            subject=subject,
-            html_content=html_string,
-            pdf_bytes=pdf
-        )
-        logger.info(f"Account statement emailed to {account.user.email} for the period {start_date} to {end_date}")
-        log_audit(
-            user=user,
-            action="EMAIL_STATEMENT",
-            details=f"Account statement emailed to {account.user.email} for the period {start_date} to {end_date}"
-        )
+        return enqueue_statement_job(request, start_date, end_date, "email")
 
-        return response
 
+class AccountStatementDownloadView(APIView):
+    """
+    Queues a statement PDF (the last 30 days by default). Poll the returned
+    job and fetch the file from its download_url once it is completed.
+    """
+    permission_classes = [IsAuthenticated]
+    throttle_classes = [UserRateThrottle]
+
+    def get(self, request):
+        start_date = request.query_params.get('start_date')
+        end_date = request.query_params.get('end_date')
+
+        if not start_date or not end_date:
+            end_date = datetime.date.today()
+            start_date = end_date - datetime.timedelta(days=30)
+        else:
+            try:
+                start_date, end_date = parse_period(start_date, end_date)
+            except ValueError:
+                return Response({"error": "Invalid date range. Use YYYY-MM-DD with end_date on or after start_date."}, status=status.HTTP_400_BAD_REQUEST)
 
-# TODO: configure email sending with brevo
\ No newline at end of file
+        return enqueue_statement_job(request, start_date, end_date, "download")
@@ -1,14 +1,12 @@
 from django.contrib import admin
 from django.utils.timezone import now
-from transactions.models import Transaction, TransactionLimitUpgradeRequest, FlaggedTransaction
+from transactions.models import Transaction, TransactionLimitUpgradeRequest, FlaggedTransaction, LedgerEntry, ReversalJob
 
 @admin.action(description="Reverse selected transactions")
 def reverse_transactions(modeladmin, request, queryset):
-    for transaction in queryset:
-        try:
-            transaction.reverse_transaction()
-        except ValueError as e:
-            modeladmin.message_user(request, f"Failed to reverse transaction {transaction.id}: {str(e)}", level="error")
+    # Queued for process_reversal_jobs; large batches would time out inside the request.
+    job = ReversalJob.enqueue(queryset.values_list("id", flat=True), created_by=request.user)
+    modeladmin.message_user(request, f"Queued reversal job {job.pk} for {job.total} transactions. Track it under Reversal jobs.")
 
 class TransactionAdmin(admin.ModelAdmin):
     list_display = ("id", "user", "transaction_type", "transaction_flow", "status", "amount", "date")
@@ -68,4 +66,33 @@ class FlaggedTransactionAdmin(admin.ModelAdmin):
             obj.reviewed = True
             obj.reviewed_by = request.user
             obj.reviewed_at = now()
-            obj.save()
\ No newline at end of file
+            obj.save()
+
+
+@admin.register(LedgerEntry)
+class LedgerEntryAdmin(admin.ModelAdmin):
+    list_display = ["posting_id", "transaction", "account", "entry_type", "amount", "created_at"]
+    list_filter = ["entry_type"]
+
+    def has_change_permission(self, request, obj=None):
+        return False  # Ledger lines are append-only
+
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(ReversalJob)
+class ReversalJobAdmin(admin.ModelAdmin):
+    list_display = ["id", "status", "progress_display", "reversed_count", "failed_count", "created_by", "created_at", "finished_at"]
+    list_filter = ["status"]
+    readonly_fields = [
+        "created_by", "transaction_ids", "status", "total", "processed", "reversed_count", "failed_count",
+        "errors", "created_at", "started_at", "finished_at",
+    ]
+
+    @admin.display(description="Progress")
+    def progress_display(self, obj):
+        return f"{obj.processed}/{obj.total} ({obj.progress}%)"
+
+    def has_add_permission(self, request):
+        return False
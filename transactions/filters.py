@@ -1,34 +1,73 @@
+import datetime
 import django_filters
-from transactions.models import Transaction
+from transactions.models import AccountMonthlySummary, Transaction
 from transactions.choices import Status, TransactionType
-from django.db.models import Sum
+from django.db.models import Q, Sum
+from transactions.ledger import start_of
 
 
 class TransactionFilter(django_filters.FilterSet):
     status = django_filters.ChoiceFilter(field_name="status", choices=Status.choices)
     transaction_type = django_filters.ChoiceFilter(field_name="transaction_type", choices=TransactionType.choices)
-    year = django_filters.NumberFilter(method='filter_by_year')  
-    month = django_filters.NumberFilter(method='filter_by_month') 
+    # Bounded so the year/month ranges below are always valid dates.
+    year = django_filters.NumberFilter(method='filter_by_year', min_value=datetime.MINYEAR, max_value=datetime.MAXYEAR - 1)
+    month = django_filters.NumberFilter(method='filter_by_month', min_value=1, max_value=12)
     class Meta:
         model = Transaction
         fields = ['status', 'date', 'transaction_type', 'year', 'month']
 
+    # Half-open ranges on the raw column, so the (user, date) and (account, date)
+    # indexes apply; date__year/date__month would wrap the column in a function.
     def filter_by_year(self, queryset, name, value):
         if value:
-            queryset = queryset.filter(date__year=value)
+            queryset = queryset.filter(
+                date__gte=start_of(datetime.date(int(value), 1, 1)),
+                date__lt=start_of(datetime.date(int(value) + 1, 1, 1)),
+            )
         return queryset
 
     def filter_by_month(self, queryset, name, value):
-        if value:  
-            queryset = queryset.filter(date__month=value)  
-        return queryset
+        if not value:
+            return queryset
+        year = self.form.cleaned_data.get('year')
+        if not year:
+            # A month across every year has no single range.
+            return queryset.filter(date__month=value)
+        month = datetime.date(int(year), int(value), 1)
+        next_month = (month + datetime.timedelta(days=32)).replace(day=1)
+        return queryset.filter(date__gte=start_of(month), date__lt=start_of(next_month))
+
+    def get_summary(self, user):
+        """
+        Successful credits (total_income) and debits (total_expense) of the
+        filtered transactions. Whole-month filters are served from the
+        AccountMonthlySummary rollups; an exact date falls back to a single
+        conditional aggregate over the filtered queryset.
 
-    def get_summary(self): 
-        queryset = self.qs
-        credit = queryset.filter(transaction_flow="credit").aggregate(Sum('amount'))['amount__sum'] or 0
-        debit = queryset.filter(transaction_flow="debit").aggregate(Sum('amount'))['amount__sum'] or 0 
+        Like `qs`, it reads only validated values, so the year and month are
+        within the fields' bounds and invalid parameters are ignored.
+        """
+        self.errors  # Ensure form validation before reading cleaned_data
+        data = self.form.cleaned_data
+        if data.get('date'):
+            return self.qs.aggregate(
+                total_income=Sum('amount', filter=Q(status='success', transaction_flow='credit')),
+                total_expense=Sum('amount', filter=Q(status='success', transaction_flow='debit')),
+            )
 
-        return {  
-            'In': credit,  
-            'Out': debit
-        }  
\ No newline at end of file
+        rollups = AccountMonthlySummary.objects.filter(account__user=user, status='success')
+        if data.get('status'):
+            rollups = rollups.filter(status=data['status'])
+        if data.get('transaction_type'):
+            rollups = rollups.filter(transaction_type=data['transaction_type'])
+        year, month = data.get('year'), data.get('month')
+        if year and month:
+            rollups = rollups.filter(month=datetime.date(int(year), int(month), 1))
+        elif year:
+            rollups = rollups.filter(month__gte=datetime.date(int(year), 1, 1), month__lte=datetime.date(int(year), 12, 1))
+        elif month:
+            rollups = rollups.filter(month__month=int(month))
+        return rollups.aggregate(
+            total_income=Sum('amount', filter=Q(transaction_flow='credit')),
+            total_expense=Sum('amount', filter=Q(transaction_flow='debit')),
+        )
@@ -0,0 +1,244 @@
+import math
+import time
+import logging
+import numpy as np
+import pandas as pd
+from django.conf import settings
+
+logger = logging.getLogger("transactions")
+
+_registry = {}
+
+
+class FraudRule:
+    """
+    Base class for fraud rules.
+
+    A rule declares the feature names it reads in `inputs` and returns a score
+    expressed as a fraction of its limit: a score above 1.0 means the
+    transaction should be flagged with `reason`.
+    `score` evaluates one transaction (a dict of features) on the posting path;
+    `score_batch` evaluates a pandas DataFrame with one row per transaction and
+    should be vectorised. The default batch implementation falls back to
+    calling `score` row by row.
+    """
+    name = None
+    inputs = ()
+    reason = None
+    latency_budget_ms = None
+
+    def score(self, features):
+        raise NotImplementedError
+
+    def score_batch(self, frame):
+        return frame.apply(lambda row: self.score(row), axis=1).astype(float)
+
+    def get_latency_budget_ms(self):
+        return self.latency_budget_ms or settings.FRAUD_RULE_LATENCY_BUDGET_MS
+
+    def evaluate(self, features):
+        """Return (score, reason); reason is None unless the rule fires."""
+        score = float(self.score(features))
+        return score, (self.reason if score > 1.0 else None)
+
+
+def register_rule(rule_class):
+    """Class decorator adding a rule to the registry, keyed by its name."""
+    if not rule_class.name:
+        raise ValueError(f"{rule_class.__name__} must define a name")
+    _registry[rule_class.name] = rule_class()
+    return rule_class
+
+
+def get_rules(names=None):
+    """Registered rules in registration order, optionally restricted to `names`."""
+    if names is None:
+        return list(_registry.values())
+    unknown = set(names) - set(_registry)
+    if unknown:
+        raise ValueError(f"Unknown fraud rules: {', '.join(sorted(unknown))}")
+    return [rule for name, rule in _registry.items() if name in names]
+
+
+@register_rule
+class MaxSingleTransferRule(FraudRule):
+    name = "max_single_transfer"
+    inputs = ("transaction_type", "amount", "max_single_transfer_amount")
+    reason = "Transaction exceeds maximum single transfer limit."
+
+    def score(self, features):
+        if features["transaction_type"] != "transfer" or not features["max_single_transfer_amount"]:
+            return 0.0
+        return float(features["amount"]) / float(features["max_single_transfer_amount"])
+
+    def score_batch(self, frame):
+        limits = frame["max_single_transfer_amount"].astype(float)
+        scores = frame["amount"].astype(float) / limits.where(limits > 0)
+        return scores.where(frame["transaction_type"] == "transfer", 0.0).fillna(0.0)
+
+
+@register_rule
+class BehaviourRule(FraudRule):
+    """
+    Scores the amount against the account's running statistics: z-score over
+    the configured threshold once there are enough samples, otherwise the
+    amount relative to ten times the running mean.
+    """
+    name = "behaviour"
+    inputs = ("amount", "stats_count", "stats_mean", "stats_m2")
+    reason = "Unusual transaction pattern detected."
+
+    def score(self, features):
+        config = settings.FRAUD_BEHAVIOUR
+        count, mean, m2 = features["stats_count"], features["stats_mean"], features["stats_m2"]
+        amount = float(features["amount"])
+        if not count:
+            return 0.0
+        std = math.sqrt(m2 / (count - 1)) if count > 1 else 0.0
+        if count >= config["MIN_SAMPLES"] and std:
+            return max((amount - mean) / std, 0.0) / config["Z_SCORE_THRESHOLD"]
+        if not mean:
+            return 0.0
+        return amount / (mean * 10)
+
+    def score_batch(self, frame):
+        config = settings.FRAUD_BEHAVIOUR
+        count = frame["stats_count"].astype(float).to_numpy()
+        mean = frame["stats_mean"].astype(float).to_numpy()
+        m2 = frame["stats_m2"].astype(float).to_numpy()
+        amount = frame["amount"].astype(float).to_numpy()
+        with np.errstate(divide="ignore", invalid="ignore"):
+            std = np.where(count > 1, np.sqrt(m2 / (count - 1)), 0.0)
+            z_scores = np.clip((amount - mean) / std, 0.0, None) / config["Z_SCORE_THRESHOLD"]
+            ratio = amount / (mean * 10)
+        scores = np.where((count >= config["MIN_SAMPLES"]) & (std > 0), z_scores, np.where(mean > 0, ratio, 0.0))
+        scores = np.where(count > 0, scores, 0.0)
+        return pd.Series(np.nan_to_num(scores), index=frame.index)
+
+
+@register_rule
+class VelocityRule(FraudRule):
+    """
+    Scores the transfers in the account type's sliding window, including this
+    one, against the window's count and amount limits; the higher ratio wins.
+    Only transfers carry velocity features.
+    """
+    name = "velocity"
+    inputs = ("velocity_count", "velocity_amount", "velocity_max_transfers", "velocity_max_amount")
+    reason = "Too many transfers in a short period."
+
+    def score(self, features):
+        if "velocity_count" not in features:
+            return 0.0
+        scores = [0.0]
+        if features["velocity_max_transfers"]:
+            scores.append((features["velocity_count"] + 1) / features["velocity_max_transfers"])
+        if features["velocity_max_amount"]:
+            amount = float(features["velocity_amount"]) + float(features["amount"])
+            scores.append(amount / float(features["velocity_max_amount"]))
+        return max(scores)
+
+    def score_batch(self, frame):
+        max_transfers = frame["velocity_max_transfers"].astype(float)
+        max_amount = frame["velocity_max_amount"].astype(float)
+        count_scores = (frame["velocity_count"].astype(float) + 1) / max_transfers.where(max_transfers > 0)
+        amount_scores = (
+            (frame["velocity_amount"].astype(float) + frame["amount"].astype(float))
+            / max_amount.where(max_amount > 0)
+        )
+        return pd.concat([count_scores, amount_scores], axis=1).max(axis=1).fillna(0.0)
+
+
+@register_rule
+class NewRecipientBurstRule(FraudRule):
+    """Scores first-time recipients in the sliding window, including this one, against the limit."""
+    name = "new_recipient_burst"
+    inputs = ("is_new_recipient", "velocity_new_recipients", "velocity_max_new_recipients")
+    reason = "Too many transfers to new recipients in a short period."
+
+    def score(self, features):
+        if not features.get("is_new_recipient") or not features["velocity_max_new_recipients"]:
+            return 0.0
+        return (features["velocity_new_recipients"] + 1) / features["velocity_max_new_recipients"]
+
+    def score_batch(self, frame):
+        limits = frame["velocity_max_new_recipients"].astype(float)
+        scores = (frame["velocity_new_recipients"].astype(float) + 1) / limits.where(limits > 0)
+        return scores.where(frame["is_new_recipient"].astype(bool), 0.0).fillna(0.0)
+
+
+def evaluate_rules(features, rules=None):
+    """
+    Run rules online against one transaction's features, in registration order.
+    Returns (reason, results) where reason is the first firing rule's reason
+    (or None) and results maps rule name -> (score, elapsed_ms). Rules over
+    their latency budget are logged.
+    """
+    results = {}
+    for rule in rules or get_rules():
+        started = time.perf_counter()
+        score, reason = rule.evaluate(features)
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        results[rule.name] = (score, elapsed_ms)
+        if elapsed_ms > rule.get_latency_budget_ms():
+            logger.warning(f"Fraud rule {rule.name} took {elapsed_ms:.2f}ms (budget {rule.get_latency_budget_ms()}ms)")
+        if reason:
+            return reason, results
+    return None, results
+
+
+def score_frame(frame, rules=None):
+    """
+    Score many transactions at once. Adds a `<rule>_score` column per rule, an
+    overall `score` (the maximum) and `reasons` (the reasons of every firing
+    rule, joined with "; "). Rules whose inputs are missing from the frame are
+    skipped. Returns (scored_frame, runtimes) with per-rule runtimes in seconds.
+    """
+    scored = frame.copy()
+    runtimes = {}
+    reasons = pd.Series([""] * len(frame), index=frame.index, dtype=object)
+    score_columns = []
+    for rule in rules or get_rules():
+        missing = [name for name in rule.inputs if name not in frame.columns]
+        if missing:
+            logger.info(f"Skipping fraud rule {rule.name} in batch mode, missing inputs: {', '.join(missing)}")
+            continue
+        started = time.perf_counter()
+        scores = rule.score_batch(frame) if len(frame) else pd.Series([], dtype=float)
+        runtimes[rule.name] = time.perf_counter() - started
+        column = f"{rule.name}_score"
+        scored[column] = scores
+        score_columns.append(column)
+        fired = scores > 1.0
+        reasons[fired] = reasons[fired].where(reasons[fired] == "", reasons[fired] + "; ") + rule.reason
+    scored["score"] = scored[score_columns].max(axis=1) if score_columns else 0.0
+    scored["reasons"] = reasons
+    return scored, runtimes
+
+
+def build_feature_frame(queryset):
+    """
+    Load transactions into a feature frame for batch scoring, joined with the
+    account's current limits and running statistics.
+    """
+    from transactions.models import AccountStatistics  # Import here to avoid circular dependency
+
+    rows = queryset.values(
+        "id", "account_id", "date", "transaction_type", "transaction_flow", "status", "amount",
+        "account__max_single_transfer_amount",
+    )
+    frame = pd.DataFrame.from_records(list(rows))
+    if frame.empty:
+        return frame
+    frame = frame.rename(columns={"account__max_single_transfer_amount": "max_single_transfer_amount"})
+    frame["amount"] = frame["amount"].astype(float)
+    frame["max_single_transfer_amount"] = frame["max_single_transfer_amount"].astype(float)
+
+    stats = pd.DataFrame.from_records(list(
+        AccountStatistics.objects.filter(account_id__in=frame["account_id"].unique())
+        .values("account_id", "count", "mean", "m2")
+    ), columns=["account_id", "count", "mean", "m2"])
+    stats = stats.rename(columns={"count": "stats_count", "mean": "stats_mean", "m2": "stats_m2"})
+    frame = frame.merge(stats, on="account_id", how="left")
+    frame[["stats_count", "stats_mean", "stats_m2"]] = frame[["stats_count", "stats_mean", "stats_m2"]].fillna(0)
+    return frame
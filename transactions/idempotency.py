@@ -0,0 +1,104 @@
+from datetime import timedelta
+from functools import wraps
+import hashlib
+import json
+import logging
+from django.conf import settings
+from django.core.cache import cache
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import IntegrityError, transaction
+from django.utils.timezone import now
+from rest_framework import status
+from rest_framework.response import Response
+from transactions.models import IdempotencyKey
+
+logger = logging.getLogger("transactions")
+
+IDEMPOTENCY_HEADER = "Idempotency-Key"
+
+
+def _cache_key(user_id, endpoint, key):
+    digest = hashlib.sha256(key.encode()).hexdigest()
+    return f"idempotency_{user_id}_{endpoint}_{digest}"
+
+
+def _request_hash(request):
+    payload = json.dumps(request.data, sort_keys=True, cls=DjangoJSONEncoder)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def _replay(stored, request_hash):
+    if stored["request_hash"] != request_hash:
+        return Response(
+            {"error": "Idempotency-Key was already used with a different request body"},
+            status=status.HTTP_422_UNPROCESSABLE_ENTITY
+        )
+    return Response(stored["body"], status=stored["status"], headers={"Idempotent-Replayed": "true"})
+
+
+def idempotent(view_method):
+    """
+    Honour the `Idempotency-Key` header on an APIView `post` handler.
+
+    The first response for a (user, endpoint, key) is stored in the cache and
+    in `IdempotencyKey` for durability; retries are answered from the cache
+    (falling back to the table) without running the handler again. A retry
+    that arrives while the first request is still running gets a 409, and
+    responses with a 5xx status are not stored so the client can retry.
+    Requests without the header are passed through untouched.
+    """
+    @wraps(view_method)
+    def wrapper(self, request, *args, **kwargs):
+        key = request.headers.get(IDEMPOTENCY_HEADER)
+        if not key:
+            return view_method(self, request, *args, **kwargs)
+        if len(key) > 255:
+            return Response({"error": "Idempotency-Key must be at most 255 characters"}, status=status.HTTP_400_BAD_REQUEST)
+
+        endpoint = type(self).__name__
+        ttl = settings.IDEMPOTENCY_KEY_TTL
+        cache_key = _cache_key(request.user.pk, endpoint, key)
+        request_hash = _request_hash(request)
+
+        stored = cache.get(cache_key)
+        if stored:
+            return _replay(stored, request_hash)
+
+        lookup = {"user": request.user, "endpoint": endpoint, "key": key}
+        IdempotencyKey.objects.filter(**lookup, expires_at__lte=now()).delete()
+        try:
+            with transaction.atomic():
+                record = IdempotencyKey.objects.create(
+                    **lookup,
+                    request_hash=request_hash,
+                    expires_at=now() + timedelta(seconds=ttl),
+                )
+        except IntegrityError:
+            record = IdempotencyKey.objects.filter(**lookup).first()
+            if record is None or not record.is_completed():
+                logger.warning(f"Concurrent request for idempotency key {key} on {endpoint}")
+                return Response(
+                    {"error": "A request with this Idempotency-Key is already in progress"},
+                    status=status.HTTP_409_CONFLICT
+                )
+            stored = {"request_hash": record.request_hash, "status": record.response_status, "body": record.response_body}
+            cache.set(cache_key, stored, max((record.expires_at - now()).total_seconds(), 1))
+            return _replay(stored, request_hash)
+
+        try:
+            response = view_method(self, request, *args, **kwargs)
+        except Exception:
+            record.delete()
+            raise
+        if response.status_code >= 500:
+            record.delete()
+            return response
+
+        body = json.loads(json.dumps(response.data, cls=DjangoJSONEncoder))
+        record.response_status = response.status_code
+        record.response_body = body
+        record.save(update_fields=["response_status", "response_body"])
+        cache.set(cache_key, {"request_hash": request_hash, "status": response.status_code, "body": body}, ttl)
+        return response
+
+    return wrapper
@@ -0,0 +1,138 @@
+import datetime
+from decimal import Decimal
+from django.db import transaction
+from django.db.models import Case, DecimalField, F, OuterRef, Q, Subquery, Sum, When
+from django.utils import timezone
+from accounts.models import Account
+from transactions.models import BalanceCheckpoint, LedgerEntry
+
+# Signed amount of a ledger line from the account holder's point of view.
+SIGNED_AMOUNT = Case(
+    When(entry_type="credit", then=F("amount")),
+    default=-F("amount"),
+    output_field=DecimalField(max_digits=15, decimal_places=2),
+)
+
+
+def start_of(date):
+    return timezone.make_aware(datetime.datetime.combine(date, datetime.time.min))
+
+
+def purge_ledger(users):
+    """
+    Delete the ledger lines that stop `users` (a User queryset) from being
+    deleted: lines on their accounts and lines of their transactions.
+
+    Ledger lines are never deleted otherwise. LedgerEntry protects its
+    accounts and transactions, so a customer with postings cannot be deleted
+    and must be deactivated instead. This is only for throwaway data such as
+    benchmark accounts, whose counterparties are throwaway too.
+    """
+    return LedgerEntry.objects.filter(
+        Q(account__user__in=users) | Q(transaction__user__in=users) | Q(transaction__account__user__in=users)
+    ).delete()
+
+
+def net_movements(entries):
+    """Sum of signed ledger amounts per account for the given entry queryset."""
+    return dict(
+        entries.filter(account__isnull=False)
+        .values("account_id")
+        .annotate(total=Sum(SIGNED_AMOUNT))
+        .order_by()
+        .values_list("account_id", "total")
+    )
+
+
+def balance_at(account_id, at):
+    """
+    Balance of an account at the instant `at`: the latest checkpoint closing
+    before that day plus the ledger lines posted since. Accounts without a
+    checkpoint are derived backwards from the current balance.
+    """
+    checkpoint = (
+        BalanceCheckpoint.objects.filter(account_id=account_id, as_of__lt=timezone.localdate(at))
+        .order_by("-as_of")
+        .first()
+    )
+    entries = LedgerEntry.objects.filter(account_id=account_id)
+    if checkpoint:
+        since = start_of(checkpoint.as_of + datetime.timedelta(days=1))
+        total = entries.filter(created_at__gte=since, created_at__lt=at).aggregate(total=Sum(SIGNED_AMOUNT))["total"]
+        return checkpoint.balance + (total or Decimal(0))
+
+    with transaction.atomic():
+        balance = Account.objects.filter(pk=account_id).values_list("balance", flat=True).get()
+        total = entries.filter(created_at__gte=at).aggregate(total=Sum(SIGNED_AMOUNT))["total"]
+    return balance - (total or Decimal(0))
+
+
+def balances_at(account_ids, at):
+    """
+    `balance_at` for many accounts with a fixed number of queries: one for
+    the latest checkpoints, then one ledger aggregate per distinct checkpoint
+    date (usually one) and one for the accounts without a checkpoint.
+    """
+    latest = BalanceCheckpoint.objects.filter(
+        account_id=OuterRef("pk"), as_of__lt=timezone.localdate(at)
+    ).order_by("-as_of")
+    rows = Account.objects.filter(pk__in=account_ids).annotate(
+        checkpoint_as_of=Subquery(latest.values("as_of")[:1]),
+        checkpoint_balance=Subquery(latest.values("balance")[:1]),
+    ).values_list("pk", "balance", "checkpoint_as_of", "checkpoint_balance")
+
+    balances, by_checkpoint, uncheckpointed = {}, {}, {}
+    for account_id, balance, as_of, checkpoint_balance in rows:
+        if as_of is None:
+            uncheckpointed[account_id] = balance
+        else:
+            balances[account_id] = checkpoint_balance
+            by_checkpoint.setdefault(as_of, []).append(account_id)
+
+    for as_of, ids in by_checkpoint.items():
+        since = start_of(as_of + datetime.timedelta(days=1))
+        movements = net_movements(LedgerEntry.objects.filter(account_id__in=ids, created_at__gte=since, created_at__lt=at))
+        for account_id in ids:
+            balances[account_id] += movements.get(account_id, Decimal(0))
+    if uncheckpointed:
+        movements = net_movements(LedgerEntry.objects.filter(account_id__in=uncheckpointed, created_at__gte=at))
+        for account_id, balance in uncheckpointed.items():
+            balances[account_id] = balance - movements.get(account_id, Decimal(0))
+    return balances
+
+
+def create_balance_checkpoints(as_of, batch_size=5000):
+    """
+    Write every account's closing balance for the business date `as_of`,
+    replacing any existing checkpoints for that date. Accounts with a
+    checkpoint for the previous day roll it forward by that day's ledger
+    lines; the others are seeded from the current balance minus the lines
+    posted after `as_of`. Returns the number of checkpoints written.
+    """
+    day_start = start_of(as_of)
+    day_end = start_of(as_of + datetime.timedelta(days=1))
+
+    with transaction.atomic():
+        previous = dict(
+            BalanceCheckpoint.objects.filter(as_of=as_of - datetime.timedelta(days=1))
+            .values_list("account_id", "balance")
+        )
+        day_movements = net_movements(LedgerEntry.objects.filter(created_at__gte=day_start, created_at__lt=day_end))
+        later_movements = net_movements(LedgerEntry.objects.filter(created_at__gte=day_end))
+
+        BalanceCheckpoint.objects.filter(as_of=as_of).delete()
+        created = 0
+        batch = []
+        for account_id, balance in Account.objects.values_list("pk", "balance").iterator():
+            if account_id in previous:
+                closing = previous[account_id] + day_movements.get(account_id, Decimal(0))
+            else:
+                closing = balance - later_movements.get(account_id, Decimal(0))
+            batch.append(BalanceCheckpoint(account_id=account_id, as_of=as_of, balance=closing))
+            if len(batch) >= batch_size:
+                BalanceCheckpoint.objects.bulk_create(batch)
+                created += len(batch)
+                batch = []
+        BalanceCheckpoint.objects.bulk_create(batch)
+        created += len(batch)
+    return created
@@ -0,0 +1,123 @@
+import multiprocessing
+import time
+from decimal import Decimal
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.db.models import Sum
+from accounts.models import Account, AccountType, User
+from transactions.ledger import purge_ledger
+from transactions.models import Transaction
+
+
+def _run_worker(pairs, transfers, amount, results):
+    """Post `transfers` transfers back and forth across each of the worker's account pairs."""
+    connections.close_all()
+    succeeded = failed = 0
+    for _ in range(transfers):
+        for sender_id, recipient_id in pairs:
+            sender = Account.objects.select_related("account_type", "user").get(pk=sender_id)
+            recipient = Account.objects.select_related("user").get(pk=recipient_id)
+            txn = Transaction.objects.create(
+                user=sender.user,
+                account=sender,
+                recipient_account=recipient,
+                amount=amount,
+                transaction_type="transfer",
+                status="pending",
+            )
+            try:
+                txn.process_transaction()
+                succeeded += txn.status == "success"
+            except Exception:
+                failed += 1
+        pairs = [(recipient_id, sender_id) for sender_id, recipient_id in pairs]
+    connections.close_all()
+    results.put((succeeded, failed))
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark concurrent transfers across worker processes. Each worker owns a disjoint "
+        "set of account pairs, so throughput should scale with the worker count. Run it against "
+        "the production database engine (MySQL); SQLite serialises all writers."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--workers", default="1,2,4,8", help="Comma separated worker counts to benchmark")
+        parser.add_argument("--pairs-per-worker", type=int, default=4)
+        parser.add_argument("--transfers", type=int, default=50, help="Transfers per account pair per run")
+        parser.add_argument("--amount", default="1.00")
+        parser.add_argument("--phone-prefix", default="099", help="Phone prefix reserved for benchmark users")
+        parser.add_argument("--keep", action="store_true", help="Keep the benchmark accounts afterwards")
+
+    def handle(self, *args, **options):
+        worker_counts = [int(count) for count in options["workers"].split(",")]
+        pairs_per_worker = options["pairs_per_worker"]
+        amount = Decimal(options["amount"])
+        prefix = options["phone_prefix"]
+        if len(prefix) != 3 or not prefix.startswith("0"):
+            raise CommandError("--phone-prefix must be three digits starting with 0")
+
+        self.delete_accounts(prefix)  # Left over by an interrupted or --keep run
+        accounts = self.create_accounts(prefix, max(worker_counts) * pairs_per_worker * 2)
+        try:
+            for workers in worker_counts:
+                self.run(accounts, workers, pairs_per_worker, options["transfers"], amount)
+        finally:
+            if not options["keep"]:
+                self.delete_accounts(prefix)
+
+    def delete_accounts(self, prefix):
+        users = User.objects.filter(phone_number__startswith=prefix, email__endswith="@bench.local")
+        purge_ledger(users)  # Ledger lines protect their accounts
+        users.delete()
+
+    def create_accounts(self, prefix, count):
+        account_type, _ = AccountType.objects.get_or_create(name="Savings")
+        accounts = []
+        for index in range(count):
+            user = User.objects.create_user(
+                email=f"bench{index}@bench.local",
+                password=None,
+                phone_number=f"{prefix}{index:08d}",
+            )
+            accounts.append(Account.objects.create(
+                user=user,
+                account_type=account_type,
+                balance=Decimal("1000000.00"),
+                daily_transfer_limit=Decimal("1000000000.00"),
+            ))
+        return [account.pk for account in accounts]
+
+    def run(self, account_ids, workers, pairs_per_worker, transfers, amount):
+        queryset = Account.objects.filter(pk__in=account_ids)
+        balance_before = queryset.aggregate(total=Sum("balance"))["total"]
+
+        pairs = list(zip(account_ids[0::2], account_ids[1::2]))
+        ctx = multiprocessing.get_context("fork")
+        results = ctx.Queue()
+        connections.close_all()
+        processes = [
+            ctx.Process(
+                target=_run_worker,
+                args=(pairs[index * pairs_per_worker:(index + 1) * pairs_per_worker], transfers, amount, results),
+            )
+            for index in range(workers)
+        ]
+        started = time.perf_counter()
+        for process in processes:
+            process.start()
+        outcomes = [results.get() for _ in processes]
+        for process in processes:
+            process.join()
+        elapsed = time.perf_counter() - started
+
+        succeeded = sum(outcome[0] for outcome in outcomes)
+        failed = sum(outcome[1] for outcome in outcomes)
+        drift = queryset.aggregate(total=Sum("balance"))["total"] - balance_before
+        self.stdout.write(
+            f"workers={workers} transfers={succeeded} failed={failed} "
+            f"elapsed={elapsed:.2f}s throughput={succeeded / elapsed:.1f}/s balance_drift={drift}"
+        )
+        if drift:
+            raise CommandError(f"Balance drift detected: {drift}")
@@ -0,0 +1,30 @@
+import datetime
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from transactions.ledger import create_balance_checkpoints
+
+
+class Command(BaseCommand):
+    help = "Write per-account closing balance checkpoints from the ledger. Run daily after midnight."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--date", help="Business date to checkpoint (YYYY-MM-DD). Defaults to yesterday.")
+        parser.add_argument("--days", type=int, default=1, help="Number of consecutive dates ending at --date.")
+        parser.add_argument("--batch-size", type=int, default=5000)
+
+    def handle(self, *args, **options):
+        try:
+            end_date = (
+                datetime.datetime.strptime(options["date"], "%Y-%m-%d").date() if options["date"]
+                else timezone.localdate() - datetime.timedelta(days=1)
+            )
+        except ValueError:
+            raise CommandError("Invalid date format. Use YYYY-MM-DD.")
+        if end_date >= timezone.localdate():
+            raise CommandError("Only past business dates can be checkpointed.")
+
+        # Oldest first, so each date rolls forward from the one before it.
+        for offset in reversed(range(options["days"])):
+            as_of = end_date - datetime.timedelta(days=offset)
+            created = create_balance_checkpoints(as_of, batch_size=options["batch_size"])
+            self.stdout.write(self.style.SUCCESS(f"Checkpointed {created} accounts as of {as_of}."))
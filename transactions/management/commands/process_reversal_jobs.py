@@ -0,0 +1,38 @@
+import time
+from django.core.management.base import BaseCommand
+from transactions.models import ReversalJob
+from transactions.reversal import run_reversal_job
+
+
+class Command(BaseCommand):
+    help = "Run queued bulk reversal jobs"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--loop", action="store_true", help="Keep polling for new jobs instead of exiting when the queue is empty.")
+        parser.add_argument("--interval", type=float, default=5.0, help="Seconds between polls with --loop.")
+        parser.add_argument("--chunk-size", type=int, help="Transactions reversed per atomic block.")
+        parser.add_argument(
+            "--requeue-running", action="store_true",
+            help="Requeue jobs left running by a stopped worker; they resume after their last committed chunk.",
+        )
+
+    def handle(self, *args, **options):
+        if options["requeue_running"]:
+            requeued = ReversalJob.objects.filter(status="running").update(status="pending")
+            self.stdout.write(f"Requeued {requeued} running jobs.")
+
+        while True:
+            job = ReversalJob.objects.filter(status="pending").order_by("created_at").first()
+            if job is None:
+                if not options["loop"]:
+                    break
+                time.sleep(options["interval"])
+                continue
+            try:
+                if run_reversal_job(job, chunk_size=options["chunk_size"]):
+                    job.refresh_from_db()
+                    self.stdout.write(self.style.SUCCESS(
+                        f"Reversal job {job.pk}: {job.reversed_count} reversed, {job.failed_count} failed."
+                    ))
+            except Exception as e:
+                self.stderr.write(self.style.ERROR(f"Reversal job {job.pk} failed: {e}"))
@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from transactions.models import AccountStatistics, Transaction
+
+
+class Command(BaseCommand):
+    help = "Recompute per-account running statistics from successful transaction history"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--chunk-size", type=int, default=5000)
+
+    def handle(self, *args, **options):
+        statistics = {}
+        rows = (
+            Transaction.objects.filter(status="success")
+            .order_by("date", "id")
+            .values_list("account_id", "amount")
+            .iterator(chunk_size=options["chunk_size"])
+        )
+        for account_id, amount in rows:
+            stats = statistics.get(account_id)
+            if stats is None:
+                stats = statistics[account_id] = AccountStatistics(account_id=account_id)
+            stats.observe(amount)
+
+        with transaction.atomic():
+            AccountStatistics.objects.all().delete()
+            AccountStatistics.objects.bulk_create(statistics.values(), batch_size=options["chunk_size"])
+
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt statistics for {len(statistics)} accounts."))
@@ -0,0 +1,69 @@
+import datetime
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import Count, Sum
+from django.db.models.functions import TruncDate
+from transactions.ledger import start_of
+from transactions.models import DailyTransferUsage, Transaction
+
+
+class Command(BaseCommand):
+    help = "Recompute per-account daily transfer usage counters from transaction history"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--start-date", help="First business date to rebuild (YYYY-MM-DD). Defaults to all history.")
+        parser.add_argument("--end-date", help="Last business date to rebuild (YYYY-MM-DD). Defaults to today.")
+        parser.add_argument("--batch-size", type=int, default=5000)
+
+    def handle(self, *args, **options):
+        try:
+            start_date = self.parse_date(options["start_date"])
+            end_date = self.parse_date(options["end_date"])
+        except ValueError:
+            raise CommandError("Invalid date format. Use YYYY-MM-DD.")
+
+        transfers = Transaction.objects.filter(
+            transaction_type="transfer",
+            transaction_flow="debit",
+            status__in=["success", "reversed"],
+            reversal_of__isnull=True,  # Reversal rows are not outgoing transfers
+        )
+        counters = DailyTransferUsage.objects.all()
+        if start_date:
+            transfers = transfers.filter(date__gte=start_of(start_date))
+            counters = counters.filter(business_date__gte=start_date)
+        if end_date:
+            transfers = transfers.filter(date__lt=start_of(end_date + datetime.timedelta(days=1)))
+            counters = counters.filter(business_date__lte=end_date)
+
+        totals = (
+            transfers.annotate(business_date=TruncDate("date"))
+            .values("account_id", "business_date")
+            .annotate(total=Sum("amount"), count=Count("id"))
+            .order_by()
+        )
+
+        created = 0
+        with transaction.atomic():
+            deleted = counters.delete()[0]
+            batch = []
+            for row in totals.iterator():
+                batch.append(DailyTransferUsage(
+                    account_id=row["account_id"],
+                    business_date=row["business_date"],
+                    amount=row["total"],
+                    transfer_count=row["count"],
+                ))
+                if len(batch) >= options["batch_size"]:
+                    DailyTransferUsage.objects.bulk_create(batch)
+                    created += len(batch)
+                    batch = []
+            DailyTransferUsage.objects.bulk_create(batch)
+            created += len(batch)
+
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt daily transfer usage: removed {deleted}, created {created} counters."))
+
+    def parse_date(self, value):
+        if not value:
+            return None
+        return datetime.datetime.strptime(value, "%Y-%m-%d").date()
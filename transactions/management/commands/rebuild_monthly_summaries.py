@@ -0,0 +1,59 @@
+import datetime
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import Count, DateField, Sum
+from django.db.models.functions import TruncMonth
+from transactions.ledger import start_of
+from transactions.models import AccountMonthlySummary, Transaction
+
+
+class Command(BaseCommand):
+    help = "Recompute per-account monthly transaction rollups from transaction history"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--month", help="Only rebuild this month (YYYY-MM). Defaults to all history.")
+        parser.add_argument("--batch-size", type=int, default=5000)
+
+    def handle(self, *args, **options):
+        transactions = Transaction.objects.filter(status__in=["success", "reversed"])
+        rollups = AccountMonthlySummary.objects.all()
+        if options["month"]:
+            try:
+                month = datetime.datetime.strptime(options["month"], "%Y-%m").date()
+            except ValueError:
+                raise CommandError("Invalid month format. Use YYYY-MM.")
+            next_month = (month + datetime.timedelta(days=32)).replace(day=1)
+            transactions = transactions.filter(
+                date__gte=start_of(month), date__lt=start_of(next_month)
+            )
+            rollups = rollups.filter(month=month)
+
+        totals = (
+            transactions.annotate(month=TruncMonth("date", output_field=DateField()))
+            .values("account_id", "month", "transaction_type", "transaction_flow", "status")
+            .annotate(total=Sum("amount"), count=Count("id"))
+            .order_by()
+        )
+
+        created = 0
+        with transaction.atomic():
+            deleted = rollups.delete()[0]
+            batch = []
+            for row in totals.iterator():
+                batch.append(AccountMonthlySummary(
+                    account_id=row["account_id"],
+                    month=row["month"],
+                    transaction_type=row["transaction_type"],
+                    transaction_flow=row["transaction_flow"],
+                    status=row["status"],
+                    amount=row["total"],
+                    count=row["count"],
+                ))
+                if len(batch) >= options["batch_size"]:
+                    AccountMonthlySummary.objects.bulk_create(batch)
+                    created += len(batch)
+                    batch = []
+            AccountMonthlySummary.objects.bulk_create(batch)
+            created += len(batch)
+
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt monthly summaries: removed {deleted}, created {created} rollups."))
@@ -0,0 +1,28 @@
+# Generated by Django 5.1.5 on 2026-10-18 18:16
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0019_auditlog'),
+        ('transactions', '0016_dailytransferusage'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AccountStatistics',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('count', models.PositiveBigIntegerField(default=0)),
+                ('mean', models.FloatField(default=0)),
+                ('m2', models.FloatField(default=0)),
+                ('ewma', models.FloatField(default=0)),
+                ('recent_amounts', models.JSONField(blank=True, default=list)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('account', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='statistics', to='accounts.account')),
+            ],
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.1.5 on 2026-10-18 18:26
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0020_accounttype_velocity_max_amount_and_more'),
+        ('transactions', '0018_balancecheckpoint_ledgerentry'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AccountMonthlySummary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('month', models.DateField()),
+                ('transaction_type', models.CharField(choices=[('deposit', 'Deposit'), ('withdrawal', 'Withdrawal'), ('transfer', 'Transfer')], max_length=10)),
+                ('transaction_flow', models.CharField(choices=[('debit', 'Debit'), ('credit', 'Credit')], max_length=10)),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('success', 'Success'), ('failed', 'Failed'), ('reversed', 'Reversed'), ('flagged', 'Flagged')], max_length=10)),
+                ('amount', models.DecimalField(decimal_places=2, default=0, max_digits=17)),
+                ('count', models.IntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('account', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='monthly_summaries', to='accounts.account')),
+            ],
+            options={
+                'verbose_name_plural': 'account monthly summaries',
+                'constraints': [models.UniqueConstraint(fields=('account', 'month', 'transaction_type', 'transaction_flow', 'status'), name='unique_account_monthly_summary')],
+            },
+        ),
+    ]
@@ -0,0 +1,52 @@
+# Generated by Django 5.1.5 on 2026-10-18 19:20
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def backfill_reversal_rows(apps, schema_editor):
+    """Record earlier reversals as their own rows, dated when the original was last updated (its reversal)."""
+    Transaction = apps.get_model("transactions", "Transaction")
+    reversed_transactions = list(
+        Transaction.objects.filter(status="reversed", reversal_of__isnull=True)
+        .select_related("account", "recipient_account")
+    )
+    for txn in reversed_transactions:
+        if txn.transaction_type == "withdrawal":
+            deltas = {txn.account: txn.amount}
+        elif txn.transaction_type == "deposit":
+            deltas = {txn.account: -txn.amount}
+        elif txn.recipient_account_id:
+            deltas = {txn.recipient_account: -txn.amount, txn.account: txn.amount}
+        else:
+            continue
+        rows = Transaction.objects.bulk_create([
+            Transaction(
+                user_id=account.user_id,
+                account=account,
+                reversal_of=txn,
+                amount=abs(delta),
+                narration=f"Reversal of transaction {txn.pk}",
+                transaction_type=txn.transaction_type,
+                transaction_flow="credit" if delta > 0 else "debit",
+                status="reversed",
+            )
+            for account, delta in deltas.items()
+        ])
+        Transaction.objects.filter(pk__in=[row.pk for row in rows]).update(date=txn.updated_at)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('transactions', '0021_reversaljob'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='transaction',
+            name='reversal_of',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='reversal_entries', to='transactions.transaction'),
+        ),
+        migrations.RunPython(backfill_reversal_rows, migrations.RunPython.noop),
+    ]
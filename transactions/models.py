@@ -1,12 +1,16 @@
 from decimal import Decimal
 from django.db import models, transaction
 from accounts.models import Account, User
-from django.db.models import Sum
-from django.utils.timezone import now
+from django.db.models import F
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils.timezone import localdate, now
 import uuid
 import logging
-from notifications.services import create_notification, send_notification
-from transactions.utils import FraudDetection
+from notifications.outbox import notification_payload, publish, publish_many
+from transactions.utils import FraudDetection, update_running_stats, z_score
+from django.conf import settings
+from transactions.posting import lock_accounts, apply_balance_deltas
+from transactions.velocity import record_transfers
 from .choices import FlaggedStatus, TransactionType, Status, TransactionFlow, UpgradeStatus
 # Create your models here.
 
@@ -27,25 +31,45 @@ class Transaction(models.Model):
     transaction_flow = models.CharField(max_length=10, choices=TransactionFlow.choices, default="debit")
     date = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+    # Set on the rows that record a reversal of this transaction, one per account it moved
+    reversal_of = models.ForeignKey("self", on_delete=models.CASCADE, null=True, blank=True, related_name="reversal_entries")
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["account", "date"], name="transaction_account_date_idx"),
+            models.Index(fields=["user", "date"], name="transaction_user_date_idx"),
+            models.Index(fields=["account", "transaction_type", "date"], name="transaction_acct_type_date_idx"),
+        ]
 
     def __str__(self):
         return f"{self.account.user.phone_number} - {self.transaction_type} - {self.transaction_flow} - {self.status}"
     
     
 
-    def process_transaction(self):
+    def process_transaction(self, audit=None):
+        """
+        Post the transaction. `audit` is an optional AuditLog payload (user_id,
+        action, ip_address, metadata) published to the outbox with the posting.
+        """
         try:
             with transaction.atomic():
                 amount = Decimal(self.amount)
                 account_type = self.account.account_type
 
+                # Lock the sender (and recipient) rows in primary-key order and
+                # work from the locked balances rather than the stale instances.
+                locked = lock_accounts([self.account_id, self.recipient_account_id])
+                self.account.balance = locked[self.account_id].balance
+                if self.recipient_account_id:
+                    self.recipient_account.balance = locked[self.recipient_account_id].balance
+
                 # Run fraud detection
                 fraud_detection = FraudDetection(self)
                 fraud_result = fraud_detection.run_checks()
                 if fraud_result:
                     self.account.flagged = True
                     # self.status = "flagged"
-                    self.account.save()
+                    Account.objects.filter(pk=self.account_id).update(flagged=True)
                     logger.warning(f"Transaction {self.id} flagged: {fraud_result}")
                     # Log the flagged transaction
                     FlaggedTransaction.objects.create(
@@ -55,19 +79,14 @@ class Transaction(models.Model):
                         status="flagged",
                     )
                     # Notify admins
-                    send_notification(
-                        user=self.user,
-                        message=f"Transaction flagged: {fraud_result}",
-                        transaction=self
-                    )
+                    publish("notification", notification_payload(
+                        self.user, self, message=f"Transaction flagged: {fraud_result}"
+                    ))
                     return
                 
                 # Daily transfer limit check
-                today = now().date()
-                daily_total = self.account.transactions.filter(
-                    date__date=today,
-                    transaction_type="transfer"
-                ).aggregate(Sum('amount'))['amount__sum'] or Decimal(0)
+                today = localdate()
+                daily_total = DailyTransferUsage.get_total(self.account_id, today)
 
                 if daily_total + self.amount > self.account.daily_transfer_limit:
                     logger.warning(f"Transaction amount {self.amount} exceeds the daily transfer limit.")
@@ -77,11 +96,11 @@ class Transaction(models.Model):
                 if self.transaction_type == "withdrawal":
                     if not self.account.can_withdraw(amount):
                         raise ValueError("Insufficient balance or below minimum balance.")
-                    self.account.balance -= amount
+                    deltas = {self.account_id: -amount}
                     self.transaction_flow = "debit"
 
                 elif self.transaction_type == "deposit":
-                    self.account.balance += amount
+                    deltas = {self.account_id: amount}
                     self.transaction_flow = "credit"
 
                 elif self.transaction_type == "transfer":
@@ -92,14 +111,19 @@ class Transaction(models.Model):
                         self.save()
                         raise ValueError("Insufficient balance or below minimum balance.")
                     
-                    # Debit the sender's account
-                    self.account.balance -= amount
+                    # Debit the sender's account and credit the recipient's account
+                    deltas = {self.account_id: -amount, self.recipient_account_id: amount}
                     self.transaction_flow = "debit"  
-                    self.account.save()
 
-                    # Credit the recipient's account   
+                apply_balance_deltas(deltas)
+                LedgerEntry.objects.bulk_create(LedgerEntry.build_posting(self, deltas))
+                self.account.balance += deltas[self.account_id]
+
+                if self.transaction_type == "transfer":
                     self.recipient_account.balance += amount
-                    self.recipient_account.save()
+                    DailyTransferUsage.record(self.account_id, today, amount)
+                    transfer = [(self.recipient_account_id, amount)]
+                    transaction.on_commit(lambda: record_transfers(self.account_id, transfer))
 
                     # Log the recipient's transaction
                     reciepient_transaction = Transaction.objects.create(
@@ -110,15 +134,23 @@ class Transaction(models.Model):
                         transaction_flow="credit",
                         status="success",
                     )
-                    
-                # self.account.save()
+
+                AccountStatistics.observe_many({
+                    account_id: [amount] for account_id in deltas
+                })
                 self.status = "success"
                 self.save()
+                AccountMonthlySummary.record(
+                    [self, reciepient_transaction] if self.transaction_type == "transfer" else [self]
+                )
 
-                # Create notification
-                create_notification(self.user, self)
+                # Notifications and the audit record are delivered by the outbox worker
+                notifications = [notification_payload(self.user, self)]
                 if self.transaction_type == "transfer":
-                    create_notification(self.recipient_account.user, reciepient_transaction)
+                    notifications.append(notification_payload(self.recipient_account.user, reciepient_transaction))
+                publish_many("notification", notifications)
+                if audit:
+                    publish("audit", audit)
                 logger.info(f"Transaction {self.id} processed successfully: {self.transaction_type} of {self.amount}")
 
         except Exception as e:
@@ -130,6 +162,29 @@ class Transaction(models.Model):
     def recipient_account_name(self):
         return self.recipient_account.user.get_fullname()
 
+    def build_reversal(self, deltas, account_users):
+        """
+        Unsaved rows recording the reversal of this transaction, one per
+        account in `deltas` (as passed to `apply_balance_deltas`), dated when
+        the reversal is posted. `account_users` maps account pk to its owner.
+        Statements count them like any other posting, so a reversal in a
+        later period appears in that period. They share the original's
+        "reversed" status, which keeps the pair out of success-only totals.
+        """
+        return [
+            Transaction(
+                user_id=account_users[account_id],
+                account_id=account_id,
+                reversal_of=self,
+                amount=abs(delta),
+                narration=f"Reversal of transaction {self.pk}",
+                transaction_type=self.transaction_type,
+                transaction_flow="credit" if delta > 0 else "debit",
+                status="reversed",
+            )
+            for account_id, delta in deltas.items() if delta
+        ]
+
     def reverse_transaction(self):
         if self.status != "success":
             raise ValueError("Only successful transactions can be reversed")
@@ -137,21 +192,31 @@ class Transaction(models.Model):
             with transaction.atomic():
                 amount = Decimal(str(self.amount))  # Defensive conversion
                 if self.transaction_type == "withdrawal":
-                    self.account.balance += amount
-                    self.account.save()
+                    deltas = {self.account_id: amount}
                 elif self.transaction_type == "deposit":
-                    self.account.balance -= amount
-                    self.account.save()
+                    deltas = {self.account_id: -amount}
                 elif self.transaction_type == "transfer":
                     if not self.recipient_account:
                         raise ValueError("Recipient account required for transfer reversal")
-                    self.recipient_account.balance -= amount
-                    self.recipient_account.save()
-                    self.account.balance += amount
-                    self.account.save()
+                    deltas = {self.recipient_account_id: -amount, self.account_id: amount}
 
+                # Accounts first, then the transaction row: the same lock order
+                # as the bulk reversal job. The status is re-read under the lock
+                # so a concurrent reversal cannot apply twice.
+                lock_accounts(deltas.keys())
+                if Transaction.objects.select_for_update().filter(pk=self.pk).values_list("status", flat=True).get() != "success":
+                    raise ValueError("Only successful transactions can be reversed")
+                apply_balance_deltas(deltas)
+                LedgerEntry.objects.bulk_create(LedgerEntry.build_posting(self, deltas))
+
+                AccountMonthlySummary.record([self], sign=-1)
                 self.status = "reversed"
                 self.save()
+                account_users = {self.account_id: self.account.user_id}
+                if self.recipient_account_id:
+                    account_users[self.recipient_account_id] = self.recipient_account.user_id
+                reversal = Transaction.objects.bulk_create(self.build_reversal(deltas, account_users))
+                AccountMonthlySummary.record([self] + reversal)
 
                 # Send transaction notification
                 # send_transaction_notification(self.user, self)
@@ -161,6 +226,226 @@ class Transaction(models.Model):
         
 
 
+class DailyTransferUsage(models.Model):
+    """
+    Running total of an account's outgoing transfers for one business date.
+    Incremented in the same atomic block as the posting, so the daily limit
+    check is a single-row lookup instead of a SUM over the account's history.
+    """
+    account = models.ForeignKey(Account, on_delete=models.CASCADE, related_name="daily_transfer_usage")
+    business_date = models.DateField()
+    amount = models.DecimalField(max_digits=15, decimal_places=2, default=0)
+    transfer_count = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["account", "business_date"], name="unique_daily_transfer_usage"),
+        ]
+
+    def __str__(self):
+        return f"{self.account} - {self.business_date} - {self.amount}"
+
+    @classmethod
+    def get_total(cls, account_id, business_date):
+        usage = cls.objects.filter(account_id=account_id, business_date=business_date).values_list("amount", flat=True).first()
+        return usage or Decimal(0)
+
+    @classmethod
+    def record(cls, account_id, business_date, amount, count=1):
+        """Add `amount` to the counter. The caller must hold the account's row lock."""
+        updated = cls.objects.filter(account_id=account_id, business_date=business_date).update(
+            amount=F("amount") + amount,
+            transfer_count=F("transfer_count") + count,
+            updated_at=now(),
+        )
+        if not updated:
+            cls.objects.create(account_id=account_id, business_date=business_date, amount=amount, transfer_count=count)
+
+
+class AccountStatistics(models.Model):
+    """
+    Running statistics over an account's successful transaction amounts,
+    updated incrementally on every posting so behaviour checks read one row.
+    """
+    account = models.OneToOneField(Account, on_delete=models.CASCADE, related_name="statistics")
+    count = models.PositiveBigIntegerField(default=0)
+    mean = models.FloatField(default=0)
+    m2 = models.FloatField(default=0)  # Sum of squared deviations from the mean
+    ewma = models.FloatField(default=0)
+    recent_amounts = models.JSONField(default=list, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.account} - n={self.count} mean={self.mean:.2f}"
+
+    @property
+    def variance(self):
+        return self.m2 / (self.count - 1) if self.count > 1 else 0.0
+
+    def z_score(self, amount):
+        return z_score(amount, self.count, self.mean, self.m2)
+
+    def observe(self, amount):
+        config = settings.FRAUD_BEHAVIOUR
+        self.count, self.mean, self.m2, self.ewma = update_running_stats(
+            self.count, self.mean, self.m2, self.ewma, amount, config["EWMA_ALPHA"]
+        )
+        self.recent_amounts = (self.recent_amounts + [str(amount)])[-config["WINDOW_SIZE"]:]
+        self.updated_at = now()
+
+    @classmethod
+    def observe_many(cls, amounts_by_account):
+        """
+        Fold posted amounts into each account's statistics with one read and at
+        most one bulk write per table. `amounts_by_account` maps account pk to a
+        list of amounts. The caller must hold the accounts' row locks.
+        """
+        existing = {stats.account_id: stats for stats in cls.objects.filter(account_id__in=amounts_by_account.keys())}
+        created = []
+        for account_id, amounts in amounts_by_account.items():
+            stats = existing.get(account_id)
+            if stats is None:
+                stats = cls(account_id=account_id)
+                created.append(stats)
+            for amount in amounts:
+                stats.observe(amount)
+        if existing:
+            cls.objects.bulk_update(existing.values(), ["count", "mean", "m2", "ewma", "recent_amounts", "updated_at"])
+        if created:
+            cls.objects.bulk_create(created)
+
+
+class LedgerEntry(models.Model):
+    """
+    Append-only double-entry line. Every posting writes balanced debit and
+    credit lines sharing a `posting_id`; a line without an account is the
+    bank's settlement side of a deposit or withdrawal. For a customer
+    account, credits increase the balance and debits decrease it.
+
+    Lines protect their account and transaction: a user or account with
+    postings cannot be deleted and is deactivated instead. Only throwaway
+    data is removed, through `ledger.purge_ledger`.
+    """
+    posting_id = models.UUIDField(db_index=True)
+    transaction = models.ForeignKey(Transaction, on_delete=models.PROTECT, related_name="ledger_entries")
+    account = models.ForeignKey(Account, on_delete=models.PROTECT, null=True, blank=True, related_name="ledger_entries")
+    entry_type = models.CharField(max_length=10, choices=TransactionFlow.choices)
+    amount = models.DecimalField(max_digits=15, decimal_places=2)
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    class Meta:
+        verbose_name_plural = "ledger entries"
+        indexes = [
+            models.Index(fields=["account", "created_at"], name="ledger_account_created_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.account or 'settlement'} - {self.entry_type} - {self.amount}"
+
+    @classmethod
+    def build_posting(cls, source, deltas):
+        """
+        Unsaved lines for one posting of `source` (a Transaction). `deltas` maps
+        account pk to its balance change, as passed to `apply_balance_deltas`;
+        a one-sided posting is balanced against the settlement side.
+        """
+        posting_id = uuid.uuid4()
+        entries = [
+            cls(
+                posting_id=posting_id,
+                transaction=source,
+                account_id=account_id,
+                entry_type="credit" if delta > 0 else "debit",
+                amount=abs(delta),
+            )
+            for account_id, delta in deltas.items() if delta
+        ]
+        imbalance = sum(deltas.values())
+        if imbalance:
+            entries.append(cls(
+                posting_id=posting_id,
+                transaction=source,
+                account_id=None,
+                entry_type="debit" if imbalance > 0 else "credit",
+                amount=abs(imbalance),
+            ))
+        return entries
+
+
+class BalanceCheckpoint(models.Model):
+    """Closing balance of an account at the end of the business date `as_of`."""
+    account = models.ForeignKey(Account, on_delete=models.CASCADE, related_name="balance_checkpoints")
+    as_of = models.DateField()
+    balance = models.DecimalField(max_digits=15, decimal_places=2)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["account", "as_of"], name="unique_balance_checkpoint"),
+        ]
+
+    def __str__(self):
+        return f"{self.account} - {self.as_of} - {self.balance}"
+
+
+class AccountMonthlySummary(models.Model):
+    """
+    Monthly rollup of an account's posted transactions, one row per
+    (month, type, flow, status). Maintained incrementally on posting and
+    reversal so summaries for whole months read a handful of rows instead of
+    scanning the history. Only posted statuses (success, reversed) are kept.
+    """
+    account = models.ForeignKey(Account, on_delete=models.CASCADE, related_name="monthly_summaries")
+    month = models.DateField()  # First day of the month, in the local timezone
+    transaction_type = models.CharField(max_length=10, choices=TransactionType.choices)
+    transaction_flow = models.CharField(max_length=10, choices=TransactionFlow.choices)
+    status = models.CharField(max_length=10, choices=Status.choices)
+    amount = models.DecimalField(max_digits=17, decimal_places=2, default=0)
+    count = models.IntegerField(default=0)  # Signed: reversals of pre-rollup history subtract until rebuilt
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name_plural = "account monthly summaries"
+        constraints = [
+            models.UniqueConstraint(
+                fields=["account", "month", "transaction_type", "transaction_flow", "status"],
+                name="unique_account_monthly_summary",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.account} - {self.month:%Y-%m} - {self.transaction_type} {self.transaction_flow} {self.status}"
+
+    @classmethod
+    def record(cls, transactions, sign=1):
+        """
+        Add (or with `sign=-1`, remove) transactions under their current status.
+        The caller must hold the accounts' row locks.
+        """
+        groups = {}
+        for txn in transactions:
+            key = (
+                txn.account_id, localdate(txn.date).replace(day=1),
+                txn.transaction_type, txn.transaction_flow, txn.status,
+            )
+            amount, count = groups.get(key, (Decimal(0), 0))
+            groups[key] = (amount + Decimal(txn.amount) * sign, count + sign)
+
+        for (account_id, month, transaction_type, transaction_flow, txn_status), (amount, count) in groups.items():
+            lookup = {
+                "account_id": account_id, "month": month, "transaction_type": transaction_type,
+                "transaction_flow": transaction_flow, "status": txn_status,
+            }
+            updated = cls.objects.filter(**lookup).update(
+                amount=F("amount") + amount,
+                count=F("count") + count,
+                updated_at=now(),
+            )
+            if not updated:
+                cls.objects.create(**lookup, amount=amount, count=count)
+
+
 class TransactionLimitUpgradeRequest(models.Model):
     account = models.ForeignKey(Account, on_delete=models.CASCADE, related_name="limits_upgrade_requests")
     requested_daily_transfer_limit = models.DecimalField(max_digits=15, decimal_places=2, null=True, blank=True)
@@ -229,4 +514,68 @@ class FlaggedTransaction(models.Model):
                 
         except Exception as e:
             logger.error(f"Error reviewing flagged transaction {self.transaction.id}: {e}")
-            raise ValueError(f"Flagged transaction review failed: {str(e)}")
\ No newline at end of file
+            raise ValueError(f"Flagged transaction review failed: {str(e)}")
+
+
+class IdempotencyKey(models.Model):
+    """
+    Stored outcome of a request made with an `Idempotency-Key` header. Retries
+    with the same key replay the stored response instead of posting again.
+    """
+    key = models.CharField(max_length=255)
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="idempotency_keys")
+    endpoint = models.CharField(max_length=100)
+    request_hash = models.CharField(max_length=64)
+    response_status = models.PositiveSmallIntegerField(null=True, blank=True)
+    response_body = models.JSONField(encoder=DjangoJSONEncoder, null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    expires_at = models.DateTimeField(db_index=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["user", "endpoint", "key"], name="unique_idempotency_key"),
+        ]
+
+    def __str__(self):
+        return f"{self.endpoint} - {self.key} - {self.response_status}"
+
+    def is_completed(self):
+        return self.response_status is not None
+
+
+class ReversalJob(models.Model):
+    """
+    Background reversal of a batch of transactions, queued from the admin
+    action or the bulk reversal API and run by `process_reversal_jobs`.
+    Progress counters are updated after every chunk.
+    """
+    STATUS_CHOICES = [
+        ("pending", "Pending"),
+        ("running", "Running"),
+        ("completed", "Completed"),
+        ("failed", "Failed"),
+    ]
+
+    created_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name="reversal_jobs")
+    transaction_ids = models.JSONField(default=list)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default="pending", db_index=True)
+    total = models.PositiveIntegerField(default=0)
+    processed = models.PositiveIntegerField(default=0)
+    reversed_count = models.PositiveIntegerField(default=0)
+    failed_count = models.PositiveIntegerField(default=0)
+    errors = models.JSONField(default=list, blank=True)  # [{"transaction_id": ..., "error": ...}]
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"Reversal job {self.pk} - {self.status} - {self.processed}/{self.total}"
+
+    @property
+    def progress(self):
+        return round(self.processed * 100 / self.total, 1) if self.total else 100.0
+
+    @classmethod
+    def enqueue(cls, transaction_ids, created_by=None):
+        transaction_ids = list(dict.fromkeys(str(transaction_id) for transaction_id in transaction_ids))
+        return cls.objects.create(created_by=created_by, transaction_ids=transaction_ids, total=len(transaction_ids))
@@ -1,5 +1,11 @@
-from rest_framework.pagination import PageNumberPagination
+import base64
+import json
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, PageNumberPagination
 from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
 
 class CustomPagination(PageNumberPagination):
     page_size = 10
@@ -32,4 +38,118 @@ class CustomPagination(PageNumberPagination):
             'page_size': self.page_size,
             'page': self.page.number,
             'results': data
-        })
\ No newline at end of file
+        })
+
+class KeysetPagination(BasePagination):
+    """
+    Cursor pagination over a unique ordering such as ("-date", "-id").
+
+    Each page is fetched with a range predicate on the ordering columns
+    (`WHERE (date, id) < (last_date, last_id)`), so its cost does not depend
+    on how deep the client has paged. Cursors are opaque base64 tokens. The
+    total count is only computed when the client asks for it with
+    `?count=true`; otherwise `count` and `page` are null in the envelope.
+    """
+    page_size = CustomPagination.page_size
+    page_size_query_param = CustomPagination.page_size_query_param
+    max_page_size = CustomPagination.max_page_size
+    cursor_query_param = 'cursor'
+    count_query_param = 'count'
+
+    def __init__(self, ordering=("-date", "-id")):
+        self.ordering = ordering
+
+    def encode_cursor(self, instance, reverse):
+        values = [str(getattr(instance, field.lstrip('-'))) for field in self.ordering]
+        token = json.dumps({"v": values, "r": reverse})
+        return base64.urlsafe_b64encode(token.encode()).decode()
+
+    def load_cursor(self, token):
+        try:
+            return json.loads(base64.urlsafe_b64decode(token.encode()))
+        except ValueError:
+            raise NotFound("Invalid cursor.")
+
+    def is_reverse(self, request):
+        """Whether the request pages backwards, i.e. its filter drops rows before the page rather than after it."""
+        token = request.query_params.get(self.cursor_query_param)
+        if not token:
+            return False
+        try:
+            return bool(self.load_cursor(token)["r"])
+        except (KeyError, TypeError):
+            raise NotFound("Invalid cursor.")
+
+    def decode_cursor(self, queryset, token):
+        cursor = self.load_cursor(token)
+        try:
+            values = [
+                queryset.model._meta.get_field(field.lstrip('-')).to_python(value)
+                for field, value in zip(self.ordering, cursor["v"])
+            ]
+            return values, bool(cursor["r"])
+        except (ValueError, KeyError, TypeError, ValidationError):
+            raise NotFound("Invalid cursor.")
+
+    def keyset_filter(self, values, reverse):
+        """Rows strictly after `values` in the ordering (before them when `reverse`)."""
+        condition = Q()
+        for position, field in enumerate(self.ordering):
+            name = field.lstrip('-')
+            descending = field.startswith('-') != reverse
+            step = Q(**{f"{name}__{'lt' if descending else 'gt'}": values[position]})
+            for earlier, value in zip(self.ordering[:position], values):
+                step &= Q(**{earlier.lstrip('-'): value})
+            condition |= step
+        return condition
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_size = min(int(request.query_params.get(self.page_size_query_param, self.page_size)), self.max_page_size)
+        self.count = queryset.count() if request.query_params.get(self.count_query_param) == 'true' else None
+
+        token = request.query_params.get(self.cursor_query_param)
+        reverse = False
+        if token:
+            values, reverse = self.decode_cursor(queryset, token)
+            queryset = queryset.filter(self.keyset_filter(values, reverse))
+        ordering = [field[1:] if field.startswith('-') else f'-{field}' for field in self.ordering] if reverse else self.ordering
+        rows = list(queryset.order_by(*ordering)[:self.page_size + 1])
+        has_more = len(rows) > self.page_size
+        rows = rows[:self.page_size]
+        if reverse:
+            rows.reverse()
+
+        # Moving backwards, "more" rows lie before the page; a cursor always means rows lie on the other side.
+        has_next = bool(token) if reverse else has_more
+        has_previous = has_more if reverse else bool(token)
+        self.next_cursor = self.encode_cursor(rows[-1], False) if rows and has_next else None
+        self.previous_cursor = self.encode_cursor(rows[0], True) if rows and has_previous else None
+        return rows
+
+    def get_link(self, cursor):
+        if cursor is None:
+            return None
+        return replace_query_param(self.request.build_absolute_uri(), self.cursor_query_param, cursor)
+
+    def get_paginated_response(self, data):
+        return Response({
+            'links': {
+                'next': self.get_link(self.next_cursor),
+                'previous': self.get_link(self.previous_cursor)
+            },
+            'count': self.count,
+            'page_size': self.page_size,
+            'page': None,
+            'results': data
+        })
+
+
+def get_paginator(request, ordering=("-date", "-id")):
+    """
+    Pick the paginator for a listing: keyset pagination when the client asks
+    for `?pagination=cursor` (or sends a cursor), page numbers otherwise.
+    """
+    if request.query_params.get('pagination') == 'cursor' or KeysetPagination.cursor_query_param in request.query_params:
+        return KeysetPagination(ordering)
+    return CustomPagination()
@@ -0,0 +1,226 @@
+from collections import defaultdict
+from decimal import Decimal, InvalidOperation
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Case, DecimalField, F, Value, When
+from django.utils.timezone import localdate, now
+from accounts.models import Account
+from notifications.outbox import notification_payload, publish, publish_many
+from transactions.fraud_rules import evaluate_rules
+from transactions.utils import build_features, update_running_stats
+from transactions.velocity import get_velocity, known_recipients, record_transfers
+import logging
+
+logger = logging.getLogger("transactions")
+
+
+def lock_accounts(account_ids):
+    """
+    Lock the given accounts with SELECT ... FOR UPDATE and return them keyed by pk.
+
+    Rows are always locked in ascending primary-key order, so two postings that
+    touch the same pair of accounts in opposite directions queue up behind each
+    other instead of deadlocking. Postings on disjoint accounts never wait on
+    each other. Transaction rows that are locked too (reversals) are locked
+    after their accounts. Must be called inside an atomic block.
+    """
+    account_ids = sorted({account_id for account_id in account_ids if account_id is not None})
+    accounts = Account.objects.select_for_update().filter(pk__in=account_ids).order_by("pk")
+    return {account.pk: account for account in accounts}
+
+
+def apply_balance_deltas(deltas):
+    """
+    Apply signed balance changes as database-side expressions.
+
+    `deltas` maps account pk -> Decimal. All accounts are updated by a single
+    `UPDATE ... SET balance = balance + CASE pk WHEN ... END` statement, so a
+    batch touching many recipients costs one round-trip. Callers must already
+    hold the row locks from `lock_accounts`.
+    """
+    deltas = {account_id: Decimal(delta) for account_id, delta in deltas.items() if delta}
+    if not deltas:
+        return
+    whens = [When(pk=account_id, then=Value(delta)) for account_id, delta in deltas.items()]
+    Account.objects.filter(pk__in=deltas.keys()).update(
+        balance=F("balance") + Case(*whens, output_field=DecimalField(max_digits=15, decimal_places=2)),
+        updated_at=now(),
+    )
+
+
+def _parse_amount(value):
+    try:
+        amount = Decimal(str(value).strip())
+    except (InvalidOperation, TypeError, ValueError):
+        return None
+    if not amount.is_finite() or amount <= 0 or amount != amount.quantize(Decimal("0.01")):
+        return None
+    return amount
+
+
+def post_bulk_transfer(sender_account, lines, chunk_size=None):
+    """
+    Post a batch of transfers from `sender_account` and return a per-line report.
+
+    `lines` is a list of dicts with `recipient_account_number`, `amount` and an
+    optional `narration`. All recipients are resolved with one
+    `account_number__in` query. Lines are then posted in chunks of
+    `BULK_TRANSFER_CHUNK_SIZE`, each chunk inside its own atomic block: the
+    sender and the chunk's recipients are locked once, valid lines are written
+    with `bulk_create` and every balance moves in a single UPDATE. A failing
+    line is reported and skipped without affecting the rest of the batch.
+
+    Every line that passes the limit checks is scored by the same fraud rules
+    as a single transfer. The rule inputs are read once for the batch and
+    advanced in memory as lines are posted, so later lines see the earlier
+    ones. A line the rules flag is saved as a flagged transaction for review
+    and the sender is frozen, which fails the remaining lines.
+    """
+    from transactions.models import (
+        AccountMonthlySummary, AccountStatistics, DailyTransferUsage, FlaggedTransaction, LedgerEntry, Transaction
+    )
+
+    chunk_size = chunk_size or settings.BULK_TRANSFER_CHUNK_SIZE
+    numbers = {str(line.get("recipient_account_number") or "").strip() for line in lines}
+    recipients = {
+        account.account_number: account
+        for account in Account.objects.select_related("user").filter(account_number__in=numbers)
+    }
+    today = localdate()
+    account_type = sender_account.account_type
+    min_balance = account_type.min_balance
+
+    stats = AccountStatistics.objects.filter(account_id=sender_account.pk).first()
+    stats = (stats.count, stats.mean, stats.m2, stats.ewma) if stats else (0, 0.0, 0.0, 0.0)
+    velocity = get_velocity(sender_account.pk, account_type.velocity_window_minutes)
+    known = known_recipients(sender_account.pk, [account.pk for account in recipients.values()])
+
+    report = []
+    for chunk_start in range(0, len(lines), chunk_size):
+        chunk = lines[chunk_start:chunk_start + chunk_size]
+        with transaction.atomic():
+            recipient_ids = [
+                recipients[number].pk
+                for number in (str(line.get("recipient_account_number") or "").strip() for line in chunk)
+                if number in recipients
+            ]
+            sender = lock_accounts([sender_account.pk] + recipient_ids)[sender_account.pk]
+            balance = sender.balance
+            daily_total = DailyTransferUsage.get_total(sender.pk, today)
+            deltas = defaultdict(Decimal)
+            debits, credits = [], []
+
+            for line_number, line in enumerate(chunk, start=chunk_start + 1):
+                number = str(line.get("recipient_account_number") or "").strip()
+                narration = line.get("narration") or None
+                amount = _parse_amount(line.get("amount"))
+                result = {"line": line_number, "recipient_account_number": number, "amount": line.get("amount")}
+                recipient = recipients.get(number)
+
+                if sender.flagged:
+                    error = "Sender account is flagged. Please contact support."
+                elif amount is None:
+                    error = "Invalid amount"
+                elif recipient is None:
+                    error = "Recipient account not found"
+                elif recipient.pk == sender.pk:
+                    error = "Cannot transfer to the sending account"
+                elif amount > sender.max_single_transfer_amount:
+                    error = "Transaction exceeds maximum single transfer limit."
+                elif daily_total + amount > sender.daily_transfer_limit:
+                    error = "Transaction exceeds daily transfer limit."
+                elif balance < amount or balance < min_balance:
+                    error = "Insufficient balance or below minimum balance."
+                else:
+                    error = None
+
+                if error:
+                    report.append({**result, "status": "failed", "error": error})
+                    continue
+
+                is_new_recipient = recipient.pk not in known
+                features = build_features(
+                    "transfer", amount, sender_account, stats[:3], {**velocity, "is_new_recipient": is_new_recipient}
+                )
+                fraud_result, _ = evaluate_rules(features)
+                if fraud_result:
+                    flagged = Transaction.objects.create(
+                        user=sender_account.user,
+                        account=sender_account,
+                        recipient_account=recipient,
+                        amount=amount,
+                        narration=narration,
+                        transaction_type="transfer",
+                        transaction_flow="debit",
+                        status="flagged",
+                    )
+                    sender.flagged = True
+                    Account.objects.filter(pk=sender.pk).update(flagged=True)
+                    logger.warning(f"Bulk transfer line {line_number} from {sender.account_number} flagged: {fraud_result}")
+                    FlaggedTransaction.objects.create(
+                        transaction=flagged, reason=fraud_result, flagged_at=now(), status="flagged"
+                    )
+                    publish("notification", notification_payload(
+                        flagged.user, flagged, message=f"Transaction flagged: {fraud_result}"
+                    ))
+                    report.append({**result, "status": "failed", "error": fraud_result, "transaction_id": str(flagged.id)})
+                    continue
+
+                stats = update_running_stats(*stats, amount, settings.FRAUD_BEHAVIOUR["EWMA_ALPHA"])
+                velocity["count"] += 1
+                velocity["amount"] += amount
+                if is_new_recipient:
+                    velocity["new_recipients"] += 1
+                    known.add(recipient.pk)
+                balance -= amount
+                daily_total += amount
+                deltas[sender.pk] -= amount
+                deltas[recipient.pk] += amount
+                debit = Transaction(
+                    user=sender_account.user,
+                    account=sender_account,
+                    recipient_account=recipient,
+                    amount=amount,
+                    narration=narration,
+                    transaction_type="transfer",
+                    transaction_flow="debit",
+                    status="success",
+                )
+                debits.append(debit)
+                credits.append(Transaction(
+                    user=recipient.user,
+                    account=recipient,
+                    amount=amount,
+                    narration=narration,
+                    transaction_type="transfer",
+                    transaction_flow="credit",
+                    status="success",
+                ))
+                report.append({**result, "amount": str(amount), "status": "success", "transaction_id": str(debit.id)})
+
+            if debits:
+                Transaction.objects.bulk_create(debits + credits)
+                AccountMonthlySummary.record(debits + credits)
+                apply_balance_deltas(deltas)
+                LedgerEntry.objects.bulk_create([
+                    entry
+                    for debit in debits
+                    for entry in LedgerEntry.build_posting(
+                        debit, {sender.pk: -debit.amount, debit.recipient_account_id: debit.amount}
+                    )
+                ])
+                DailyTransferUsage.record(sender.pk, today, -deltas[sender.pk], count=len(debits))
+                transfers = [(debit.recipient_account_id, debit.amount) for debit in debits]
+                transaction.on_commit(lambda transfers=transfers: record_transfers(sender.pk, transfers))
+                amounts_by_account = defaultdict(list)
+                for posted in debits + credits:
+                    amounts_by_account[posted.account_id].append(posted.amount)
+                AccountStatistics.observe_many(amounts_by_account)
+                publish_many("notification", [
+                    notification_payload(posted.user, posted) for posted in debits + credits
+                ])
+        logger.info(
+            f"Bulk transfer chunk from {sender_account.account_number}: "
+            f"{len(debits)} of {len(chunk)} lines posted"
+        )
+    return report
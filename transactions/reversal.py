@@ -0,0 +1,135 @@
+from collections import defaultdict
+import logging
+import uuid
+from django.conf import settings
+from django.db import transaction
+from django.utils.timezone import now
+from accounts.models import Account
+from transactions.models import AccountMonthlySummary, LedgerEntry, ReversalJob, Transaction
+from transactions.posting import apply_balance_deltas, lock_accounts
+
+logger = logging.getLogger("transactions")
+
+
+def reversal_deltas(txn):
+    """Balance corrections undoing one successful transaction, as in `Transaction.reverse_transaction`."""
+    if txn.transaction_type == "withdrawal":
+        return {txn.account_id: txn.amount}
+    if txn.transaction_type == "deposit":
+        return {txn.account_id: -txn.amount}
+    if not txn.recipient_account_id:
+        raise ValueError("Recipient account required for transfer reversal")
+    return {txn.recipient_account_id: -txn.amount, txn.account_id: txn.amount}
+
+
+def parse_transaction_id(value):
+    """The UUID named by `value`, or None when it is not a transaction id."""
+    try:
+        return uuid.UUID(str(value))
+    except ValueError:
+        return None
+
+
+def reverse_chunk(transaction_ids):
+    """
+    Reverse one chunk in a single atomic block: the net correction per
+    account is applied with one UPDATE, ledger lines, reversal rows and
+    rollups are written in bulk and the transactions are marked reversed
+    together.
+    Ids that are malformed, unknown or not reversible are reported as errors
+    without affecting the rest of the chunk.
+    Returns (reversed_count, errors).
+    """
+    errors = []
+    parsed = {transaction_id: parse_transaction_id(transaction_id) for transaction_id in transaction_ids}
+    valid = [pk for pk in parsed.values() if pk is not None]
+    with transaction.atomic():
+        # Accounts are locked before the transaction rows, in the same order as
+        # Transaction.reverse_transaction, so the two paths cannot deadlock.
+        lock_accounts(
+            account_id
+            for pair in Transaction.objects.filter(pk__in=valid).values_list("account_id", "recipient_account_id")
+            for account_id in pair
+        )
+        candidates = {
+            txn.pk: txn
+            for txn in Transaction.objects.select_for_update().filter(pk__in=valid).order_by("pk")
+        }
+        net = defaultdict(int)
+        postings = []
+        for transaction_id in transaction_ids:
+            if parsed[transaction_id] is None:
+                errors.append({"transaction_id": transaction_id, "error": "Invalid transaction id"})
+                continue
+            txn = candidates.get(parsed[transaction_id])
+            if txn is None:
+                errors.append({"transaction_id": transaction_id, "error": "Transaction not found"})
+                continue
+            if txn.status != "success":
+                errors.append({"transaction_id": transaction_id, "error": "Only successful transactions can be reversed"})
+                continue
+            try:
+                deltas = reversal_deltas(txn)
+            except ValueError as e:
+                errors.append({"transaction_id": transaction_id, "error": str(e)})
+                continue
+            for account_id, delta in deltas.items():
+                net[account_id] += delta
+            postings.append((txn, deltas))
+
+        if not postings:
+            return 0, errors
+
+        apply_balance_deltas(net)
+        LedgerEntry.objects.bulk_create([
+            entry for txn, deltas in postings for entry in LedgerEntry.build_posting(txn, deltas)
+        ])
+        reversed_transactions = [txn for txn, _ in postings]
+        AccountMonthlySummary.record(reversed_transactions, sign=-1)
+        Transaction.objects.filter(pk__in=[txn.pk for txn in reversed_transactions]).update(
+            status="reversed", updated_at=now()
+        )
+        for txn in reversed_transactions:
+            txn.status = "reversed"
+        account_users = dict(Account.objects.filter(pk__in=net.keys()).values_list("pk", "user_id"))
+        reversal = Transaction.objects.bulk_create([
+            row for txn, deltas in postings for row in txn.build_reversal(deltas, account_users)
+        ])
+        AccountMonthlySummary.record(reversed_transactions + reversal)
+    return len(postings), errors
+
+
+def run_reversal_job(job, chunk_size=None):
+    """Claim a pending job and work through its transactions chunk by chunk."""
+    chunk_size = chunk_size or settings.REVERSAL_JOB_CHUNK_SIZE
+    claimed = ReversalJob.objects.filter(pk=job.pk, status="pending").update(status="running", started_at=now())
+    if not claimed:
+        return False
+    job.refresh_from_db()
+
+    try:
+        # Start after the last committed chunk when a requeued job is picked up again.
+        for start in range(job.processed, job.total, chunk_size):
+            chunk = job.transaction_ids[start:start + chunk_size]
+            # Progress is saved in the chunk's transaction, so a restart never replays a chunk.
+            with transaction.atomic():
+                reversed_count, errors = reverse_chunk(chunk)
+                job.processed += len(chunk)
+                job.reversed_count += reversed_count
+                job.failed_count += len(errors)
+                job.errors.extend(errors)
+                job.save(update_fields=["processed", "reversed_count", "failed_count", "errors"])
+            logger.info(f"Reversal job {job.pk}: {job.processed}/{job.total} processed")
+    except Exception as e:
+        logger.error(f"Reversal job {job.pk} failed: {e}")
+        job.status = "failed"
+        job.errors.append({"transaction_id": None, "error": str(e)})
+        job.finished_at = now()
+        job.save(update_fields=["status", "errors", "finished_at"])
+        raise
+
+    job.status = "completed"
+    job.finished_at = now()
+    job.save(update_fields=["status", "finished_at"])
+    logger.info(f"Reversal job {job.pk} completed: {job.reversed_count} reversed, {job.failed_count} failed")
+    return True
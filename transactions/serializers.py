@@ -23,6 +23,8 @@ class TransactionSerializer(serializers.ModelSerializer):
             "date",
         ]
     def get_beneficiary_name(self, obj):
+        if obj.recipient_account is None:
+            return None  # Deposits and withdrawals have no beneficiary
         return obj.recipient_account.user.get_fullname()
 
 
@@ -1,7 +1,17 @@
-from django.test import TestCase  
-from transactions.models import Transaction  
+from django.test import TestCase
+from transactions.models import AccountMonthlySummary, AccountStatistics, DailyTransferUsage, Transaction  
+from django.core.management import call_command
+from transactions.posting import post_bulk_transfer
+from transactions.views import DepositMoneyView, TransactionFilterView
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIRequestFactory, force_authenticate
 from accounts.models import Account, AccountType, User  
 from decimal import Decimal  
+from io import StringIO
+from django.utils import timezone
+from django.utils.timezone import localdate
 
 class TransactionReversalTest(TestCase):  
     def setUp(self):  
@@ -119,4 +129,661 @@ class TransactionReversalTest(TestCase):
         with self.assertRaises(ValueError):
             transaction.reverse_transaction()
 
-# TODO: CORRECT THE TEST CASES ON THE TRANSFER.
\ No newline at end of file
+# TODO: CORRECT THE TEST CASES ON THE TRANSFER.
+
+class BulkReversalJobTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            phone_number="08070426133",
+            email="test@example.com",
+            password="password123"
+        )
+        self.account_type, _ = AccountType.objects.get_or_create(name='Savings')
+        self.account = Account.objects.create(
+            user=self.user,
+            balance=Decimal("1000.00"),
+            account_type=self.account_type,
+            account_number="12345678908",
+        )
+        self.recipient_account = Account.objects.create(
+            user=self.user,
+            balance=Decimal("500.00"),
+            account_type=self.account_type,
+            account_number="0987654321",
+        )
+
+    def test_bulk_reversal_job_nets_balance_corrections(self):
+        from transactions.models import ReversalJob
+
+        transactions = [
+            Transaction.objects.create(
+                user=self.user,
+                account=self.account,
+                recipient_account=self.recipient_account,
+                amount=Decimal(amount),
+                transaction_type="transfer",
+                status="success",
+            )
+            for amount in ["100.00", "50.00", "25.00"]
+        ]
+        failed = Transaction.objects.create(
+            user=self.user,
+            account=self.account,
+            amount=Decimal("10.00"),
+            transaction_type="deposit",
+            status="failed",
+        )
+        job = ReversalJob.enqueue([txn.id for txn in transactions] + [failed.id])
+        call_command("process_reversal_jobs", "--chunk-size", "2", stdout=StringIO())
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, "completed")
+        self.assertEqual((job.processed, job.reversed_count, job.failed_count), (4, 3, 1))
+        self.assertEqual(job.errors[0]["transaction_id"], str(failed.id))
+        self.account.refresh_from_db()
+        self.recipient_account.refresh_from_db()
+        self.assertEqual(self.account.balance, Decimal("1175.00"))
+        self.assertEqual(self.recipient_account.balance, Decimal("325.00"))
+        self.assertEqual(Transaction.objects.filter(status="reversed", reversal_of__isnull=True).count(), 3)
+        self.assertEqual(Transaction.objects.filter(reversal_of__in=transactions).count(), 6)  # Both sides of each transfer
+
+    def test_invalid_ids_are_reported_per_line(self):
+        from transactions.models import ReversalJob
+
+        deposit = Transaction.objects.create(
+            user=self.user,
+            account=self.account,
+            amount=Decimal("100.00"),
+            transaction_type="deposit",
+            status="success",
+        )
+        job = ReversalJob.enqueue(["not-a-uuid", deposit.id])
+        call_command("process_reversal_jobs", stdout=StringIO())
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, "completed")
+        self.assertEqual((job.reversed_count, job.failed_count), (1, 1))
+        self.assertEqual(job.errors, [{"transaction_id": "not-a-uuid", "error": "Invalid transaction id"}])
+        self.account.refresh_from_db()
+        self.assertEqual(self.account.balance, Decimal("900.00"))
+
+    def test_bulk_reversal_view_rejects_invalid_ids(self):
+        from admin_app.views import BulkReversalView
+        from rbac.models import Permission, Role
+        from transactions.models import ReversalJob
+
+        cache.clear()
+        role = Role.objects.create(name="Admin")
+        role.permissions.add(Permission.objects.create(name="can_reverse_transaction"))
+        self.user.roles.add(role)
+        request = APIRequestFactory().post("/", {"transaction_ids": ["not-a-uuid"]}, format="json")
+        force_authenticate(request, user=self.user)
+        response = BulkReversalView.as_view()(request)
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data["invalid_ids"], ["not-a-uuid"])
+        self.assertFalse(ReversalJob.objects.exists())
+
+
+class TransactionPostingTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            phone_number="08070426133",
+            email="test@example.com",
+            password="password123"
+        )
+        self.recipient_user = User.objects.create_user(
+            phone_number="08070426134",
+            email="recipient@example.com",
+            password="password123"
+        )
+        self.account_type, _ = AccountType.objects.get_or_create(name='Savings')
+        self.account = Account.objects.create(
+            user=self.user,
+            balance=Decimal("1000.00"),
+            account_type=self.account_type,
+        )
+        self.recipient_account = Account.objects.create(
+            user=self.recipient_user,
+            balance=Decimal("500.00"),
+            account_type=self.account_type,
+        )
+        cache.clear()
+
+    def test_deposit_persists_balance(self):
+        transaction = Transaction.objects.create(
+            user=self.user,
+            account=self.account,
+            amount=Decimal("100.00"),
+            transaction_type="deposit",
+        )
+        transaction.process_transaction()
+        self.account.refresh_from_db()
+        self.assertEqual(self.account.balance, Decimal("1100.00"))
+        self.assertEqual(transaction.status, "success")
+
+    def test_transfer_uses_locked_balances(self):
+        # A stale in-memory balance must not overwrite the stored one.
+        Account.objects.filter(pk=self.account.pk).update(balance=Decimal("900.00"))
+        transaction = Transaction.objects.create(
+            user=self.user,
+            account=self.account,
+            recipient_account=self.recipient_account,
+            amount=Decimal("100.00"),
+            transaction_type="transfer",
+        )
+        transaction.process_transaction()
+        self.account.refresh_from_db()
+        self.recipient_account.refresh_from_db()
+        self.assertEqual(self.account.balance, Decimal("800.00"))
+        self.assertEqual(self.recipient_account.balance, Decimal("600.00"))
+        self.assertEqual(transaction.status, "success")
+
+    def test_transfer_insufficient_balance_leaves_balances(self):
+        Account.objects.filter(pk=self.account.pk).update(balance=Decimal("300.00"))
+        transaction = Transaction.objects.create(
+            user=self.user,
+            account=self.account,
+            recipient_account=self.recipient_account,
+            amount=Decimal("900.00"),
+            transaction_type="transfer",
+        )
+        with self.assertRaises(ValueError):
+            transaction.process_transaction()
+        self.account.refresh_from_db()
+        self.recipient_account.refresh_from_db()
+        self.assertEqual(self.account.balance, Decimal("300.00"))
+        self.assertEqual(self.recipient_account.balance, Decimal("500.00"))
+        self.assertEqual(transaction.status, "failed")
+
+    def test_daily_limit_uses_usage_counter(self):
+        DailyTransferUsage.record(self.account.pk, localdate(), Decimal("4950.00"))
+        transaction = Transaction.objects.create(
+            user=self.user,
+            account=self.account,
+            recipient_account=self.recipient_account,
+            amount=Decimal("100.00"),
+            transaction_type="transfer",
+        )
+        with self.assertRaises(ValueError):
+            transaction.process_transaction()
+        self.assertEqual(DailyTransferUsage.get_total(self.account.pk, localdate()), Decimal("4950.00"))
+
+    def test_rebuild_daily_transfer_usage(self):
+        for amount in ["100.00", "250.00"]:
+            Transaction.objects.create(
+                user=self.user,
+                account=self.account,
+                recipient_account=self.recipient_account,
+                amount=Decimal(amount),
+                transaction_type="transfer",
+            ).process_transaction()
+        DailyTransferUsage.objects.all().delete()
+        call_command("rebuild_daily_transfer_usage", stdout=StringIO())
+        usage = DailyTransferUsage.objects.get(account=self.account)
+        self.assertEqual(usage.amount, Decimal("350.00"))
+        self.assertEqual(usage.transfer_count, 2)
+
+    def test_behaviour_check_uses_running_statistics(self):
+        stats = AccountStatistics(account=self.account)
+        for amount in ["10.00", "12.00", "11.00", "9.00", "10.00", "11.00", "10.00", "12.00", "9.00", "10.00"]:
+            stats.observe(Decimal(amount))
+        stats.save()
+        self.assertAlmostEqual(stats.mean, 10.4)
+        transaction = Transaction.objects.create(
+            user=self.user,
+            account=self.account,
+            recipient_account=self.recipient_account,
+            amount=Decimal("60.00"),
+            transaction_type="transfer",
+        )
+        transaction.process_transaction()
+        self.assertTrue(transaction.flagged_transaction)
+        self.account.refresh_from_db()
+        self.assertTrue(self.account.flagged)
+        self.assertEqual(self.account.balance, Decimal("1000.00"))
+
+    def test_velocity_check_uses_window_counters(self):
+        self.account_type.velocity_max_transfers = 3
+        self.account_type.save()
+        for _ in range(3):
+            with self.captureOnCommitCallbacks(execute=True):
+                Transaction.objects.create(
+                    user=self.user,
+                    account=self.account,
+                    recipient_account=self.recipient_account,
+                    amount=Decimal("10.00"),
+                    transaction_type="transfer",
+                ).process_transaction()
+        transaction = Transaction.objects.create(
+            user=self.user,
+            account=self.account,
+            recipient_account=self.recipient_account,
+            amount=Decimal("10.00"),
+            transaction_type="transfer",
+        )
+        transaction.process_transaction()
+        self.assertTrue(transaction.flagged_transaction)
+        self.assertEqual(transaction.flagged_transaction.reason, "Too many transfers in a short period.")
+
+    def test_velocity_reads_are_bounded_and_payees_survive_cache_loss(self):
+        from unittest import mock
+        from transactions.velocity import get_velocity, known_recipients, record_transfers
+
+        record_transfers(self.account.pk, [(self.recipient_account.pk, Decimal("25.00"))])
+        with mock.patch.object(cache, "get_many", wraps=cache.get_many) as get_many:
+            velocity = get_velocity(self.account.pk, 24 * 60)
+        self.assertLessEqual(len(get_many.call_args.args[0]), 3 * 60)
+        self.assertEqual((velocity["count"], velocity["amount"]), (1, Decimal("25.00")))
+
+        Transaction.objects.create(
+            user=self.user,
+            account=self.account,
+            recipient_account=self.recipient_account,
+            amount=Decimal("10.00"),
+            transaction_type="transfer",
+        ).process_transaction()
+        cache.clear()
+        self.assertFalse(get_velocity(self.account.pk, 60, self.recipient_account.pk)["is_new_recipient"])
+
+        # The account is seeded once; later first-time payees are answered from the cache alone.
+        with self.assertNumQueries(0):
+            self.assertTrue(get_velocity(self.account.pk, 60, 999999)["is_new_recipient"])
+            self.assertEqual(
+                known_recipients(self.account.pk, [self.recipient_account.pk, 999999]), {self.recipient_account.pk}
+            )
+
+    def test_posting_updates_running_statistics(self):
+        Transaction.objects.create(
+            user=self.user,
+            account=self.account,
+            recipient_account=self.recipient_account,
+            amount=Decimal("100.00"),
+            transaction_type="transfer",
+        ).process_transaction()
+        self.assertEqual(AccountStatistics.objects.get(account=self.account).count, 1)
+        self.assertEqual(AccountStatistics.objects.get(account=self.recipient_account).recent_amounts, ["100.00"])
+
+    def test_ledger_entries_and_balance_checkpoints(self):
+        import datetime
+        from django.db.models import Sum
+        from transactions.ledger import balance_at, create_balance_checkpoints
+        from transactions.models import BalanceCheckpoint, LedgerEntry
+
+        before = timezone.now()
+        transfer = Transaction.objects.create(
+            user=self.user,
+            account=self.account,
+            recipient_account=self.recipient_account,
+            amount=Decimal("100.00"),
+            transaction_type="transfer",
+        )
+        transfer.process_transaction()
+        Transaction.objects.create(
+            user=self.user,
+            account=self.account,
+            amount=Decimal("50.00"),
+            transaction_type="deposit",
+        ).process_transaction()
+
+        lines = LedgerEntry.objects.filter(transaction=transfer)
+        self.assertEqual(
+            {(line.account_id, line.entry_type) for line in lines},
+            {(self.account.pk, "debit"), (self.recipient_account.pk, "credit")},
+        )
+        totals = LedgerEntry.objects.values("entry_type").annotate(total=Sum("amount"))
+        self.assertEqual({row["entry_type"]: row["total"] for row in totals}, {"debit": Decimal("150.00"), "credit": Decimal("150.00")})
+
+        self.assertEqual(balance_at(self.account.pk, before), Decimal("1000.00"))
+        self.assertEqual(balance_at(self.account.pk, timezone.now()), Decimal("950.00"))
+
+        yesterday = localdate() - datetime.timedelta(days=1)
+        create_balance_checkpoints(yesterday)
+        self.assertEqual(BalanceCheckpoint.objects.get(account=self.account, as_of=yesterday).balance, Decimal("1000.00"))
+        self.assertEqual(balance_at(self.account.pk, timezone.now()), Decimal("950.00"))
+        self.assertEqual(balance_at(self.recipient_account.pk, timezone.now()), Decimal("600.00"))
+
+    def test_users_with_postings_are_only_deleted_after_purging_the_ledger(self):
+        from django.db.models import ProtectedError
+        from transactions.ledger import purge_ledger
+
+        Transaction.objects.create(
+            user=self.user,
+            account=self.account,
+            recipient_account=self.recipient_account,
+            amount=Decimal("100.00"),
+            transaction_type="transfer",
+        ).process_transaction()
+        users = User.objects.filter(pk__in=[self.user.pk, self.recipient_user.pk])
+        with self.assertRaises(ProtectedError):
+            users.delete()
+        purge_ledger(users)
+        users.delete()
+        self.assertFalse(Account.objects.filter(pk__in=[self.account.pk, self.recipient_account.pk]).exists())
+
+    def test_monthly_summary_rollups(self):
+        request = APIRequestFactory().get("/", {"year": localdate().year, "month": localdate().month})
+        force_authenticate(request, user=self.user)
+        transfer = Transaction.objects.create(
+            user=self.user,
+            account=self.account,
+            recipient_account=self.recipient_account,
+            amount=Decimal("100.00"),
+            transaction_type="transfer",
+        )
+        transfer.process_transaction()
+        Transaction.objects.create(
+            user=self.user,
+            account=self.account,
+            amount=Decimal("40.00"),
+            transaction_type="deposit",
+        ).process_transaction()
+        transfer.reverse_transaction()
+
+        summary = TransactionFilterView.as_view()(request).data["summary"]
+        self.assertEqual(summary, {"total_income": Decimal("40.00"), "total_expense": Decimal("0.00")})
+        reversed_row = AccountMonthlySummary.objects.get(account=self.account, status="reversed", transaction_flow="debit")
+        self.assertEqual((reversed_row.amount, reversed_row.count), (Decimal("100.00"), 1))
+        reversal_row = AccountMonthlySummary.objects.get(account=self.account, status="reversed", transaction_flow="credit")
+        self.assertEqual((reversal_row.amount, reversal_row.count), (Decimal("100.00"), 1))
+
+        expected = sorted(AccountMonthlySummary.objects.values_list("account_id", "transaction_type", "status", "amount", "count"))
+        call_command("rebuild_monthly_summaries", stdout=StringIO())
+        self.assertEqual(
+            sorted(AccountMonthlySummary.objects.exclude(count=0).values_list("account_id", "transaction_type", "status", "amount", "count")),
+            [row for row in expected if row[4]],
+        )
+
+    def test_side_effects_go_through_outbox(self):
+        from accounts.models import AuditLog
+        from notifications.models import Notification, OutboxEvent
+
+        Transaction.objects.create(
+            user=self.user,
+            account=self.account,
+            recipient_account=self.recipient_account,
+            amount=Decimal("100.00"),
+            transaction_type="transfer",
+        ).process_transaction(audit={"user_id": self.user.pk, "action": "transfer", "ip_address": None, "metadata": {}})
+        self.assertEqual(Notification.objects.count(), 0)
+        self.assertEqual(OutboxEvent.objects.filter(event_type="notification").count(), 2)
+
+        call_command("drain_outbox", stdout=StringIO())
+        self.assertEqual(Notification.objects.filter(user=self.recipient_user).count(), 1)
+        self.assertEqual(AuditLog.objects.filter(user=self.user, action="transfer").count(), 1)
+        self.assertFalse(OutboxEvent.objects.filter(event_type__in=["notification", "audit"]).exclude(status="processed").exists())
+
+    def test_bulk_transfer_reports_each_line(self):
+        lines = [
+            {"recipient_account_number": self.recipient_account.account_number, "amount": "100.00"},
+            {"recipient_account_number": "0000000000", "amount": "50.00"},
+            {"recipient_account_number": self.recipient_account.account_number, "amount": "abc"},
+            {"recipient_account_number": self.recipient_account.account_number, "amount": "950.00"},
+            {"recipient_account_number": self.recipient_account.account_number, "amount": "200.00", "narration": "Salary"},
+        ]
+        report = post_bulk_transfer(self.account, lines, chunk_size=2)
+        self.assertEqual([line["status"] for line in report], ["success", "failed", "failed", "failed", "success"])
+        self.assertEqual(report[1]["error"], "Recipient account not found")
+        self.account.refresh_from_db()
+        self.recipient_account.refresh_from_db()
+        self.assertEqual(self.account.balance, Decimal("700.00"))
+        self.assertEqual(self.recipient_account.balance, Decimal("800.00"))
+        self.assertEqual(Transaction.objects.filter(account=self.recipient_account, transaction_flow="credit").count(), 2)
+
+    def test_bulk_transfer_lines_run_fraud_rules(self):
+        stats = AccountStatistics(account=self.account)
+        for amount in ["10.00", "12.00", "11.00", "9.00", "10.00", "11.00", "10.00", "12.00", "9.00", "10.00"]:
+            stats.observe(Decimal(amount))
+        stats.save()
+        lines = [
+            {"recipient_account_number": self.recipient_account.account_number, "amount": amount}
+            for amount in ["10.00", "60.00", "10.00"]
+        ]
+        report = post_bulk_transfer(self.account, lines)
+        self.assertEqual([line["status"] for line in report], ["success", "failed", "failed"])
+        self.assertEqual(report[1]["error"], "Unusual transaction pattern detected.")
+        flagged = Transaction.objects.get(pk=report[1]["transaction_id"])
+        self.assertEqual(flagged.status, "flagged")
+        self.assertEqual(flagged.flagged_transaction.reason, "Unusual transaction pattern detected.")
+        self.account.refresh_from_db()
+        self.assertTrue(self.account.flagged)
+        self.assertEqual(self.account.balance, Decimal("990.00"))
+
+
+class IdempotencyKeyTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            phone_number="08070426133",
+            email="test@example.com",
+            password="password123"
+        )
+        self.account_type, _ = AccountType.objects.get_or_create(name='Savings')
+        self.account = Account.objects.create(
+            user=self.user,
+            balance=Decimal("1000.00"),
+            account_type=self.account_type,
+        )
+        self.factory = APIRequestFactory()
+
+    def deposit(self, amount, key):
+        request = self.factory.post("/", {"amount": amount}, format="json", HTTP_IDEMPOTENCY_KEY=key)
+        force_authenticate(request, user=self.user)
+        return DepositMoneyView.as_view()(request)
+
+    def test_retry_replays_first_response(self):
+        first = self.deposit("100.00", "key-1")
+        cache.clear()  # Force the replay to come from the durable table
+        retry = self.deposit("100.00", "key-1")
+        self.assertEqual(retry.status_code, first.status_code)
+        self.assertEqual(retry.data, first.data)
+        self.assertEqual(retry["Idempotent-Replayed"], "true")
+        self.assertEqual(Transaction.objects.filter(account=self.account).count(), 1)
+        self.account.refresh_from_db()
+        self.assertEqual(self.account.balance, Decimal("1100.00"))
+
+    def test_reused_key_with_different_body_is_rejected(self):
+        self.deposit("100.00", "key-1")
+        response = self.deposit("200.00", "key-1")
+        self.assertEqual(response.status_code, 422)
+        self.assertEqual(Transaction.objects.filter(account=self.account).count(), 1)
+
+
+class KeysetPaginationTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            phone_number="08070426133",
+            email="test@example.com",
+            password="password123"
+        )
+        self.account_type, _ = AccountType.objects.get_or_create(name='Savings')
+        self.account = Account.objects.create(
+            user=self.user,
+            balance=Decimal("1000.00"),
+            account_type=self.account_type,
+        )
+        Transaction.objects.bulk_create([
+            Transaction(user=self.user, account=self.account, amount=Decimal(amount), transaction_type="deposit")
+            for amount in range(1, 26)
+        ])
+        # Identical timestamps force the id tie-breaker to keep pages disjoint.
+        Transaction.objects.filter(amount__lte=12).update(date=timezone.now() - timezone.timedelta(days=1))
+        self.factory = APIRequestFactory()
+
+    def get(self, url):
+        request = self.factory.get(url)
+        force_authenticate(request, user=self.user)
+        return TransactionFilterView.as_view()(request)
+
+    def test_cursor_pages_cover_every_row_once(self):
+        seen = []
+        pages = []
+        url = "/?pagination=cursor&page_size=10"
+        while url:
+            response = self.get(url)
+            self.assertEqual(response.status_code, 200)
+            self.assertIsNone(response.data["count"])
+            pages.append(response)
+            seen.extend(row["amount"] for row in response.data["results"])
+            url = response.data["links"]["next"]
+        self.assertEqual(len(pages), 3)
+        self.assertEqual(len(seen), 25)
+        self.assertEqual(len(set(seen)), 25)
+
+        previous = self.get(pages[2].data["links"]["previous"])
+        self.assertEqual(previous.data["results"], pages[1].data["results"])
+
+    def test_invalid_cursor_is_rejected(self):
+        self.assertEqual(self.get("/?cursor=not-a-cursor").status_code, 404)
+
+
+class QueryPlanTest(TestCase):
+    """Listing endpoints must not fall back to full table scans."""
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            phone_number="08070426133",
+            email="test@example.com",
+            password="password123"
+        )
+        self.account_type, _ = AccountType.objects.get_or_create(name='Savings')
+        self.account = Account.objects.create(
+            user=self.user,
+            balance=Decimal("1000.00"),
+            account_type=self.account_type,
+        )
+        Transaction.objects.bulk_create([
+            Transaction(user=self.user, account=self.account, amount=Decimal(amount), transaction_type="deposit")
+            for amount in range(1, 26)
+        ])
+        self.factory = APIRequestFactory()
+
+    def full_table_scans(self, sql, params=()):
+        with connection.cursor() as cursor:
+            if connection.vendor == "sqlite":
+                cursor.execute(f"EXPLAIN QUERY PLAN {sql}", params)
+                return [row[-1] for row in cursor.fetchall() if row[-1].startswith("SCAN ") and " INDEX " not in row[-1]]
+            if connection.vendor == "mysql":
+                cursor.execute(f"EXPLAIN {sql}", params)
+                columns = [column[0] for column in cursor.description]
+                plans = [dict(zip(columns, row)) for row in cursor.fetchall()]
+                return [plan["table"] for plan in plans if plan["type"] == "ALL"]
+        self.skipTest(f"No query plan check for {connection.vendor}")
+
+    def assertNoFullTableScans(self, view, url):
+        request = self.factory.get(url)
+        force_authenticate(request, user=self.user)
+        with CaptureQueriesContext(connection) as queries:
+            response = view.as_view()(request)
+        self.assertEqual(response.status_code, 200)
+        for query in queries.captured_queries:
+            if query["sql"].startswith("SELECT"):
+                self.assertEqual(self.full_table_scans(query["sql"]), [], query["sql"])
+
+    def test_transaction_listing_uses_indexes(self):
+        self.assertNoFullTableScans(TransactionFilterView, "/")
+        self.assertNoFullTableScans(TransactionFilterView, f"/?year={localdate().year}&month={localdate().month}")
+        self.assertNoFullTableScans(TransactionFilterView, "/?pagination=cursor&page_size=10")
+
+    def get_transactions(self, url):
+        request = self.factory.get(url)
+        force_authenticate(request, user=self.user)
+        return TransactionFilterView.as_view()(request)
+
+    def test_out_of_range_month_is_rejected(self):
+        self.assertEqual(self.get_transactions("/?year=2025&month=13").status_code, 400)
+        self.assertEqual(self.get_transactions("/?month=0").status_code, 400)
+
+    def test_out_of_range_year_is_rejected(self):
+        self.assertEqual(self.get_transactions("/?year=9999").status_code, 400)
+        self.assertEqual(self.get_transactions("/?year=0&month=1").status_code, 400)
+
+    def test_summary_ignores_out_of_range_year_and_month(self):
+        from transactions.filters import TransactionFilter
+
+        queryset = Transaction.objects.filter(user=self.user)
+        for params in [{"year": "2025", "month": "13"}, {"year": "9999"}, {"month": "0"}]:
+            summary = TransactionFilter(params, queryset=queryset).get_summary(self.user)
+            self.assertEqual(summary, {"total_income": None, "total_expense": None})
+
+    def test_notification_listing_uses_indexes(self):
+        from notifications.views import NotificationListView
+
+        self.assertNoFullTableScans(NotificationListView, "/")
+
+    def test_statement_query_uses_indexes(self):
+        from statement.utils import statement_transactions
+
+        queryset = statement_transactions(self.account, localdate() - timezone.timedelta(days=30), localdate())
+        self.assertEqual(self.full_table_scans(*queryset.query.sql_with_params()), [])
+
+
+class FraudRuleEngineTest(TestCase):
+    def test_batch_scores_match_online_scores(self):
+        import pandas as pd
+        from transactions.fraud_rules import get_rules, score_frame
+
+        frame = pd.DataFrame([
+            {"transaction_type": "transfer", "amount": 1500.0, "max_single_transfer_amount": 1000.0,
+             "stats_count": 0, "stats_mean": 0.0, "stats_m2": 0.0},
+            {"transaction_type": "deposit", "amount": 1500.0, "max_single_transfer_amount": 1000.0,
+             "stats_count": 3, "stats_mean": 100.0, "stats_m2": 50.0},
+            {"transaction_type": "transfer", "amount": 200.0, "max_single_transfer_amount": 1000.0,
+             "stats_count": 20, "stats_mean": 100.0, "stats_m2": 19 * 25.0},
+            {"transaction_type": "transfer", "amount": 110.0, "max_single_transfer_amount": 1000.0,
+             "stats_count": 20, "stats_mean": 100.0, "stats_m2": 19 * 25.0},
+            {"transaction_type": "transfer", "amount": 110.0, "max_single_transfer_amount": 1000.0,
+             "stats_count": 20, "stats_mean": 100.0, "stats_m2": 19 * 25.0},
+        ])
+        velocity = pd.DataFrame([
+            (0, 0.0, False, 0), (0, 0.0, False, 0), (2, 300.0, True, 1), (3, 500.0, True, 4), (20, 500.0, False, 0),
+        ], columns=["velocity_count", "velocity_amount", "is_new_recipient", "velocity_new_recipients"])
+        frame = pd.concat([frame, velocity], axis=1).assign(
+            velocity_max_transfers=20, velocity_max_amount=20000.0, velocity_max_new_recipients=5,
+        )
+        scored, runtimes = score_frame(frame)
+        self.assertEqual(set(runtimes), {"max_single_transfer", "behaviour", "velocity", "new_recipient_burst"})
+        for rule in get_rules():
+            online = [rule.score(row) for row in frame.to_dict("records")]
+            self.assertEqual(list(scored[f"{rule.name}_score"].round(6)), [round(score, 6) for score in online])
+        self.assertEqual(list(scored["score"] > 1.0), [True, True, True, False, True])
+        self.assertEqual(scored["reasons"][0], "Transaction exceeds maximum single transfer limit.")
+
+    def test_backtest_reports_rule_flags_against_reviewed_flags(self):
+        from transactions.models import FlaggedTransaction
+
+        user = User.objects.create_user(phone_number="08070426133", email="test@example.com", password="password123")
+        account_type, _ = AccountType.objects.get_or_create(name='Savings')
+        account = Account.objects.create(user=user, balance=Decimal("1000.00"), account_type=account_type)
+
+        # Ten alternating deposits warm up the statistics (mean 100, std ~10.5),
+        # then a confirmed fraud over the single transfer limit, a transfer the
+        # behaviour rule wrongly flags, and a confirmed fraud no rule catches.
+        history = [("deposit", "90.00" if i % 2 else "110.00", "success") for i in range(10)] + [
+            ("transfer", "1500.00", "flagged"),
+            ("transfer", "300.00", "flagged"),
+            ("deposit", "100.00", "success"),
+        ]
+        start = timezone.now() - timezone.timedelta(days=len(history))
+        txns = []
+        for i, (transaction_type, amount, status) in enumerate(history):
+            txn = Transaction.objects.create(
+                user=user, account=account, amount=Decimal(amount), transaction_type=transaction_type, status=status
+            )
+            Transaction.objects.filter(pk=txn.pk).update(date=start + timezone.timedelta(days=i))
+            txns.append(txn)
+        for txn, status in [(txns[10], "rejected"), (txns[11], "unflagged"), (txns[12], "rejected")]:
+            FlaggedTransaction.objects.create(transaction=txn, reason="Reviewed", reviewed=True, status=status)
+
+        out = StringIO()
+        call_command("backtest_fraud_rules", stdout=out)
+        output = out.getvalue()
+
+        self.assertIn("Scored 13 transactions for 1 accounts", output)
+        self.assertIn("max_single_transfer: flagged 1 (7.69%)", output)
+        self.assertIn("behaviour: flagged 2 (15.38%)", output)
+        self.assertIn("velocity: skipped", output)
+        self.assertIn("new_recipient_burst: skipped", output)
+        self.assertIn("Flag rate: 2 (15.38%)", output)
+        self.assertIn(
+            "precision 50.00% (1 confirmed of 2 reviewed), recall 50.00% of 2 confirmed frauds", output
+        )
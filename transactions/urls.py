@@ -1,6 +1,7 @@
 from django.urls import path
 from transactions.views import (
     TransferMoneyView,
+    BulkTransferView,
     DepositMoneyView,
     WithdrawMoneyView,
     TransactionFilterView,
@@ -14,6 +15,7 @@ from transactions.views import (
 
 urlpatterns = [
     path('transfer/', TransferMoneyView.as_view()),
+    path('bulk-transfer/', BulkTransferView.as_view()),
     path('deposit/', DepositMoneyView.as_view()),
     path('withdraw/', WithdrawMoneyView.as_view()),  # TODO: Add permission checks for withdrawal amount and account balance.
     path('transaction-filter/', TransactionFilterView.as_view()),
@@ -1,52 +1,113 @@
 from decimal import Decimal
-from django.utils.timezone import now
-from django.db.models import Sum, Avg
 import logging
+import math
+from transactions.fraud_rules import evaluate_rules, get_rules
+from transactions.velocity import get_velocity
 
 logger = logging.getLogger("transactions")
 
 
+def update_running_stats(count, mean, m2, ewma, amount, alpha):
+    """
+    Fold one observation into running statistics (Welford's algorithm for the
+    mean and M2, plus an exponentially weighted moving average).
+    Returns the new (count, mean, m2, ewma).
+    """
+    amount = float(amount)
+    count += 1
+    delta = amount - mean
+    mean += delta / count
+    m2 += delta * (amount - mean)
+    ewma = amount if count == 1 else alpha * amount + (1 - alpha) * ewma
+    return count, mean, m2, ewma
+
+
+def z_score(amount, count, mean, m2):
+    """Standard score of `amount` against running statistics, or None when the spread is unknown."""
+    if count < 2:
+        return None
+    std = math.sqrt(m2 / (count - 1))
+    if not std:
+        return None
+    return (float(amount) - mean) / std
+
+
+def build_features(transaction_type, amount, account, stats, velocity=None):
+    """
+    Rule inputs for one transaction of `account`. `stats` is the account's
+    running (count, mean, m2); `velocity` is a `get_velocity` result plus the
+    transfer's `is_new_recipient`, given for transfers only.
+    """
+    count, mean, m2 = stats
+    features = {
+        "transaction_type": transaction_type,
+        "amount": Decimal(amount),
+        "max_single_transfer_amount": account.max_single_transfer_amount,
+        "stats_count": count,
+        "stats_mean": mean,
+        "stats_m2": m2,
+    }
+    if velocity is not None:
+        account_type = account.account_type
+        features.update({
+            "velocity_count": velocity["count"],
+            "velocity_amount": velocity["amount"],
+            "velocity_new_recipients": velocity["new_recipients"],
+            "is_new_recipient": velocity["is_new_recipient"],
+            "velocity_max_transfers": account_type.velocity_max_transfers,
+            "velocity_max_amount": account_type.velocity_max_amount,
+            "velocity_max_new_recipients": account_type.velocity_max_new_recipients,
+        })
+    return features
+
+
 class FraudDetection:
     """
     A class to detect fraudulent transactions based on certain criteria.
+    The criteria are the rules registered in `transactions.fraud_rules`.
     """
 
     def __init__(self, transaction):
         self.transaction = transaction
+        self._features = None
 
-    def check_limits(self):
-        account = self.transaction.account
-
-        if self.transaction.transaction_type != "transfer":
-            return None  # Skip for withdrawal or deposit
+    def get_features(self):
+        """Collect the inputs the registered rules read for this transaction."""
+        from transactions.models import AccountStatistics  # Import here to avoid circular dependency
 
-        if self.transaction.amount > account.max_single_transfer_amount:
-            logger.warning(f"Transaction amount {self.transaction.amount} exceeds the maximum single transfer limit.")
-            return "Transaction exceeds maximum single transfer limit."
+        if self._features is None:
+            account = self.transaction.account
+            stats = AccountStatistics.objects.filter(account_id=account.pk).first()
+            velocity = None
+            if self.transaction.transaction_type == "transfer":
+                velocity = get_velocity(
+                    account.pk, account.account_type.velocity_window_minutes, self.transaction.recipient_account_id
+                )
+            self._features = build_features(
+                self.transaction.transaction_type,
+                self.transaction.amount,
+                account,
+                (stats.count, stats.mean, stats.m2) if stats else (0, 0.0, 0.0),
+                velocity,
+            )
+        return self._features
 
-        return None
+    def check_rule(self, name):
+        score, reason = get_rules([name])[0].evaluate(self.get_features())
+        if reason:
+            logger.warning(f"Transaction amount {self.transaction.amount} failed fraud rule {name} (score {score:.2f}).")
+        return reason
 
+    def check_limits(self):
+        return self.check_rule("max_single_transfer")
 
     def check_behaviour(self):
         """Check for unusual transaction patterns."""
-        average_transaction = self.transaction.account.transactions.aggregate(
-            Avg('amount')
-        )['amount__avg'] or Decimal(0)
-        if self.transaction.amount > average_transaction * 10:
-            logger.warning(f"Transaction amount {self.transaction.amount} is unusually high compared to average.")
-            return "Unusual transaction pattern detected."
-        return None
+        return self.check_rule("behaviour")
 
     def run_checks(self):
         """
         Run all fraud detection checks.
         """
-        checks = [
-            self.check_limits,
-            self.check_behaviour
-        ]
-        for check in checks:
-            result = check()
-            if result:
-                return result
-        return None
\ No newline at end of file
+        reason, results = evaluate_rules(self.get_features())
+        return reason
@@ -0,0 +1,130 @@
+from datetime import timedelta
+from decimal import Decimal
+import math
+import time
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.timezone import now
+
+# Counters are kept per account in fixed time buckets, once for every size in
+# VELOCITY_BUCKET_SECONDS. A window of M minutes is read from the finest size
+# that covers it in at most VELOCITY_MAX_BUCKETS buckets, with a single
+# get_many, so a read costs at most 3 * VELOCITY_MAX_BUCKETS keys whatever the
+# window and however many transfers the account made.
+METRICS = ("count", "amount", "new_recipients")
+
+
+def _bucket_size(window_minutes):
+    sizes = sorted(settings.VELOCITY_BUCKET_SECONDS)
+    for size in sizes:
+        if math.ceil(window_minutes * 60 / size) <= settings.VELOCITY_MAX_BUCKETS:
+            return size
+    return sizes[-1]
+
+
+def _counter_key(account_id, metric, size, bucket):
+    return f"velocity_{account_id}_{metric}_{size}_{bucket}"
+
+
+def _recipient_key(account_id, recipient_account_id):
+    return f"velocity_seen_{account_id}_{recipient_account_id}"
+
+
+def _increment(key, value, ttl):
+    cache.add(key, 0, ttl)
+    try:
+        cache.incr(key, value)
+    except ValueError:
+        # The key expired between add() and incr(); start a fresh bucket.
+        cache.set(key, value, ttl)
+
+
+def _seeded_key(account_id):
+    return f"velocity_seeded_{account_id}"
+
+
+def _seed_known_recipients(account_id):
+    """
+    Every recipient `account_id` paid within VELOCITY_KNOWN_RECIPIENT_TTL, read
+    from the transfer history and written to the cache together with a marker
+    saying the account is seeded. Keeps existing payees "known" after a cache
+    restart or eviction; once the marker is set, a payee missing from the cache
+    is a first-time payee and is answered without touching the database.
+    """
+    from transactions.models import Transaction  # Import here to avoid circular dependency
+
+    found = set(Transaction.objects.filter(
+        account_id=account_id,
+        recipient_account_id__isnull=False,
+        transaction_type="transfer",
+        status="success",
+        date__gte=now() - timedelta(seconds=settings.VELOCITY_KNOWN_RECIPIENT_TTL),
+    ).values_list("recipient_account_id", flat=True).distinct())
+    values = {_recipient_key(account_id, recipient_account_id): 1 for recipient_account_id in found}
+    values[_seeded_key(account_id)] = 1
+    cache.set_many(values, settings.VELOCITY_KNOWN_RECIPIENT_TTL)
+    return found
+
+
+def record_transfers(account_id, transfers, timestamp=None):
+    """
+    Count posted transfers into the current bucket of every size. `transfers`
+    is a list of (recipient_account_id, amount) pairs. Amounts are stored in
+    minor units so the counters can use atomic `incr`.
+    """
+    timestamp = timestamp or time.time()
+    total = sum(int(Decimal(amount) * 100) for _, amount in transfers)
+    new_recipients = sum(
+        1 for recipient_account_id in {recipient for recipient, _ in transfers}
+        if cache.add(_recipient_key(account_id, recipient_account_id), 1, settings.VELOCITY_KNOWN_RECIPIENT_TTL)
+    )
+    for size in settings.VELOCITY_BUCKET_SECONDS:
+        bucket = int(timestamp // size)
+        ttl = settings.VELOCITY_MAX_WINDOW_MINUTES * 60 + size
+        _increment(_counter_key(account_id, "count", size, bucket), len(transfers), ttl)
+        _increment(_counter_key(account_id, "amount", size, bucket), total, ttl)
+        if new_recipients:
+            _increment(_counter_key(account_id, "new_recipients", size, bucket), new_recipients, ttl)
+
+
+def known_recipients(account_id, recipient_account_ids):
+    """The subset of `recipient_account_ids` that `account_id` has already transferred to."""
+    keys = {_recipient_key(account_id, recipient_account_id): recipient_account_id for recipient_account_id in recipient_account_ids}
+    values = cache.get_many(list(keys) + [_seeded_key(account_id)])
+    known = {keys[key] for key in values if key in keys}
+    if _seeded_key(account_id) not in values:
+        known |= _seed_known_recipients(account_id) & set(keys.values())
+    return known
+
+
+def get_velocity(account_id, window_minutes, recipient_account_id=None, timestamp=None):
+    """
+    Totals for the last `window_minutes` (rounded up to whole buckets):
+    transfer count, amount, first-time recipients, and whether
+    `recipient_account_id` would be a first-time recipient.
+    """
+    timestamp = timestamp or time.time()
+    window_minutes = min(window_minutes, settings.VELOCITY_MAX_WINDOW_MINUTES)
+    size = _bucket_size(window_minutes)
+    current = int(timestamp // size)
+    buckets = range(current - math.ceil(window_minutes * 60 / size) + 1, current + 1)
+    keys = [_counter_key(account_id, metric, size, bucket) for bucket in buckets for metric in METRICS]
+    if recipient_account_id is not None:
+        keys += [_recipient_key(account_id, recipient_account_id), _seeded_key(account_id)]
+    values = cache.get_many(keys)
+
+    totals = dict.fromkeys(METRICS, 0)
+    for bucket in buckets:
+        for metric in METRICS:
+            totals[metric] += values.get(_counter_key(account_id, metric, size, bucket), 0)
+    is_new_recipient = (
+        recipient_account_id is not None
+        and _recipient_key(account_id, recipient_account_id) not in values
+        and (_seeded_key(account_id) in values or recipient_account_id not in _seed_known_recipients(account_id))
+    )
+    return {
+        "count": totals["count"],
+        "amount": Decimal(totals["amount"]) / 100,
+        "new_recipients": totals["new_recipients"],
+        "is_new_recipient": is_new_recipient,
+    }
@@ -1,19 +1,23 @@
 from decimal import Decimal
+import csv
+import io
+from django.conf import settings
 from django.shortcuts import get_object_or_404
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from fintech.throttling import CustomRateThrottle
 from rest_framework.throttling import UserRateThrottle
-from transactions.pagination import CustomPagination
+from transactions.pagination import get_paginator
 from transactions.filters import TransactionFilter
 from rest_framework import status
 from accounts.models import Account
 from accounts.utils import log_audit
-from django.db.models import Sum, Q
 import logging
 from notifications.services import send_notification
 from transactions.models import Transaction
+from transactions.posting import post_bulk_transfer
+from transactions.idempotency import idempotent
 from transactions.serializers import (
     TransactionSerializer, 
     WithdrawalSerializer, 
@@ -28,6 +32,7 @@ class DepositMoneyView(APIView):
     permission_classes = [IsAuthenticated]
     throttle_classes = [UserRateThrottle]
 
+    @idempotent
     def post(self, request):
         amount = request.data.get('amount')
         if not amount or Decimal(amount) < 0:
@@ -36,22 +41,20 @@ class DepositMoneyView(APIView):
         transaction = Transaction.objects.create(
             user=request.user,
             account=account, 
-            amount=amount, 
+            amount=Decimal(amount), 
             transaction_type="deposit", 
             status="pending"
             )
-        transaction.process_transaction()
-        if transaction.status == 'success':
-            log_audit(
-                user=request.user,
-                action="deposit",
-                ip_address=request.META.get('REMOTE_ADDR'),
-                metadata={
-                    "account_number": account.account_number,
-                    "amount": amount,
-                    # "transaction_id": transaction.id
-                }
-            )
+        transaction.process_transaction(audit={
+            "user_id": request.user.pk,
+            "action": "deposit",
+            "ip_address": request.META.get('REMOTE_ADDR'),
+            "metadata": {
+                "account_number": account.account_number,
+                "amount": amount,
+                # "transaction_id": transaction.id
+            }
+        })
         logger.info(f"Deposit successful for account {request.user.email}. Amount: {amount}")
         return Response(DepositSerializer(transaction).data, status=status.HTTP_201_CREATED)
 
@@ -59,6 +62,7 @@ class WithdrawMoneyView(APIView):
     permission_classes = [IsAuthenticated]
     throttle_classes = [UserRateThrottle]
 
+    @idempotent
     def post(self, request):
         amount = request.data.get('amount')
         if not amount or Decimal(amount) < 0:
@@ -71,22 +75,20 @@ class WithdrawMoneyView(APIView):
         transaction = Transaction.objects.create(
             user=request.user,
             account=account, 
-            amount=amount, 
+            amount=Decimal(amount), 
             transaction_type="withdrawal", 
             status="pending"
             )
-        transaction.process_transaction()
-        if transaction.status == 'success':
-            log_audit(
-                user=request.user,
-                action="withdrawal",
-                ip_address=request.META.get('REMOTE_ADDR'),
-                metadata={
-                    "account_number": account.account_number,
-                    "amount": amount,
-                    # "transaction_id": transaction.id
-                }
-            )
+        transaction.process_transaction(audit={
+            "user_id": request.user.pk,
+            "action": "withdrawal",
+            "ip_address": request.META.get('REMOTE_ADDR'),
+            "metadata": {
+                "account_number": account.account_number,
+                "amount": amount,
+                # "transaction_id": transaction.id
+            }
+        })
         logger.info(f"Withdrawal successful for account {request.user.email}. Amount: {amount}")
 
         return Response(WithdrawalSerializer(transaction).data, status=status.HTTP_201_CREATED)
@@ -95,6 +97,7 @@ class TransferMoneyView(APIView):
     permission_classes = [IsAuthenticated]
     throttle_classes = [CustomRateThrottle]
 
+    @idempotent
     def post(self, request):
         amount = request.data.get('amount')
         recipient_account_number = request.data.get('recipient_account_number')
@@ -120,7 +123,17 @@ class TransferMoneyView(APIView):
             status="pending",
         )
         try:
-            transaction.process_transaction()
+            transaction.process_transaction(audit={
+                "user_id": request.user.pk,
+                "action": "transfer",
+                "ip_address": request.META.get('REMOTE_ADDR'),
+                "metadata": {
+                    "account_number": sender_account.account_number,
+                    "recipient_account_number": recipient_account.account_number,
+                    "amount": amount,
+                    # "transaction_id": transaction.id
+                }
+            })
             if transaction.status == 'flagged':
                 log_audit(
                         user=request.user,
@@ -132,17 +145,6 @@ class TransferMoneyView(APIView):
                         }
                     )
             if transaction.status == 'success':
-                log_audit(
-                    user=request.user,
-                    action="transfer",
-                    ip_address=request.META.get('REMOTE_ADDR'),
-                    metadata={
-                        "account_number": sender_account.account_number,
-                        "recipient_account_number": recipient_account.account_number,
-                        "amount": amount,
-                        # "transaction_id": transaction.id
-                    }
-                )
                 logger.info(f"Transfer successful from {sender_account.account_number} to {recipient_account.account_number}. Amount: {amount}")
         except Exception as e:
             logger.error(f"Transaction processing failed: {e}")
@@ -151,6 +153,61 @@ class TransferMoneyView(APIView):
     
 
 
+class BulkTransferView(APIView):
+    """
+    Post a batch of transfers (payroll, disbursements) from the user's account.
+    Accepts either a JSON body `{"transfers": [...]}` or a CSV upload in `file`
+    with the columns recipient_account_number, amount and narration.
+    """
+    permission_classes = [IsAuthenticated]
+    throttle_classes = [CustomRateThrottle]
+
+    def post(self, request):
+        upload = request.FILES.get('file')
+        if upload:
+            try:
+                lines = list(csv.DictReader(io.StringIO(upload.read().decode('utf-8-sig'))))
+            except (UnicodeDecodeError, csv.Error) as e:
+                logger.error(f"Bulk transfer failed for account {request.user.email}. Unreadable CSV: {e}")
+                return Response({"error": "Invalid CSV file"}, status=status.HTTP_400_BAD_REQUEST)
+        else:
+            lines = request.data.get('transfers')
+        if not isinstance(lines, list) or not lines or not all(isinstance(line, dict) for line in lines):
+            return Response({"error": "A non-empty list of transfers is required"}, status=status.HTTP_400_BAD_REQUEST)
+        if len(lines) > settings.BULK_TRANSFER_MAX_LINES:
+            return Response(
+                {"error": f"A batch cannot contain more than {settings.BULK_TRANSFER_MAX_LINES} transfers"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        sender_account = get_object_or_404(Account.objects.select_related('account_type', 'user'), user=request.user)
+        if sender_account.flagged:
+            logger.warning(f"Sender account {sender_account.account_number} flagged for suspicious activity.")
+            return Response({"Error": "Please contact support immediately..."}, status=status.HTTP_400_BAD_REQUEST)
+
+        results = post_bulk_transfer(sender_account, lines)
+        succeeded = [result for result in results if result["status"] == "success"]
+        log_audit(
+            user=request.user,
+            action="bulk_transfer",
+            ip_address=request.META.get('REMOTE_ADDR'),
+            metadata={
+                "account_number": sender_account.account_number,
+                "lines": len(results),
+                "succeeded": len(succeeded),
+                "amount": str(sum((Decimal(result["amount"]) for result in succeeded), Decimal(0))),
+            }
+        )
+        logger.info(f"Bulk transfer from {sender_account.account_number}: {len(succeeded)} of {len(results)} lines posted")
+        data = {
+            "total": len(results),
+            "succeeded": len(succeeded),
+            "failed": len(results) - len(succeeded),
+            "results": results,
+        }
+        return Response(data, status=status.HTTP_201_CREATED if succeeded else status.HTTP_400_BAD_REQUEST)
+
+
 class TransactionFilterView(APIView):
     permission_classes = [IsAuthenticated]
     throttle_classes = [UserRateThrottle]
@@ -160,12 +217,9 @@ class TransactionFilterView(APIView):
         transaction_filter = TransactionFilter(request.GET, queryset=queryset)
         if not transaction_filter.is_valid():
             return Response({"error": "Invalid filters"}, status=status.HTTP_400_BAD_REQUEST)
-        queryset = transaction_filter.qs
-        transaction_summary = queryset.aggregate(  
-            total_income=Sum('amount', filter=Q(transaction_type='success')),  
-            total_expense=Sum('amount', filter=Q(transaction_type='success'))  
-        )
-        paginator = CustomPagination()
+        queryset = transaction_filter.qs.order_by('-date', '-id')
+        transaction_summary = transaction_filter.get_summary(user)
+        paginator = get_paginator(request, ordering=("-date", "-id"))
         page = paginator.paginate_queryset(queryset, request)
         if page is not None:
             serializer = TransactionFilterSerializer(page, many=True)